@@ -1,13 +1,17 @@
 from django.contrib.auth import authenticate, get_user_model
 from rest_framework import serializers
 
+from auth_app.summaries import get_fullname, get_user_summary
+
 User = get_user_model()
 
 
-def _get_fullname(user: User) -> str:
-    """Return a trimmed full name fallback to username."""
-    full_name = user.get_full_name().strip()
-    return full_name or user.username
+def _split_fullname(fullname: str) -> tuple[str, str]:
+    """Split a display name into first and last name parts."""
+    parts = fullname.strip().split()
+    first_name = parts[0] if parts else ""
+    last_name = " ".join(parts[1:]) if len(parts) > 1 else ""
+    return first_name, last_name
 
 
 class RegistrationSerializer(serializers.Serializer):
@@ -29,11 +33,7 @@ class RegistrationSerializer(serializers.Serializer):
         return attrs
 
     def create(self, validated_data):
-        fullname = validated_data["fullname"].strip()
-        parts = fullname.split()
-        first_name = parts[0] if parts else ""
-        last_name = " ".join(parts[1:]) if len(parts) > 1 else ""
-
+        first_name, last_name = _split_fullname(validated_data["fullname"])
         user = User.objects.create_user(
             username=validated_data["email"],
             email=validated_data["email"],
@@ -43,11 +43,25 @@ class RegistrationSerializer(serializers.Serializer):
         )
         return user
 
+    def build_user(self, encoded_password):
+        """Return an unsaved user whose password was already hashed elsewhere."""
+        first_name, last_name = _split_fullname(self.validated_data["fullname"])
+        return User(
+            username=User.normalize_username(self.validated_data["email"]),
+            email=User.objects.normalize_email(self.validated_data["email"]),
+            first_name=first_name,
+            last_name=last_name,
+            password=encoded_password,
+        )
+
 
-class LoginSerializer(serializers.Serializer):
+class LoginCredentialsSerializer(serializers.Serializer):
+    """Shape-only login input; credentials are checked by the caller."""
     email = serializers.EmailField()
     password = serializers.CharField(write_only=True)
 
+
+class LoginSerializer(LoginCredentialsSerializer):
     def validate(self, attrs):
         """Authenticate by email; surface a generic error on failure."""
         user = authenticate(username=attrs["email"], password=attrs["password"])
@@ -66,4 +80,8 @@ class UserLookupSerializer(serializers.ModelSerializer):
 
     def get_fullname(self, obj):
         """Expose the formatted name for lookups."""
-        return _get_fullname(obj)
+        return get_fullname(obj)
+
+    def to_representation(self, instance):
+        """Reuse the request-scoped user summary instead of rebuilding fields."""
+        return get_user_summary(instance, self.context)
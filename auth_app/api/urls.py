@@ -1,9 +1,17 @@
+from django.conf import settings
 from django.urls import path
 
-from .views import EmailCheckView, LoginView, RegisterView
+from .views import AsyncLoginView, AsyncRegisterView, EmailCheckView, LoginView, RegisterView
+
+if settings.AUTH_ASYNC_HASHING:
+    register_view = AsyncRegisterView.as_view()
+    login_view = AsyncLoginView.as_view()
+else:
+    register_view = RegisterView.as_view()
+    login_view = LoginView.as_view()
 
 urlpatterns = [
-    path("registration/", RegisterView.as_view(), name="register"),
-    path("login/", LoginView.as_view(), name="login"),
+    path("registration/", register_view, name="register"),
+    path("login/", login_view, name="login"),
     path("email-check/", EmailCheckView.as_view(), name="email-check"),
 ]
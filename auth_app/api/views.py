@@ -1,16 +1,33 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password, verify_password
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework import generics, permissions, status
 from rest_framework.authtoken.models import Token
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
-from .serializers import LoginSerializer, RegistrationSerializer, UserLookupSerializer, _get_fullname
+from auth_app.hashing import HashingPoolSaturated, get_hashing_pool
+from auth_app.summaries import get_fullname
+from .serializers import (
+    LoginCredentialsSerializer,
+    LoginSerializer,
+    RegistrationSerializer,
+    UserLookupSerializer,
+)
 
 User = get_user_model()
 
 
 def _user_payload(user):
     """Shape the minimal user fields for auth responses."""
-    full_name = _get_fullname(user)
+    full_name = get_fullname(user)
     return {
         "user_id": user.id,
         "email": user.email,
@@ -54,6 +71,99 @@ class LoginView(generics.GenericAPIView):
         return _auth_response(user)
 
 
+def _parse_body(request):
+    """Decode a JSON or form request body; return None if it is malformed."""
+    if request.content_type == "application/json":
+        try:
+            return json.loads(request.body or b"{}")
+        except ValueError:
+            return None
+    return request.POST
+
+
+def _bad_body_response():
+    """Mirror DRF's parse error for malformed JSON bodies."""
+    return JsonResponse({"detail": "JSON parse error."}, status=status.HTTP_400_BAD_REQUEST)
+
+
+def _overloaded_response():
+    """Shed the request quickly while the hashing pool is saturated."""
+    response = JsonResponse(
+        {"detail": "Authentication is temporarily overloaded. Please retry shortly."},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
+    response["Retry-After"] = str(settings.AUTH_HASHING_RETRY_AFTER)
+    return response
+
+
+async def _async_auth_response(user, status_code=status.HTTP_200_OK):
+    """Async counterpart of _auth_response for the ASGI auth views."""
+    token, _ = await Token.objects.aget_or_create(user=user)
+    payload = _user_payload(user)
+    payload["token"] = token.key
+    return JsonResponse(payload, status=status_code)
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncRegisterView(View):
+    """Registration endpoint that hashes the password on the bounded pool."""
+
+    async def post(self, request, *args, **kwargs):
+        """Validate input, hash off-thread and create the user."""
+        data = _parse_body(request)
+        if data is None:
+            return _bad_body_response()
+        serializer = RegistrationSerializer(data=data)
+        if not await sync_to_async(serializer.is_valid)():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            encoded = await get_hashing_pool().run(make_password, serializer.validated_data["password"])
+        except HashingPoolSaturated:
+            return _overloaded_response()
+        user = serializer.build_user(encoded)
+        await user.asave()
+        return await _async_auth_response(user, status.HTTP_201_CREATED)
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncLoginView(View):
+    """Login endpoint that verifies and upgrades hashes on the bounded pool."""
+
+    async def post(self, request, *args, **kwargs):
+        """Check credentials off-thread and return the token payload."""
+        data = _parse_body(request)
+        if data is None:
+            return _bad_body_response()
+        serializer = LoginCredentialsSerializer(data=data)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        email = serializer.validated_data["email"]
+        password = serializer.validated_data["password"]
+
+        user = await User._default_manager.filter(**{User.USERNAME_FIELD: email}).afirst()
+        pool = get_hashing_pool()
+        try:
+            if user is None:
+                # Hash once anyway so unknown emails take as long as known ones.
+                await pool.run(make_password, password)
+                is_correct = False
+            else:
+                is_correct, must_update = await pool.run(verify_password, password, user.password)
+                if is_correct and must_update:
+                    # Transparently move the stored hash to the preferred hasher.
+                    user.password = await pool.run(make_password, password)
+                    await User._default_manager.filter(pk=user.pk).aupdate(password=user.password)
+        except HashingPoolSaturated:
+            return _overloaded_response()
+
+        if not is_correct or not user.is_active:
+            return JsonResponse(
+                {api_settings.NON_FIELD_ERRORS_KEY: ["Invalid email or password."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return await _async_auth_response(user)
+
+
 class EmailCheckView(generics.GenericAPIView):
     """Validate that a user exists before inviting them to a board."""
 
@@ -5,3 +5,13 @@ class AuthConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'auth_app'
     label = 'auth_app'
+
+    def ready(self):
+        from django.contrib.auth import get_user_model
+        from django.db.models.signals import post_delete, post_save
+
+        from .summaries import invalidate_user_summary
+
+        User = get_user_model()
+        post_save.connect(invalidate_user_summary, sender=User, dispatch_uid="auth_app.user_summary.save")
+        post_delete.connect(invalidate_user_summary, sender=User, dispatch_uid="auth_app.user_summary.delete")
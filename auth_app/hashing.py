@@ -0,0 +1,57 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+
+class HashingPoolSaturated(Exception):
+    """Raised when the hashing pool has no free slot for another job."""
+
+
+class HashingPool:
+    """Bounded executor that keeps password hashing off the request threads.
+
+    At most ``max_workers`` jobs run at once and at most ``max_queue`` more
+    may wait for a worker; anything beyond that is rejected immediately so
+    callers can shed load instead of piling up behind PBKDF2.
+    """
+
+    def __init__(self, max_workers, max_queue):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="auth-hashing")
+
+    async def run(self, fn, *args):
+        """Run ``fn(*args)`` on the pool or raise HashingPoolSaturated.
+
+        The slot is freed when the job finishes or, if the caller is
+        cancelled while the job is still queued, when it is cancelled.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise HashingPoolSaturated()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return await asyncio.wrap_future(future)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_hashing_pool():
+    """Return the process-wide hashing pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = HashingPool(
+                    max_workers=settings.AUTH_HASHING_WORKERS,
+                    max_queue=settings.AUTH_HASHING_QUEUE_DEPTH,
+                )
+    return _pool
@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from core.metrics import cache_requests
+
+CACHE_KEY = "user-summary:{}"
+
+
+def get_fullname(user) -> str:
+    """Return a trimmed full name, falling back to the username."""
+    full_name = user.get_full_name().strip()
+    return full_name or user.username
+
+
+def _summarize(user) -> dict:
+    return {"id": user.id, "email": user.email, "fullname": get_fullname(user)}
+
+
+def get_user_summary(user, context=None) -> dict:
+    """Return the ``{id, email, fullname}`` dict for ``user``.
+
+    The dict is built once per request (memoized on the request found in the
+    serializer ``context``) and, when USER_SUMMARY_CACHE_TIMEOUT is set, is
+    also kept in the Django cache until the user is saved again.
+    """
+    request = (context or {}).get("request")
+    memo = None
+    if request is not None:
+        memo = getattr(request, "_user_summaries", None)
+        if memo is None:
+            memo = request._user_summaries = {}
+        summary = memo.get(user.id)
+        cache_requests.inc(cache="user_summary_request", result="miss" if summary is None else "hit")
+        if summary is not None:
+            return summary
+
+    timeout = settings.USER_SUMMARY_CACHE_TIMEOUT
+    summary = cache.get(CACHE_KEY.format(user.id)) if timeout else None
+    if timeout:
+        cache_requests.inc(cache="user_summary", result="miss" if summary is None else "hit")
+    if summary is None:
+        summary = _summarize(user)
+        if timeout:
+            cache.set(CACHE_KEY.format(user.id), summary, timeout)
+    if memo is not None:
+        memo[user.id] = summary
+    return summary
+
+
+def invalidate_user_summary(sender, instance, **kwargs):
+    """Signal receiver dropping the cached summary of a saved/deleted user."""
+    if settings.USER_SUMMARY_CACHE_TIMEOUT:
+        cache.delete(CACHE_KEY.format(instance.pk))
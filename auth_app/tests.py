@@ -0,0 +1,155 @@
+import asyncio
+import json
+import threading
+import time
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework import serializers
+
+from auth_app import summaries
+from auth_app.api.serializers import UserLookupSerializer
+from auth_app.api.views import AsyncLoginView
+from auth_app.hashing import HashingPool, HashingPoolSaturated
+from auth_app.summaries import get_user_summary
+from tasks_app.api.serializers import BoardMemberSerializer
+
+User = get_user_model()
+
+
+def login_request(email, password):
+    body = json.dumps({"email": email, "password": password})
+    return RequestFactory().post("/api/login/", body, content_type="application/json")
+
+
+class HashingPoolTests(TestCase):
+    def test_cancelled_queued_job_frees_its_slot(self):
+        pool = HashingPool(max_workers=1, max_queue=1)
+        release = threading.Event()
+
+        async def scenario():
+            running = asyncio.ensure_future(pool.run(release.wait))
+            queued = asyncio.ensure_future(pool.run(lambda: "queued"))
+            await asyncio.sleep(0.05)
+            with self.assertRaises(HashingPoolSaturated):
+                await pool.run(lambda: None)
+            queued.cancel()
+            # Let the cancellation reach the executor before the worker frees up.
+            await asyncio.sleep(0.01)
+            release.set()
+            await running
+            await asyncio.sleep(0.05)
+
+        async_to_sync(scenario)()
+        # Both slots are free again.
+        self.assertTrue(pool._slots.acquire(blocking=False))
+        self.assertTrue(pool._slots.acquire(blocking=False))
+
+
+class LoginStormTests(TestCase):
+    """GETs stay fast while a burst of logins hashes passwords.
+
+    Under ASGI every GET is served by the event loop, so the loop's lag is
+    the delay a GET sees. With hashing on the bounded pool the loop never
+    runs PBKDF2 itself, and logins beyond the queue are shed with 503.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="alice@example.com", email="alice@example.com", password="secret")
+
+    def test_event_loop_stays_responsive_during_a_login_storm(self):
+        pool = HashingPool(max_workers=2, max_queue=2)
+        view = AsyncLoginView.as_view()
+        started = time.perf_counter()
+        make_password("secret")
+        hash_time = time.perf_counter() - started
+
+        async def storm():
+            lags = []
+            done = asyncio.Event()
+
+            async def ticker():
+                while not done.is_set():
+                    tick = time.perf_counter()
+                    await asyncio.sleep(0.005)
+                    lags.append(time.perf_counter() - tick - 0.005)
+
+            ticking = asyncio.ensure_future(ticker())
+            responses = await asyncio.gather(*(view(login_request("alice@example.com", "secret")) for _ in range(8)))
+            done.set()
+            await ticking
+            return responses, max(lags)
+
+        with mock.patch("auth_app.api.views.get_hashing_pool", return_value=pool):
+            responses, worst_lag = async_to_sync(storm)()
+        statuses = sorted(response.status_code for response in responses)
+        self.assertEqual(statuses, [200] * 4 + [503] * 4)
+        self.assertTrue(all(response["Retry-After"] for response in responses if response.status_code == 503))
+        # Running even one hash on the loop would stall it for ``hash_time``.
+        self.assertLess(worst_lag, min(0.1, hash_time / 2))
+
+    @override_settings(PASSWORD_HASHERS=[
+        "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+        "django.contrib.auth.hashers.MD5PasswordHasher",
+    ])
+    def test_login_upgrades_outdated_hash(self):
+        User.objects.filter(pk=self.user.pk).update(password=make_password("secret", hasher="md5"))
+        pool = HashingPool(max_workers=1, max_queue=1)
+        with mock.patch("auth_app.api.views.get_hashing_pool", return_value=pool):
+            response = async_to_sync(AsyncLoginView.as_view())(login_request("alice@example.com", "secret"))
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$"))
+
+
+class UserSummaryTests(TestCase):
+    """User payloads are built once per user and request, cached until the user is saved."""
+
+    def setUp(self):
+        self.users = [
+            User.objects.create(username=f"user{index}", email=f"user{index}@example.com", first_name=f"User {index}")
+            for index in range(3)
+        ]
+        # How often a large task list renders its assignees and reviewers.
+        self.occurrences = self.users * 400
+
+    def render(self, context):
+        return BoardMemberSerializer(self.occurrences, many=True, context=context).data
+
+    def best_of(self, fn, runs=5):
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    def test_each_user_is_summarized_once_per_request(self):
+        request = RequestFactory().get("/")
+        with mock.patch.object(summaries, "_summarize", wraps=summaries._summarize) as summarize:
+            data = self.render({"request": request})
+        self.assertEqual(summarize.call_count, len(self.users))
+        self.assertEqual(data[3], {"id": self.users[0].pk, "email": "user0@example.com", "fullname": "User 0"})
+
+    def test_memoized_rendering_is_cheaper_than_field_serialization(self):
+        memoized = self.best_of(lambda: self.render({"request": RequestFactory().get("/")}))
+        with mock.patch.object(UserLookupSerializer, "to_representation", serializers.ModelSerializer.to_representation):
+            per_field = self.best_of(lambda: self.render({"request": RequestFactory().get("/")}))
+        # Typically about half; the rest is the list serializer itself.
+        self.assertLess(memoized, per_field * 0.8)
+
+    @override_settings(USER_SUMMARY_CACHE_TIMEOUT=60)
+    def test_cached_summary_is_dropped_when_the_user_is_saved(self):
+        cache.clear()
+        user = self.users[0]
+        self.assertEqual(get_user_summary(user)["fullname"], "User 0")
+        # Bypasses signals: the cached summary is served.
+        User.objects.filter(pk=user.pk).update(first_name="Renamed")
+        user.refresh_from_db()
+        self.assertEqual(get_user_summary(user)["fullname"], "User 0")
+        user.save()
+        self.assertEqual(get_user_summary(user)["fullname"], "Renamed")
@@ -0,0 +1,167 @@
+import atexit
+import logging
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connections, transaction
+
+from boards_app.models import Activity, Board
+from boards_app.stamps import touch_boards
+
+logger = logging.getLogger(__name__)
+
+TASK_FIELDS = ("title", "description", "status", "priority", "assignee_id", "reviewer_id", "due_date")
+BOARD_FIELDS = ("name", "description")
+
+
+def snapshot(instance, fields):
+    """Capture the tracked field values of ``instance``."""
+    return {field: getattr(instance, field) for field in fields}
+
+
+def diff(before, after):
+    """Field-level ``{field: [old, new]}`` changes between two snapshots."""
+    return {field: [before.get(field), value] for field, value in after.items() if before.get(field) != value}
+
+
+class ActivityBuffer:
+    """In-process write-behind buffer for activity rows.
+
+    ``record`` only appends to a bounded deque; a daemon thread writes the
+    rows with ``bulk_create`` once ``flush_size`` entries are pending or
+    every ``flush_interval`` seconds, and once more at interpreter exit.
+    When writes fall behind, the oldest pending entries are dropped (and
+    counted in ``dropped``) so memory stays bounded.
+    """
+
+    def __init__(self, max_size, flush_size, flush_interval):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.flushed = 0
+        self._pending = deque(maxlen=max_size)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def record(self, **fields):
+        """Queue one activity row; never touches the database."""
+        with self._lock:
+            if len(self._pending) == self._pending.maxlen:
+                self.dropped += 1
+            self._pending.append(Activity(**fields))
+            should_flush = len(self._pending) >= self.flush_size
+            if self._thread is None:
+                self._start()
+        if should_flush:
+            self._wakeup.set()
+
+    def pending(self):
+        """Number of rows waiting to be written."""
+        return len(self._pending)
+
+    def flush(self):
+        """Write all pending rows now; returns how many were written.
+
+        If the batch insert fails, the rows are retried one by one: rows
+        that still violate a constraint (their board was purged meanwhile)
+        are dropped and counted, while on any other database error the rows
+        not yet written go back to the front of the buffer for the next run.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._pending)
+                self._pending.clear()
+            if not batch:
+                return 0
+            try:
+                written = self._write(batch)
+            except DatabaseError:
+                logger.warning("Writing %d activity rows failed; retrying them one by one.", len(batch), exc_info=True)
+                written = self._write_each(batch)
+            self.flushed += written
+            return written
+
+    def _write(self, rows):
+        with transaction.atomic():
+            # Boards purged since the event was recorded would violate the FK;
+            # checked in the insert's transaction (row-locked where supported).
+            board_ids = {row.board_id for row in rows}
+            live = set(Board.all_objects.select_for_update().filter(pk__in=board_ids).values_list("pk", flat=True))
+            rows = [row for row in rows if row.board_id in live]
+            try:
+                Activity.objects.bulk_create(rows, batch_size=500)
+            except DatabaseError:
+                # Ids assigned before the rollback are void; insert afresh next time.
+                for row in rows:
+                    row.pk = None
+                raise
+        return len(rows)
+
+    def _write_each(self, rows):
+        written = 0
+        for index, row in enumerate(rows):
+            try:
+                written += self._write([row])
+            except IntegrityError:
+                logger.warning("Dropping activity row for board %s.", row.board_id, exc_info=True)
+                with self._lock:
+                    self.dropped += 1
+            except DatabaseError:
+                logger.exception("Writing activity rows failed; keeping %d for the next flush.", len(rows) - index)
+                self._requeue(rows[index:])
+                break
+        return written
+
+    def _requeue(self, rows):
+        """Put ``rows`` back in front of newer entries, dropping the oldest on overflow."""
+        with self._lock:
+            combined = [*rows, *self._pending]
+            overflow = max(0, len(combined) - self._pending.maxlen)
+            self.dropped += overflow
+            self._pending.clear()
+            self._pending.extend(combined[overflow:])
+
+    def _start(self):
+        self._thread = threading.Thread(target=self._loop, name="activity-flush", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def _loop(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Flushing the activity buffer failed.")
+            finally:
+                connections.close_all()
+
+
+activity_buffer = ActivityBuffer(
+    max_size=settings.ACTIVITY_BUFFER_MAX_SIZE,
+    flush_size=settings.ACTIVITY_FLUSH_SIZE,
+    flush_interval=settings.ACTIVITY_FLUSH_INTERVAL,
+)
+
+
+def record_activity(board_id, actor, target_type, target_id, verb, changes=None):
+    """Buffer an activity entry for ``board_id`` if the activity log is enabled.
+
+    Every API write to a board passes through here, so this is also where
+    caches validated by board stamps learn about the change.
+    """
+    touch_boards([board_id])
+    if not settings.ACTIVITY_LOG_ENABLED:
+        return
+    activity_buffer.record(
+        board_id=board_id,
+        actor_id=getattr(actor, "pk", None),
+        target_type=target_type,
+        target_id=target_id,
+        verb=verb,
+        changes=changes or {},
+    )
@@ -1,10 +1,16 @@
 from django.contrib import admin
 
+from core.admin import IndexedSearchMixin
+from core.paginator import EstimatedCountPaginator
 from .models import Board
 
 
 @admin.register(Board)
-class BoardAdmin(admin.ModelAdmin):
+class BoardAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ("name", "owner", "created_at")
-    search_fields = ("name", "description", "owner__username")
-    filter_horizontal = ("members",)
+    list_select_related = ("owner",)
+    search_fields = ("=id", "^name", "^owner__username")
+    autocomplete_fields = ("owner", "members")
+    ordering = ("-id",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
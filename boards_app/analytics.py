@@ -0,0 +1,193 @@
+import datetime
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q, Subquery
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from boards_app.models import Activity, Board, BoardDailySnapshot
+from tasks_app.models import ArchivedTask, Task
+
+STATUS_COLUMNS = {
+    Task.Status.TODO: "to_do",
+    Task.Status.IN_PROGRESS: "in_progress",
+    Task.Status.REVIEW: "review",
+    Task.Status.DONE: "done",
+}
+PRIORITY_COLUMNS = {priority: priority.value for priority in Task.Priority}
+COUNT_COLUMNS = (*STATUS_COLUMNS.values(), *PRIORITY_COLUMNS.values())
+
+
+def _start_of(day):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def live_counts(board_ids):
+    """Current task counts per status and priority, ``{board_id: {column: n}}``.
+
+    Archived tasks count as done, so the done band of a cumulative-flow
+    chart does not shrink when old tasks are archived.
+    """
+    counts = {board_id: dict.fromkeys(COUNT_COLUMNS, 0) for board_id in board_ids}
+    for model in (Task, ArchivedTask):
+        rows = (
+            model.objects.filter(board_id__in=board_ids)
+            .order_by()
+            .values("board_id", "status", "priority")
+            .annotate(total=Count("pk"))
+        )
+        for row in rows:
+            board_counts = counts[row["board_id"]]
+            board_counts[STATUS_COLUMNS[row["status"]]] += row["total"]
+            board_counts[PRIORITY_COLUMNS[row["priority"]]] += row["total"]
+    return counts
+
+
+def completions_tracked():
+    """Whether completions can be counted at all.
+
+    They are read from the activity log (status changes to done), so with
+    ACTIVITY_LOG_ENABLED off they are unknown rather than zero. Entries the
+    ActivityBuffer had to drop (see its ``dropped`` counter) are missing
+    from the counts too.
+    """
+    return settings.ACTIVITY_LOG_ENABLED
+
+
+def completed_per_day(board_ids, since):
+    """``{(board_id, day): n}`` of tasks moved to done from ``since`` on, per the activity log.
+
+    Raises ImproperlyConfigured when the activity log is disabled.
+    """
+    if not completions_tracked():
+        raise ImproperlyConfigured("Counting completed tasks needs ACTIVITY_LOG_ENABLED.")
+    rows = (
+        Activity.objects.filter(
+            board_id__in=board_ids,
+            created_at__gte=_start_of(since),
+            target_type=Activity.Target.TASK,
+            changes__status__1=Task.Status.DONE,
+        )
+        .order_by()
+        .annotate(day=TruncDate("created_at"))
+        .values("board_id", "day")
+        .annotate(total=Count("pk"))
+    )
+    return {(row["board_id"], row["day"]): row["total"] for row in rows}
+
+
+def dirty_boards():
+    """Boards changed since their latest snapshot was computed (or never snapshotted).
+
+    Task rows, archived tasks and the activity log serve as the dirty
+    markers, so writes need no extra bookkeeping.
+    """
+    latest = BoardDailySnapshot.objects.filter(board=OuterRef("pk")).order_by("-day")
+    boards = Board.objects.order_by("pk").annotate(
+        last_day=Subquery(latest.values("day")[:1]),
+        last_computed=Subquery(latest.values("computed_at")[:1]),
+    )
+    changed = Q(last_computed__isnull=True)
+    changed |= Exists(Task.objects.filter(board=OuterRef("pk"), updated_at__gt=OuterRef("last_computed")))
+    changed |= Exists(Activity.objects.filter(board=OuterRef("pk"), created_at__gt=OuterRef("last_computed")))
+    changed |= Exists(ArchivedTask.objects.filter(board=OuterRef("pk"), archived_at__gt=OuterRef("last_computed")))
+    return boards.filter(changed)
+
+
+def _roll_up_batch(boards, today):
+    computed_at = timezone.now()
+    board_ids = [board_id for board_id, _ in boards]
+    counts = live_counts(board_ids)
+    since = min((last_day or today) for _, last_day in boards)
+    completed = completed_per_day(board_ids, since)
+    rows = [
+        BoardDailySnapshot(
+            board_id=board_id, day=today, computed_at=computed_at,
+            completed=completed.get((board_id, today), 0), **counts[board_id],
+        )
+        for board_id in board_ids
+    ]
+    # Completions after the last run of a previous day still belong to that day.
+    earlier = Q()
+    for board_id, last_day in boards:
+        if last_day is not None and last_day < today:
+            earlier |= Q(board_id=board_id, day=last_day)
+    previous = list(BoardDailySnapshot.objects.filter(earlier)) if earlier else []
+    for snapshot in previous:
+        snapshot.completed = completed.get((snapshot.board_id, snapshot.day), 0)
+    with transaction.atomic():
+        BoardDailySnapshot.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["board", "day"],
+            update_fields=[*COUNT_COLUMNS, "completed", "computed_at"],
+        )
+        BoardDailySnapshot.objects.bulk_update(previous, ["completed"])
+
+
+def roll_up(batch_size=None, progress=None):
+    """Write today's snapshot for every board that changed since its last one.
+
+    Meant to run from cron at least once a day (shortly before midnight, or
+    more often: later runs of the same day overwrite that day's row). Each
+    batch of ``batch_size`` boards costs a handful of grouped queries.
+    ``progress(done_so_far)`` is called after every batch; returns the
+    number of boards snapshotted. Raises ImproperlyConfigured when the
+    activity log is disabled, since the completions would be wrong.
+    """
+    if not completions_tracked():
+        raise ImproperlyConfigured("Board snapshots need ACTIVITY_LOG_ENABLED to count completed tasks.")
+    batch_size = batch_size or settings.BOARD_ANALYTICS_BATCH_SIZE
+    today = timezone.localdate()
+    boards = list(dirty_boards().values_list("pk", "last_day"))
+    for start in range(0, len(boards), batch_size):
+        _roll_up_batch(boards[start:start + batch_size], today)
+        if progress:
+            progress(min(start + batch_size, len(boards)))
+    return len(boards)
+
+
+def _day_payload(day, row, completed):
+    return {
+        "date": day,
+        "status": {status.value: row[column] for status, column in STATUS_COLUMNS.items()},
+        "priority": {priority.value: row[column] for priority, column in PRIORITY_COLUMNS.items()},
+        "total": sum(row[column] for column in STATUS_COLUMNS.values()),
+        "completed": completed,
+    }
+
+
+def board_series(board_id, start, end):
+    """Daily counts of a board from ``start`` to ``end`` (inclusive, at most today).
+
+    Reads the snapshot rows of the range plus the one before it, both as
+    (board, day) index range scans; days without a row repeat the previous
+    counts with zero completions. Today is always computed live. Days before
+    the board's first snapshot are left out. ``completed`` is None on every
+    day when the activity log is disabled (see ``completions_tracked``).
+    """
+    today = timezone.localdate()
+    end = min(end, today)
+    columns = (*COUNT_COLUMNS, "completed")
+    snapshots = BoardDailySnapshot.objects.filter(board_id=board_id)
+    current = snapshots.filter(day__lt=start).order_by("-day").values(*columns).first()
+    rows = {row["day"]: row for row in snapshots.filter(day__range=(start, end)).values("day", *columns)}
+    tracked = completions_tracked()
+    if start <= today <= end:
+        rows[today] = {
+            **live_counts([board_id])[board_id],
+            "completed": completed_per_day([board_id], today).get((board_id, today), 0) if tracked else None,
+        }
+    days = []
+    day = start
+    while day <= end:
+        row = rows.get(day)
+        if row is not None:
+            current = row
+        if current is not None:
+            completed = (row["completed"] if row is not None else 0) if tracked else None
+            days.append(_day_payload(day, current, completed))
+        day += datetime.timedelta(days=1)
+    return days
@@ -0,0 +1,20 @@
+from rest_framework.filters import OrderingFilter
+
+
+class BoardOrderingFilter(OrderingFilter):
+    """``?ordering=`` for boards, accepting the API's own field names.
+
+    ``title`` maps to the model's ``name`` and ``recent`` is shorthand for
+    ``-last_activity`` (latest change to the board or any of its tasks).
+    """
+
+    aliases = {"title": "name", "-title": "-name", "recent": "-last_activity"}
+
+    def get_ordering(self, request, queryset, view):
+        params = request.query_params.get(self.ordering_param)
+        if params:
+            terms = [self.aliases.get(term.strip(), term.strip()) for term in params.split(",")]
+            ordering = self.remove_invalid_fields(queryset, terms, view, request)
+            if ordering:
+                return [*ordering, "id"]
+        return self.get_default_ordering(view)
@@ -0,0 +1,28 @@
+from rest_framework.pagination import CursorPagination
+
+
+class BoardCursorPagination(CursorPagination):
+    """Opt-in cursor pagination for the board list.
+
+    Only kicks in when the client sends ``page_size`` or ``cursor``, so
+    existing callers keep receiving a plain list.
+    """
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    ordering = ("name", "id")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.page_size_query_param not in request.query_params and self.cursor_query_param not in request.query_params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+
+class ActivityCursorPagination(CursorPagination):
+    """Newest-first cursor pages over a board's activity log."""
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    ordering = ("-created_at", "-id")
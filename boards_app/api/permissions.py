@@ -7,4 +7,9 @@ class IsBoardMemberOrOwner(BasePermission):
     def has_object_permission(self, request, view, obj):
         """Grant permission if the user owns or belongs to the board."""
         user = request.user
-        return obj.owner_id == user.id or obj.members.filter(id=user.id).exists()
+        if obj.owner_id == user.id:
+            return True
+        is_member = getattr(obj, "is_member", None)
+        if is_member is None:
+            is_member = obj.members.filter(id=user.id).exists()
+        return is_member
@@ -0,0 +1,12 @@
+from rest_framework.renderers import JSONRenderer
+
+
+class CompactBoardJSONRenderer(JSONRenderer):
+    """Plain JSON renderer whose selection switches boards to the compact payload.
+
+    Chosen with ``Accept: application/vnd.kanmind.compact+json`` or
+    ``?format=compact``.
+    """
+
+    media_type = "application/vnd.kanmind.compact+json"
+    format = "compact"
@@ -1,15 +1,64 @@
+import datetime
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db.models import Count
+from django.utils import timezone
 from rest_framework import serializers
 
 from auth_app.api.serializers import UserLookupSerializer
-from tasks_app.api.serializers import TaskDetailSerializer
-from boards_app.models import Board
+from auth_app.summaries import get_user_summary
+from core.concurrency import save_versioned
+from tasks_app.api.serializers import TaskCompactSerializer, TaskDetailSerializer
+from boards_app.models import Activity, Board
 from tasks_app.models import Task
 
 User = get_user_model()
 
+# Column by column, in kanban order.
+TASK_ORDERING = ("status", "rank", "id")
+
+
+def board_tasks(board):
+    """Tasks of ``board``, taken from the prefetch cache when the view loaded them."""
+    if "tasks" in getattr(board, "_prefetched_objects_cache", {}):
+        return board.tasks.all()
+    return (
+        board.tasks.select_related("assignee", "reviewer")
+        .annotate(comments_count=Count("comments"))
+        .order_by(*TASK_ORDERING)
+    )
+
+
+class BoardCountersMixin:
+    """Counter fields that prefer annotated values to avoid per-board queries."""
+
+    def get_member_count(self, obj):
+        """Total members on the board."""
+        if hasattr(obj, "member_count"):
+            return obj.member_count
+        return obj.members.count()
 
-class BoardListSerializer(serializers.ModelSerializer):
+    def get_ticket_count(self, obj):
+        """Total tasks on the board."""
+        if hasattr(obj, "ticket_count"):
+            return obj.ticket_count
+        return obj.tasks.count()
+
+    def get_tasks_to_do_count(self, obj):
+        """Tasks still in 'to-do' status."""
+        if hasattr(obj, "tasks_to_do_count"):
+            return obj.tasks_to_do_count
+        return obj.tasks.filter(status=Task.Status.TODO).count()
+
+    def get_tasks_high_prio_count(self, obj):
+        """Tasks flagged as high or critical priority."""
+        if hasattr(obj, "tasks_high_prio_count"):
+            return obj.tasks_high_prio_count
+        return obj.tasks.filter(priority__in=[Task.Priority.HIGH, Task.Priority.CRITICAL]).count()
+
+
+class BoardListSerializer(BoardCountersMixin, serializers.ModelSerializer):
     """Lightweight board listing payload with counters."""
     title = serializers.CharField(source="name")
     owner_id = serializers.IntegerField(read_only=True)
@@ -24,30 +73,15 @@ class BoardListSerializer(serializers.ModelSerializer):
             "id",
             "title",
             "owner_id",
+            "is_template",
             "member_count",
             "ticket_count",
             "tasks_to_do_count",
             "tasks_high_prio_count",
         )
 
-    def get_member_count(self, obj):
-        """Total members on the board."""
-        return obj.members.count()
-
-    def get_ticket_count(self, obj):
-        """Total tasks on the board."""
-        return obj.tasks.count()
-
-    def get_tasks_to_do_count(self, obj):
-        """Tasks still in 'to-do' status."""
-        return obj.tasks.filter(status=Task.Status.TODO).count()
-
-    def get_tasks_high_prio_count(self, obj):
-        """Tasks flagged as high or critical priority."""
-        return obj.tasks.filter(priority__in=[Task.Priority.HIGH, Task.Priority.CRITICAL]).count()
 
-
-class BoardDetailSerializer(serializers.ModelSerializer):
+class BoardDetailSerializer(BoardCountersMixin, serializers.ModelSerializer):
     """Full board detail including members and nested tasks."""
     title = serializers.CharField(source="name")
     owner_id = serializers.IntegerField(read_only=True)
@@ -68,6 +102,7 @@ class BoardDetailSerializer(serializers.ModelSerializer):
             "description",
             "owner_id",
             "owner_data",
+            "is_template",
             "member_count",
             "ticket_count",
             "tasks_to_do_count",
@@ -77,59 +112,168 @@ class BoardDetailSerializer(serializers.ModelSerializer):
             "tasks",
             "created_at",
             "updated_at",
+            "version",
         )
         read_only_fields = ("created_at", "updated_at")
 
     def get_tasks(self, obj):
         """Return nested tasks with assignee/reviewer details."""
-        tasks = obj.tasks.select_related("assignee", "reviewer").all()
-        return TaskDetailSerializer(tasks, many=True, context=self.context).data
+        return TaskDetailSerializer(board_tasks(obj), many=True, context=self.context).data
 
-    def get_member_count(self, obj):
-        """Total members on the board."""
-        return obj.members.count()
 
-    def get_ticket_count(self, obj):
-        """Total tasks on the board."""
-        return obj.tasks.count()
+class BoardStreamHeadSerializer(BoardDetailSerializer):
+    """Board detail without ``tasks``, which the streaming view appends itself."""
+    tasks = None
 
-    def get_tasks_to_do_count(self, obj):
-        """Tasks still in 'to-do' status."""
-        return obj.tasks.filter(status=Task.Status.TODO).count()
+    class Meta(BoardDetailSerializer.Meta):
+        fields = tuple(field for field in BoardDetailSerializer.Meta.fields if field != "tasks")
 
-    def get_tasks_high_prio_count(self, obj):
-        """Tasks flagged as high or critical priority."""
-        return obj.tasks.filter(priority__in=[Task.Priority.HIGH, Task.Priority.CRITICAL]).count()
+
+def _validate_user_ids(value):
+    """Check a list of user ids with a single IN query and de-duplicate it."""
+    user_ids = list(dict.fromkeys(value))
+    existing = set(User.objects.filter(id__in=user_ids).values_list("id", flat=True))
+    missing = [user_id for user_id in user_ids if user_id not in existing]
+    if missing:
+        raise serializers.ValidationError(f'Invalid pk "{missing[0]}" - object does not exist.')
+    return user_ids
+
+
+class BoardCompactSerializer(BoardDetailSerializer):
+    """Board detail that renders every user once in a top-level ``users`` map.
+
+    ``members`` and the tasks' ``assignee``/``reviewer`` hold user ids that
+    point into ``users``; ``owner_data`` and ``members_data`` are dropped.
+    """
+    owner_data = None
+    members_data = None
+    members = serializers.SerializerMethodField()
+    users = serializers.SerializerMethodField()
+
+    class Meta(BoardDetailSerializer.Meta):
+        fields = (
+            "id",
+            "title",
+            "description",
+            "owner_id",
+            "is_template",
+            "member_count",
+            "ticket_count",
+            "tasks_to_do_count",
+            "tasks_high_prio_count",
+            "members",
+            "users",
+            "tasks",
+            "created_at",
+            "updated_at",
+            "version",
+        )
+
+    def _board_tasks(self, obj):
+        """Load the board's tasks once for both ``tasks`` and ``users``."""
+        if not hasattr(obj, "_compact_tasks"):
+            obj._compact_tasks = list(board_tasks(obj))
+        return obj._compact_tasks
+
+    def get_members(self, obj):
+        """Member ids; details live in ``users``."""
+        return [member.id for member in obj.members.all()]
+
+    def get_users(self, obj):
+        """Every user referenced by the board, keyed by id."""
+        users = {obj.owner_id: obj.owner}
+        users.update((member.id, member) for member in obj.members.all())
+        for task in self._board_tasks(obj):
+            for user in (task.assignee, task.reviewer):
+                if user is not None:
+                    users[user.id] = user
+        return {user_id: get_user_summary(user, self.context) for user_id, user in users.items()}
+
+    def get_tasks(self, obj):
+        """Tasks with assignee/reviewer as user ids."""
+        return TaskCompactSerializer(self._board_tasks(obj), many=True, context=self.context).data
 
 
 class BoardWriteSerializer(serializers.ModelSerializer):
     """Input serializer for board create/update operations."""
     title = serializers.CharField(source="name", max_length=255)
-    members = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), many=True, required=False)
+    members = serializers.ListField(child=serializers.IntegerField(), required=False)
 
     class Meta:
         model = Board
-        fields = ("id", "title", "description", "members")
+        fields = ("id", "title", "description", "is_template", "members")
+
+    def validate_members(self, value):
+        """Validate all member ids at once instead of one query per id."""
+        return _validate_user_ids(value)
 
     def create(self, validated_data):
-        """Create a board and optionally attach members."""
+        """Create a board and attach the owner plus optional members."""
         members = validated_data.pop("members", [])
         board = Board.objects.create(**validated_data)
-        if members:
-            board.members.set(members)
+        board.add_members([board.owner_id, *members])
         return board
 
     def update(self, instance, validated_data):
-        """Update board fields and replace members when provided."""
+        """Update board fields and apply the member delta when provided."""
         members = validated_data.pop("members", None)
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
-        instance.save()
+        save_versioned(instance, validated_data)
+        self.member_changes = (set(), set())
         if members is not None:
-            instance.members.set(members)
+            self.member_changes = instance.set_members([instance.owner_id, *members])
         return instance
 
 
+class BoardMembersSerializer(serializers.Serializer):
+    """Input for adding or removing a subset of board members."""
+    members = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+
+    def validate_members(self, value):
+        """Validate all member ids at once instead of one query per id."""
+        return _validate_user_ids(value)
+
+
+class BoardCloneSerializer(serializers.Serializer):
+    """Options for copying a board (e.g. a template) into a new one."""
+    title = serializers.CharField(max_length=255, required=False)
+    include_members = serializers.BooleanField(default=True)
+    include_tasks = serializers.BooleanField(default=True)
+    reset_status = serializers.BooleanField(default=False)
+    include_comments = serializers.BooleanField(default=False)
+    is_template = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        """Comments can only be copied along with their tasks."""
+        if attrs["include_comments"] and not attrs["include_tasks"]:
+            raise serializers.ValidationError({"include_comments": ["Requires include_tasks."]})
+        return attrs
+
+
+class BoardAnalyticsQuerySerializer(serializers.Serializer):
+    """``?from=`` / ``?to=`` dates (inclusive) of an analytics request."""
+
+    def get_fields(self):
+        # "from" is a keyword, so the fields cannot be declared as attributes.
+        return {
+            "from": serializers.DateField(required=False),
+            "to": serializers.DateField(required=False),
+        }
+
+    def validate(self, attrs):
+        """Default to the last BOARD_ANALYTICS_DEFAULT_DAYS days and bound the range."""
+        end = attrs.get("to") or timezone.localdate()
+        start = attrs.get("from") or end - datetime.timedelta(days=settings.BOARD_ANALYTICS_DEFAULT_DAYS - 1)
+        if start > end:
+            raise serializers.ValidationError({"from": ["Must not be after 'to'."]})
+        if (end - start).days >= settings.BOARD_ANALYTICS_MAX_DAYS:
+            raise serializers.ValidationError(
+                {"from": [f"The range may span at most {settings.BOARD_ANALYTICS_MAX_DAYS} days."]}
+            )
+        return {"from": start, "to": end}
+
+
 class BoardMembershipSerializer(serializers.ModelSerializer):
     """Minimal payload focused on owner and members after updates."""
 
@@ -139,4 +283,14 @@ class BoardMembershipSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Board
-        fields = ("id", "title", "owner_data", "members_data")
+        fields = ("id", "title", "owner_data", "members_data", "version")
+
+
+class ActivitySerializer(serializers.ModelSerializer):
+    """One activity-log entry with the acting user's summary."""
+
+    actor = UserLookupSerializer(read_only=True)
+
+    class Meta:
+        model = Activity
+        fields = ("id", "verb", "target_type", "target_id", "actor", "changes", "created_at")
@@ -1,6 +1,6 @@
 from django.urls import path
 
-from .views import BoardViewSet
+from .views import BoardActivityListView, BoardViewSet
 
 board_list = BoardViewSet.as_view({
     "get": "list",
@@ -12,9 +12,23 @@ board_detail = BoardViewSet.as_view({
     "put": "update",
     "delete": "destroy",
 })
+board_members = BoardViewSet.as_view({
+    "post": "add_members",
+    "delete": "remove_members",
+})
+board_export = BoardViewSet.as_view({"get": "export"})
+board_import = BoardViewSet.as_view({"post": "import_board"})
+board_clone = BoardViewSet.as_view({"post": "clone"})
+board_analytics = BoardViewSet.as_view({"get": "analytics"})
 
 urlpatterns = [
     path("", board_list, name="board-list"),
+    path("import/", board_import, name="board-import"),
     path("<int:pk>/", board_detail, name="board-detail"),
     path("<int:pk>", board_detail, name="board-detail-noslash"),
+    path("<int:pk>/members/", board_members, name="board-members"),
+    path("<int:pk>/export/", board_export, name="board-export"),
+    path("<int:pk>/clone/", board_clone, name="board-clone"),
+    path("<int:pk>/analytics/", board_analytics, name="board-analytics"),
+    path("<int:pk>/activity/", BoardActivityListView.as_view(), name="board-activity"),
 ]
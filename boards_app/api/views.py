@@ -1,35 +1,194 @@
-from django.db.models import Prefetch, Q
+from django.conf import settings
+from django.db.models import Count, DateTimeField, Exists, F, Func, IntegerField, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce, Greatest
 from django.shortcuts import get_object_or_404
-from rest_framework import permissions, status, viewsets
-from rest_framework.exceptions import PermissionDenied
+from django.utils import timezone
+from rest_framework import generics, permissions, status, viewsets
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
-from boards_app.models import Board
+from boards_app.activity import BOARD_FIELDS, diff, record_activity, snapshot
+from boards_app.analytics import board_series
+from boards_app.cloning import clone_board
+from boards_app.models import Activity, Board
+from boards_app.purge import schedule_purge
+from boards_app.stamps import touch_boards
+from boards_app.transfer import TransferError, export_board, import_board
+from core.concurrency import bump_version, check_if_match, set_etag
+from core.streaming import iter_batched, iter_json_object, streaming_json_response, wants_stream
+from tasks_app.api.serializers import TaskDetailSerializer
 from tasks_app.models import Task
+from .filters import BoardOrderingFilter
+from .pagination import ActivityCursorPagination, BoardCursorPagination
 from .permissions import IsBoardMemberOrOwner
-from .serializers import BoardDetailSerializer, BoardListSerializer, BoardMembershipSerializer, BoardWriteSerializer
+from .renderers import CompactBoardJSONRenderer
+from .serializers import (
+    ActivitySerializer,
+    BoardAnalyticsQuerySerializer,
+    BoardCloneSerializer,
+    BoardCompactSerializer,
+    BoardDetailSerializer,
+    BoardListSerializer,
+    BoardMembersSerializer,
+    BoardMembershipSerializer,
+    BoardStreamHeadSerializer,
+    BoardWriteSerializer,
+    TASK_ORDERING,
+)
+
+
+def _count_of(queryset):
+    """Correlated COUNT(*) subquery for ``queryset`` (already filtered on OuterRef)."""
+    counted = queryset.order_by().annotate(total=Func(F("pk"), function="COUNT")).values("total")
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+def _with_counters(queryset):
+    """Annotate the list/detail counters so serializers need no extra queries."""
+    tasks = Task.objects.filter(board=OuterRef("pk"))
+    return queryset.annotate(
+        member_count=_count_of(Board.members.through.objects.filter(board=OuterRef("pk"))),
+        ticket_count=_count_of(tasks),
+        tasks_to_do_count=_count_of(tasks.filter(status=Task.Status.TODO)),
+        tasks_high_prio_count=_count_of(tasks.filter(priority__in=[Task.Priority.HIGH, Task.Priority.CRITICAL])),
+    )
+
+
+def _with_last_activity(queryset):
+    """Annotate the latest change to the board itself or any of its tasks."""
+    latest_task = (
+        Task.objects.filter(board=OuterRef("pk"))
+        .order_by()
+        .annotate(latest=Func(F("updated_at"), function="MAX"))
+        .values("latest")
+    )
+    return queryset.annotate(
+        last_activity=Greatest("updated_at", Coalesce(Subquery(latest_task, output_field=DateTimeField()), "updated_at"))
+    )
+
+
+def _members_among(board, user_ids):
+    """The ids in ``user_ids`` that are members of ``board`` (one query)."""
+    memberships = Board.members.through.objects.filter(board_id=board.pk, user_id__in=user_ids)
+    return set(memberships.values_list("user_id", flat=True))
+
+
+def _with_membership(queryset, user):
+    """Annotate whether ``user`` is a member so permission checks need no query."""
+    membership = Board.members.through.objects.filter(board=OuterRef("pk"), user_id=user.id)
+    return queryset.annotate(is_member=Exists(membership))
 
 
 class BoardViewSet(viewsets.ModelViewSet):
-    """Board CRUD plus authenticated listings for owners and members."""
+    """Board CRUD plus authenticated listings for owners and members.
+
+    Every action loads boards through its own minimal queryset profile (see
+    ``queryset_profiles``) instead of one prefetch-everything queryset:
+
+    * list: board rows with subquery counters and last activity only
+    * retrieve: counters, owner, members and tasks with assignee/reviewer
+      and comment counts (comments themselves are never loaded)
+    * create (response): counters, owner and members; the new board has no tasks
+    * update and member changes: the board row, owner and membership flag
+    * destroy, export and analytics: id/owner and membership flag only
+    * clone: the board row (name/description) and membership flag
+
+    ``GET /api/boards/<id>/?stream=1`` streams the detail payload instead:
+    the board is loaded without its tasks, which are then read with
+    ``QuerySet.iterator()`` and encoded one by one.
+
+    Detail responses carry a weak ``ETag`` (the board's ``version``): it
+    covers the board's own fields and membership, not the embedded tasks or
+    counters, which change without a version bump. Every write that bumps
+    the version (updates, member changes, delete) honours ``If-Match`` and
+    answers 412 when the board changed meanwhile.
+    """
 
     permission_classes = [permissions.IsAuthenticated, IsBoardMemberOrOwner]
-    base_queryset = (
-        Board.objects.select_related("owner")
-        .prefetch_related("members")
-        .prefetch_related(
-            Prefetch(
-                "tasks",
-                queryset=Task.objects.select_related("assignee", "reviewer").prefetch_related("comments"),
-            )
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, CompactBoardJSONRenderer]
+    queryset = Board.objects.all()
+    pagination_class = BoardCursorPagination
+    filter_backends = [BoardOrderingFilter]
+    ordering_fields = ["name", "updated_at", "ticket_count", "last_activity"]
+    ordering = ["name", "id"]
+    queryset_profiles = {
+        "list": "get_list_queryset",
+        "retrieve": "get_detail_queryset",
+        "stream": "get_stream_queryset",
+        "create": "get_created_queryset",
+        "update": "get_write_queryset",
+        "partial_update": "get_write_queryset",
+        "add_members": "get_write_queryset",
+        "remove_members": "get_write_queryset",
+        "destroy": "get_access_queryset",
+        "export": "get_access_queryset",
+        "analytics": "get_access_queryset",
+        "clone": "get_clone_queryset",
+    }
+
+    def get_profile_queryset(self, action=None):
+        """Return the queryset profile declared for ``action`` (default: current)."""
+        method = self.queryset_profiles.get(action or self.action, "get_detail_queryset")
+        return getattr(self, method)()
+
+    def get_list_queryset(self):
+        """Board rows plus counters; no members, tasks or comments.
+
+        ``?template=1`` (or ``0``) limits the list to (non-)template boards.
+        """
+        queryset = _with_last_activity(_with_counters(Board.objects.all()))
+        template = self.request.query_params.get("template")
+        if template is not None:
+            queryset = queryset.filter(is_template=template.lower() in ("1", "true"))
+        return queryset
+
+    def get_detail_queryset(self):
+        """Everything the detail payload renders, comments only as counts."""
+        tasks = (
+            Task.objects.select_related("assignee", "reviewer")
+            .annotate(comments_count=Count("comments"))
+            .order_by(*TASK_ORDERING)
         )
-    )
-    queryset = base_queryset
+        return (
+            _with_counters(Board.objects.select_related("owner"))
+            .prefetch_related("members")
+            .prefetch_related(Prefetch("tasks", queryset=tasks))
+        )
+
+    def get_stream_queryset(self):
+        """The detail profile minus tasks, which are streamed separately."""
+        return _with_counters(Board.objects.select_related("owner")).prefetch_related("members")
+
+    def get_stream_tasks(self, board):
+        """Iterate the board's tasks in detail order without caching them."""
+        tasks = (
+            Task.objects.filter(board=board)
+            .select_related("assignee", "reviewer")
+            .annotate(comments_count=Count("comments"))
+            .order_by(*TASK_ORDERING)
+        )
+        return tasks.iterator(chunk_size=settings.STREAMING_CHUNK_SIZE)
+
+    def get_created_queryset(self):
+        """Detail payload of a fresh board, which cannot have tasks yet."""
+        return _with_counters(Board.objects.select_related("owner")).prefetch_related("members")
+
+    def get_write_queryset(self):
+        """Board row with owner (for the membership payload) and membership flag."""
+        return _with_membership(Board.objects.select_related("owner"), self.request.user)
+
+    def get_access_queryset(self):
+        """Just enough to check ownership/membership (for delete, export and analytics)."""
+        return _with_membership(Board.objects.only("id", "owner_id", "version"), self.request.user)
+
+    def get_clone_queryset(self):
+        """The fields copied onto the new board plus the membership flag."""
+        return _with_membership(Board.objects.only("id", "owner_id", "name", "description"), self.request.user)
 
     def get_queryset(self):
         """Restrict boards to those the user owns or is a member of."""
-        user = self.request.user
-        return self.base_queryset.filter(Q(owner=user) | Q(members=user)).distinct()
+        return self.get_profile_queryset().filter(pk__in=Board.objects.visible_ids(self.request.user))
 
     def get_serializer_class(self):
         """Switch serializer based on action to control payload size."""
@@ -37,11 +196,22 @@ class BoardViewSet(viewsets.ModelViewSet):
             return BoardListSerializer
         if self.action in ("create", "update", "partial_update"):
             return BoardWriteSerializer
+        if self.action in ("add_members", "remove_members"):
+            return BoardMembersSerializer
+        if self.action == "clone":
+            return BoardCloneSerializer
+        return self.get_detail_serializer_class()
+
+    def get_detail_serializer_class(self):
+        """Use the user-deduplicated payload when the compact renderer was negotiated."""
+        renderer = getattr(self.request, "accepted_renderer", None)
+        if renderer is not None and renderer.format == CompactBoardJSONRenderer.format:
+            return BoardCompactSerializer
         return BoardDetailSerializer
 
-    def get_object(self):
+    def get_object(self, profile=None):
         """Fetch a single board and enforce object-level permissions."""
-        board = get_object_or_404(self.base_queryset, pk=self.kwargs["pk"])
+        board = get_object_or_404(self.get_profile_queryset(profile), pk=self.kwargs["pk"])
         self.check_object_permissions(self.request, board)
         return board
 
@@ -50,45 +220,211 @@ class BoardViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         board = serializer.save(owner=request.user)
-        board.members.add(request.user)
-        output_serializer = BoardDetailSerializer(board, context=self.get_serializer_context())
+        record_activity(
+            board.id, request.user, Activity.Target.BOARD, board.id, Activity.Verb.CREATED,
+            diff({}, snapshot(board, BOARD_FIELDS)),
+        )
+        board = self.get_profile_queryset("create").get(pk=board.pk)
+        output_serializer = self.get_detail_serializer_class()(board, context=self.get_serializer_context())
         headers = self.get_success_headers(output_serializer.data)
         return Response(output_serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
     def perform_update(self, serializer):
-        """Allow updates from owner or members and keep owner in members."""
+        """Allow updates from owner or members; the serializer keeps the owner in members."""
         board = serializer.instance
         user = self.request.user
-        if board.owner_id != user.id and not board.members.filter(id=user.id).exists():
+        if board.owner_id != user.id and not board.is_member:
             raise PermissionDenied({"errors": ["Only board members or the owner can update this board."]})
+        before = snapshot(board, BOARD_FIELDS)
         updated_board = serializer.save()
-        updated_board.members.add(updated_board.owner)
+        changes = diff(before, snapshot(updated_board, BOARD_FIELDS))
+        if changes:
+            record_activity(board.id, user, Activity.Target.BOARD, board.id, Activity.Verb.UPDATED, changes)
+        added, removed = serializer.member_changes
+        self._record_member_changes(board, added, removed)
         return updated_board
 
+    def _bump_version(self, board):
+        """Invalidate ETags handed out before a membership change."""
+        bump_version(Board.objects.filter(pk=board.pk))
+        board.version += 1
+
+    def _record_member_changes(self, board, added=(), removed=()):
+        """Log membership deltas on the board's activity."""
+        user = self.request.user
+        if added:
+            record_activity(
+                board.id, user, Activity.Target.BOARD, board.id, Activity.Verb.MEMBERS_ADDED,
+                {"members": sorted(added)},
+            )
+        if removed:
+            record_activity(
+                board.id, user, Activity.Target.BOARD, board.id, Activity.Verb.MEMBERS_REMOVED,
+                {"members": sorted(removed)},
+            )
+
     def destroy(self, request, *args, **kwargs):
         """Restrict delete operations to the board owner."""
         board = self.get_object()
         if board.owner_id != request.user.id:
             raise PermissionDenied({"errors": ["Only the board owner can delete this board."]})
-        return super().destroy(request, *args, **kwargs)
+        check_if_match(request, board)
+        board_id = board.pk
+        if not settings.BOARD_DEFERRED_DELETE:
+            self.perform_destroy(board)
+        else:
+            bump_version(Board.objects.filter(pk=board_id), deleted_at=timezone.now())
+            if settings.BOARD_PURGE_IN_PROCESS:
+                schedule_purge(board_id)
+        touch_boards([board_id])
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
     def retrieve(self, request, *args, **kwargs):
         """Return a board with nested tasks and members."""
+        if wants_stream(request) and self.get_detail_serializer_class() is BoardDetailSerializer:
+            return self.stream_retrieve(request)
         board = self.get_object()
-        serializer = BoardDetailSerializer(board, context=self.get_serializer_context())
-        return Response(serializer.data)
+        serializer = self.get_detail_serializer_class()(board, context=self.get_serializer_context())
+        return set_etag(Response(serializer.data), board, weak=True)
+
+    def stream_retrieve(self, request):
+        """Stream the detail payload; memory stays flat regardless of task count."""
+        board = self.get_object("stream")
+        context = self.get_serializer_context()
+        head = BoardStreamHeadSerializer(board, context=context).data
+        task_serializer = TaskDetailSerializer(context=context)
+        tasks = (task_serializer.to_representation(task) for task in self.get_stream_tasks(board))
+        return set_etag(streaming_json_response(request, iter_json_object(head, "tasks", tasks)), board, weak=True)
 
     def update(self, request, *args, **kwargs):
         """Update a board and return the detailed payload."""
         partial = kwargs.pop("partial", False)
         instance = self.get_object()
+        check_if_match(request, instance)
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
         updated_board = self.perform_update(serializer)
         output = BoardMembershipSerializer(updated_board, context=self.get_serializer_context())
-        return Response(output.data)
+        return set_etag(Response(output.data), updated_board, weak=True)
 
     def partial_update(self, request, *args, **kwargs):
         """Support PATCH by delegating to the main update flow."""
         kwargs["partial"] = True
         return self.update(request, *args, **kwargs)
+
+    def add_members(self, request, *args, **kwargs):
+        """Add only the given users to the board; current members are skipped."""
+        board = self.get_object()
+        check_if_match(request, board)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        current = _members_among(board, serializer.validated_data["members"])
+        added = [user_id for user_id in serializer.validated_data["members"] if user_id not in current]
+        if added:
+            board.add_members(added)
+            self._bump_version(board)
+            self._record_member_changes(board, added=added)
+        output = BoardMembershipSerializer(board, context=self.get_serializer_context())
+        return Response(output.data)
+
+    def remove_members(self, request, *args, **kwargs):
+        """Remove only the given users from the board; the owner always stays."""
+        board = self.get_object()
+        check_if_match(request, board)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        members = serializer.validated_data["members"]
+        if board.owner_id in members:
+            raise ValidationError({"members": ["The board owner cannot be removed."]})
+        removed = _members_among(board, members)
+        if removed:
+            board.remove_members(removed)
+            self._bump_version(board)
+            self._record_member_changes(board, removed=removed)
+        output = BoardMembershipSerializer(board, context=self.get_serializer_context())
+        return Response(output.data)
+
+    def export(self, request, *args, **kwargs):
+        """Stream the board, members, tasks and comments as NDJSON."""
+        board = self.get_object()
+        response = streaming_json_response(
+            request, iter_batched(export_board(board.pk)), content_type="application/x-ndjson"
+        )
+        response["Content-Disposition"] = f'attachment; filename="board-{board.pk}.ndjson"'
+        return response
+
+    def analytics(self, request, *args, **kwargs):
+        """Daily task counts per status/priority and completions for flow charts.
+
+        Served from the daily snapshots (see ``boards_app.analytics``), so the
+        cost depends on the number of days, not on the number of tasks.
+        """
+        board = self.get_object()
+        query = BoardAnalyticsQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        start, end = query.validated_data["from"], query.validated_data["to"]
+        return Response({"board": board.pk, "from": start, "to": end, "days": board_series(board.pk, start, end)})
+
+    def import_board(self, request, *args, **kwargs):
+        """Create a board owned by the requester from an NDJSON export in the body.
+
+        The body is read line by line; all referenced users must already exist.
+        """
+        try:
+            board = import_board(request._request, owner=request.user)
+        except TransferError as exc:
+            raise ValidationError({"errors": [str(exc)]})
+        record_activity(
+            board.id, request.user, Activity.Target.BOARD, board.id, Activity.Verb.CREATED,
+            diff({}, snapshot(board, BOARD_FIELDS)),
+        )
+        board = self.get_list_queryset().get(pk=board.pk)
+        output = BoardListSerializer(board, context=self.get_serializer_context())
+        return Response(output.data, status=status.HTTP_201_CREATED)
+
+    def clone(self, request, *args, **kwargs):
+        """Copy a board (typically a template) into a new board owned by the requester.
+
+        Tasks and comments are copied in batches (see ``clone_board``), so the
+        number of queries only grows by two per BOARD_TRANSFER_BATCH_SIZE rows.
+        """
+        source = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        options = serializer.validated_data
+        board = clone_board(
+            source,
+            request.user,
+            name=options.get("title"),
+            include_members=options["include_members"],
+            include_tasks=options["include_tasks"],
+            reset_status=options["reset_status"],
+            include_comments=options["include_comments"],
+            is_template=options["is_template"],
+        )
+        record_activity(
+            board.id, request.user, Activity.Target.BOARD, board.id, Activity.Verb.CREATED,
+            {**diff({}, snapshot(board, BOARD_FIELDS)), "cloned_from": [None, source.pk]},
+        )
+        board = self.get_list_queryset().get(pk=board.pk)
+        output = BoardListSerializer(board, context=self.get_serializer_context())
+        return Response(output.data, status=status.HTTP_201_CREATED)
+
+
+class BoardActivityListView(generics.ListAPIView):
+    """Paginated, newest-first activity log of one board."""
+
+    serializer_class = ActivitySerializer
+    permission_classes = [permissions.IsAuthenticated, IsBoardMemberOrOwner]
+    pagination_class = ActivityCursorPagination
+
+    def get_board(self):
+        """Load the board with the requester's membership and check access."""
+        board = get_object_or_404(_with_membership(Board.objects.all(), self.request.user), pk=self.kwargs["pk"])
+        self.check_object_permissions(self.request, board)
+        return board
+
+    def get_queryset(self):
+        """Activity entries of the board, with their actors."""
+        board = self.get_board()
+        return Activity.objects.filter(board=board).select_related("actor")
@@ -0,0 +1,132 @@
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from boards_app.models import Board
+from boards_app.stamps import touch_memberships
+from tasks_app.models import Comment, Task
+from tasks_app.ranking import rank_worker, rebalance_column
+
+Membership = Board.members.through
+
+
+def _table(model):
+    return connection.ops.quote_name(model._meta.db_table)
+
+
+def _column(model, field_name):
+    return connection.ops.quote_name(model._meta.get_field(field_name).column)
+
+
+def _copy_members(source_id, board_id, owner_id, cursor):
+    """INSERT ... SELECT the source board's members (the owner is added separately)."""
+    board, user = _column(Membership, "board"), _column(Membership, "user")
+    cursor.execute(
+        f"INSERT INTO {_table(Membership)} ({board}, {user}) "
+        f"SELECT %s, {user} FROM {_table(Membership)} WHERE {board} = %s AND {user} <> %s",
+        [board_id, source_id, owner_id],
+    )
+
+
+def _pages(queryset, fields, batch_size):
+    """``(pk, *fields)`` rows of ``queryset`` in id order, one query per ``batch_size`` rows."""
+    last = 0
+    while True:
+        page = list(queryset.filter(pk__gt=last).order_by("pk").values_list("pk", *fields)[:batch_size])
+        if page:
+            yield page
+        if len(page) < batch_size:
+            return
+        last = page[-1][0]
+
+
+def _insert_tasks(tasks):
+    """Bulk insert ``tasks``, setting their new ids (needed to remap comments)."""
+    if connection.features.can_return_rows_from_bulk_insert:
+        Task.objects.bulk_create(tasks)
+        return
+    for task in tasks:
+        task.save(force_insert=True)
+
+
+def _copy_tasks(source_id, board_id, keep_people, reset_status, batch_size):
+    """Copy the source tasks; returns ``{source task id: new task id}``."""
+    now = timezone.now()
+    fields = ("title", "description", "priority", "due_date", "rank", "status", "assignee_id", "reviewer_id")
+    task_ids = {}
+    for page in _pages(Task.objects.filter(board_id=source_id), fields, batch_size):
+        tasks = [
+            Task(
+                board_id=board_id,
+                title=title,
+                description=description,
+                priority=priority,
+                due_date=due_date,
+                rank=rank,
+                status=Task.Status.TODO if reset_status else status,
+                assignee_id=assignee_id if keep_people else None,
+                reviewer_id=reviewer_id if keep_people else None,
+                created_at=now,
+            )
+            for _, title, description, priority, due_date, rank, status, assignee_id, reviewer_id in page
+        ]
+        _insert_tasks(tasks)
+        task_ids.update(zip((row[0] for row in page), (task.pk for task in tasks)))
+    return task_ids
+
+
+def _copy_comments(source_id, task_ids, batch_size):
+    """Copy the source comments onto the new tasks through ``task_ids``."""
+    comments = Comment.objects.filter(task__board_id=source_id)
+    for page in _pages(comments, ("task_id", "author_id", "content", "created_at"), batch_size):
+        Comment.objects.bulk_create(
+            Comment(task_id=task_ids[task_id], author_id=author_id, content=content, created_at=created_at)
+            for _, task_id, author_id, content, created_at in page
+        )
+
+
+def clone_board(
+    source,
+    owner,
+    name=None,
+    include_members=True,
+    include_tasks=True,
+    reset_status=False,
+    include_comments=False,
+    is_template=False,
+    batch_size=None,
+):
+    """Copy ``source`` into a new board owned by ``owner`` in one transaction.
+
+    Members are copied with one INSERT ... SELECT. Tasks and comments are
+    read ``batch_size`` rows per query and written with ``bulk_create``;
+    the new task ids it returns map each comment onto its copied task. So
+    a board costs two queries per batch of tasks or comments (bulk_create
+    splits a batch further on backends with a low parameter limit, like
+    SQLite), and memory holds one batch plus the task id map. Without members, assignees and
+    reviewers are cleared; ``reset_status`` moves every task back to
+    to-do. Returns the new board.
+    """
+    batch_size = batch_size or settings.BOARD_TRANSFER_BATCH_SIZE
+    with transaction.atomic():
+        board = Board.objects.create(
+            name=name or source.name,
+            description=source.description,
+            owner=owner,
+            is_template=is_template,
+        )
+        board.add_members([owner.pk])
+        if include_members:
+            with connection.cursor() as cursor:
+                _copy_members(source.pk, board.pk, owner.pk, cursor)
+            touch_memberships(Membership.objects.filter(board_id=board.pk).values_list("user_id", flat=True))
+        if include_tasks:
+            task_ids = _copy_tasks(
+                source.pk, board.pk, keep_people=include_members, reset_status=reset_status, batch_size=batch_size
+            )
+            if include_comments:
+                _copy_comments(source.pk, task_ids, batch_size)
+        if include_tasks and reset_status:
+            # Ranks from several columns now share one; renumber it afterwards.
+            transaction.on_commit(lambda: rank_worker.submit(rebalance_column, board.pk, Task.Status.TODO))
+    return board
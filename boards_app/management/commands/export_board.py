@@ -0,0 +1,26 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from boards_app.models import Board
+from boards_app.transfer import export_board
+
+
+class Command(BaseCommand):
+    help = "Write a board with its members, tasks and comments as NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("board", type=int, help="Id of the board to export.")
+        parser.add_argument("--output", "-o", help="Target file (default: stdout).")
+        parser.add_argument("--batch-size", type=int, help="Rows fetched per database round trip.")
+
+    def handle(self, *args, **options):
+        if not Board.objects.filter(pk=options["board"]).exists():
+            raise CommandError(f"Board {options['board']} does not exist.")
+        lines = export_board(options["board"], batch_size=options["batch_size"])
+        if not options["output"]:
+            sys.stdout.writelines(lines)
+            return
+        with open(options["output"], "w", encoding="utf-8") as output:
+            output.writelines(lines)
+        self.stderr.write(self.style.SUCCESS(f"Exported board {options['board']} to {options['output']}."))
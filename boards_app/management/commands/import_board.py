@@ -0,0 +1,44 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from boards_app.transfer import TransferError, import_board
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Create a board from an NDJSON export (see export_board)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Export file, or - for stdin.")
+        parser.add_argument("--owner", help="Email of the user who should own the imported board.")
+        parser.add_argument("--create-users", action="store_true", help="Create users missing on this instance.")
+        parser.add_argument("--batch-size", type=int, help="Rows inserted per bulk_create.")
+
+    def handle(self, *args, **options):
+        owner = None
+        if options["owner"]:
+            owner = User.objects.filter(email__iexact=options["owner"]).first()
+            if owner is None:
+                raise CommandError(f"No user with email {options['owner']}.")
+
+        def report(stage, imported):
+            self.stdout.write(f"  {imported} {stage} imported")
+
+        source = sys.stdin if options["path"] == "-" else open(options["path"], encoding="utf-8")
+        try:
+            board = import_board(
+                source,
+                owner=owner,
+                create_users=options["create_users"],
+                batch_size=options["batch_size"],
+                progress=report,
+            )
+        except TransferError as exc:
+            raise CommandError(str(exc)) from exc
+        finally:
+            if source is not sys.stdin:
+                source.close()
+        self.stdout.write(self.style.SUCCESS(f"Imported board {board.pk} ({board.name})."))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from boards_app.models import Board
+from boards_app.purge import purge_board
+
+
+class Command(BaseCommand):
+    help = "Purge soft-deleted boards with their tasks and comments in small batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--board", type=int, help="Only purge the board with this id.")
+        parser.add_argument("--batch-size", type=int, help="Rows deleted per transaction.")
+
+    def handle(self, *args, **options):
+        boards = Board.all_objects.filter(deleted_at__isnull=False)
+        if options["board"]:
+            boards = boards.filter(pk=options["board"])
+        board_ids = list(boards.values_list("id", flat=True))
+        if not board_ids:
+            self.stdout.write("No deleted boards to purge.")
+            return
+        for board_id in board_ids:
+            self.stdout.write(f"Purging board {board_id} ...")
+
+            def report(stage, deleted, board_id=board_id):
+                self.stdout.write(f"  board {board_id}: {deleted} {stage} deleted")
+
+            purge_board(board_id, batch_size=options["batch_size"], progress=report)
+        self.stdout.write(self.style.SUCCESS(f"Purged {len(board_ids)} board(s)."))
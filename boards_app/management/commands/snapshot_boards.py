@@ -0,0 +1,21 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from boards_app.analytics import roll_up
+
+
+class Command(BaseCommand):
+    help = "Write today's analytics snapshot for every board that changed since its last one."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, help="Boards snapshotted per batch.")
+
+    def handle(self, *args, **options):
+        def report(done):
+            self.stdout.write(f"  {done} boards snapshotted")
+
+        try:
+            total = roll_up(batch_size=options["batch_size"], progress=report)
+        except ImproperlyConfigured as exc:
+            raise CommandError(str(exc)) from exc
+        self.stdout.write(self.style.SUCCESS(f"Snapshotted {total} board(s)."))
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boards', '0005_board_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BoardDailySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('to_do', models.PositiveIntegerField(default=0)),
+                ('in_progress', models.PositiveIntegerField(default=0)),
+                ('review', models.PositiveIntegerField(default=0)),
+                ('done', models.PositiveIntegerField(default=0)),
+                ('low', models.PositiveIntegerField(default=0)),
+                ('medium', models.PositiveIntegerField(default=0)),
+                ('high', models.PositiveIntegerField(default=0)),
+                ('critical', models.PositiveIntegerField(default=0)),
+                ('completed', models.PositiveIntegerField(default=0)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_snapshots', to='boards.board')),
+            ],
+            options={
+                'verbose_name': 'Board daily snapshot',
+                'verbose_name_plural': 'Board daily snapshots',
+                'ordering': ('board', 'day'),
+                'constraints': [models.UniqueConstraint(fields=('board', 'day'), name='unique_board_snapshot_day')],
+            },
+        ),
+    ]
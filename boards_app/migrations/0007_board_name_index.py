@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boards', '0006_boarddailysnapshot'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='board',
+            index=models.Index(fields=['name'], name='boards_boar_name_110f36_idx'),
+        ),
+    ]
@@ -1,5 +1,28 @@
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.utils import timezone
+
+from boards_app.stamps import touch_memberships
+
+
+class ActiveBoardManager(models.Manager):
+    """Default manager that hides boards waiting to be purged."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+    def visible_ids(self, user):
+        """Ids of boards ``user`` owns UNION the ones they are a member of.
+
+        Each branch is a plain index lookup, so this stays cheap no matter
+        how many boards the user belongs to (unlike an OR across a join +
+        DISTINCT). The member branch does not check ``deleted_at``; use the
+        result as a ``pk__in`` filter on this manager's boards.
+        """
+        owned = self.filter(owner_id=user.id).order_by().values("pk")
+        joined = Board.members.through.objects.filter(user_id=user.id).order_by().values("board_id")
+        return owned.union(joined)
 
 
 class Board(models.Model):
@@ -17,13 +40,133 @@ class Board(models.Model):
         related_name="boards",
         blank=True,
     )
+    is_template = models.BooleanField(default=False, help_text="Reusable starting point for new boards (see clone).")
+    # Bumped by every API write; see core.concurrency.
+    version = models.PositiveIntegerField(default=1, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(blank=True, null=True, db_index=True)
+
+    objects = ActiveBoardManager()
+    all_objects = models.Manager()
 
     class Meta:
         ordering = ("name",)
+        indexes = [models.Index(fields=["name"])]
         verbose_name = "Board"
         verbose_name_plural = "Boards"
 
     def __str__(self) -> str:
         return self.name
+
+    def _forget_prefetched_members(self) -> None:
+        """Drop a stale prefetched member list after a direct through-table write."""
+        getattr(self, "_prefetched_objects_cache", {}).pop("members", None)
+
+    def add_members(self, user_ids) -> None:
+        """Insert through-table rows for the given users, skipping existing ones."""
+        Membership = Board.members.through
+        Membership.objects.bulk_create(
+            [Membership(board_id=self.pk, user_id=user_id) for user_id in set(user_ids)],
+            ignore_conflicts=True,
+        )
+        self._forget_prefetched_members()
+        touch_memberships(user_ids)
+
+    def remove_members(self, user_ids) -> None:
+        """Delete the through-table rows for the given users in one statement."""
+        Board.members.through.objects.filter(board_id=self.pk, user_id__in=set(user_ids)).delete()
+        self._forget_prefetched_members()
+        touch_memberships(user_ids)
+
+    def set_members(self, user_ids) -> tuple[set, set]:
+        """Make the member set equal to ``user_ids`` touching only the delta.
+
+        Returns the ``(added, removed)`` user id sets.
+        """
+        target = set(user_ids)
+        current = set(Board.members.through.objects.filter(board_id=self.pk).values_list("user_id", flat=True))
+        added, removed = target - current, current - target
+        if removed:
+            self.remove_members(removed)
+        if added:
+            self.add_members(added)
+        return added, removed
+
+
+class Activity(models.Model):
+    """Field-level change record for a board, its tasks, comments and members."""
+
+    class Verb(models.TextChoices):
+        CREATED = "created", "Created"
+        UPDATED = "updated", "Updated"
+        DELETED = "deleted", "Deleted"
+        MEMBERS_ADDED = "members_added", "Members added"
+        MEMBERS_REMOVED = "members_removed", "Members removed"
+
+    class Target(models.TextChoices):
+        BOARD = "board", "Board"
+        TASK = "task", "Task"
+        COMMENT = "comment", "Comment"
+
+    board = models.ForeignKey(
+        Board,
+        related_name="activities",
+        on_delete=models.CASCADE,
+    )
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="+",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    target_type = models.CharField(max_length=20, choices=Target.choices)
+    target_id = models.BigIntegerField()
+    verb = models.CharField(max_length=20, choices=Verb.choices)
+    changes = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ("-created_at", "-id")
+        indexes = [models.Index(fields=["board", "-created_at"])]
+        verbose_name = "Activity"
+        verbose_name_plural = "Activities"
+
+    def __str__(self) -> str:
+        return f"{self.target_type} {self.target_id} {self.verb}"
+
+
+class BoardDailySnapshot(models.Model):
+    """Task counts of a board at the end of a day (see boards_app.analytics).
+
+    Rows are only written for days on which the board changed; readers carry
+    the previous row forward over the gaps.
+    """
+
+    board = models.ForeignKey(
+        Board,
+        related_name="daily_snapshots",
+        on_delete=models.CASCADE,
+    )
+    day = models.DateField()
+    to_do = models.PositiveIntegerField(default=0)
+    in_progress = models.PositiveIntegerField(default=0)
+    review = models.PositiveIntegerField(default=0)
+    done = models.PositiveIntegerField(default=0)
+    low = models.PositiveIntegerField(default=0)
+    medium = models.PositiveIntegerField(default=0)
+    high = models.PositiveIntegerField(default=0)
+    critical = models.PositiveIntegerField(default=0)
+    # Tasks moved to done on this day (throughput).
+    completed = models.PositiveIntegerField(default=0)
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ("board", "day")
+        constraints = [models.UniqueConstraint(fields=["board", "day"], name="unique_board_snapshot_day")]
+        verbose_name = "Board daily snapshot"
+        verbose_name_plural = "Board daily snapshots"
+
+    def __str__(self) -> str:
+        return f"{self.board_id} {self.day}"
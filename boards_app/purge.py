@@ -0,0 +1,63 @@
+import logging
+
+from django.conf import settings
+from django.db import transaction
+
+from boards_app.models import Activity, Board, BoardDailySnapshot
+from core.background import BackgroundWorker
+from tasks_app.models import ArchivedComment, ArchivedTask, Comment, Task
+
+logger = logging.getLogger(__name__)
+
+purge_worker = BackgroundWorker("board-purge")
+
+
+def _delete_in_batches(queryset, batch_size, stage, progress):
+    """Delete rows of ``queryset`` by primary key, one short transaction per batch."""
+    model = queryset.model
+    deleted = 0
+    while True:
+        ids = list(queryset.order_by().values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        with transaction.atomic():
+            model._default_manager.filter(pk__in=ids).delete()
+        deleted += len(ids)
+        if progress:
+            progress(stage, deleted)
+
+
+def purge_board(board_id, batch_size=None, progress=None):
+    """Remove a soft-deleted board and everything on it in bounded batches.
+
+    Comments go first, then tasks (live and archived), memberships, activity
+    entries, analytics snapshots and finally the board row itself, so no
+    step ever has to load more than ``batch_size`` ids.
+    ``progress(stage, deleted_so_far)`` is called after every batch.
+    """
+    batch_size = batch_size or settings.BOARD_PURGE_BATCH_SIZE
+    if not Board.all_objects.filter(pk=board_id, deleted_at__isnull=False).exists():
+        return
+    _delete_in_batches(Comment.objects.filter(task__board_id=board_id), batch_size, "comments", progress)
+    _delete_in_batches(Task.objects.filter(board_id=board_id), batch_size, "tasks", progress)
+    _delete_in_batches(
+        ArchivedComment.objects.filter(task__board_id=board_id), batch_size, "archived comments", progress
+    )
+    _delete_in_batches(ArchivedTask.objects.filter(board_id=board_id), batch_size, "archived tasks", progress)
+    _delete_in_batches(Board.members.through.objects.filter(board_id=board_id), batch_size, "members", progress)
+    _delete_in_batches(Activity.objects.filter(board_id=board_id), batch_size, "activities", progress)
+    _delete_in_batches(BoardDailySnapshot.objects.filter(board_id=board_id), batch_size, "snapshots", progress)
+    Board.all_objects.filter(pk=board_id).delete()
+    if progress:
+        progress("board", 1)
+
+
+def _log_progress(board_id):
+    def report(stage, deleted):
+        logger.info("Purging board %s: %s %s deleted.", board_id, deleted, stage)
+    return report
+
+
+def schedule_purge(board_id):
+    """Purge a soft-deleted board on the in-process background worker."""
+    purge_worker.submit(purge_board, board_id, progress=_log_progress(board_id))
@@ -0,0 +1,45 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+BOARD_KEY = "board-stamp:{}"
+MEMBERSHIP_KEY = "membership-stamp:{}"
+
+
+def _enabled():
+    # Only the dashboard cache reads stamps; skip the cache writes without it.
+    return bool(settings.DASHBOARD_CACHE_TIMEOUT)
+
+
+def _touch(keys):
+    # After commit, so a cache rebuilt in between cannot pair old rows with new stamps.
+    if keys:
+        transaction.on_commit(lambda: cache.set_many({key: uuid.uuid4().hex for key in keys}, None))
+
+
+def touch_boards(board_ids):
+    """Mark the content of the given boards (tasks, comments, fields) as changed."""
+    if _enabled():
+        _touch([BOARD_KEY.format(board_id) for board_id in set(board_ids)])
+
+
+def touch_memberships(user_ids):
+    """Mark the set of boards the given users can see as changed."""
+    if _enabled():
+        _touch([MEMBERSHIP_KEY.format(user_id) for user_id in set(user_ids)])
+
+
+def board_keys(board_ids):
+    return [BOARD_KEY.format(board_id) for board_id in board_ids]
+
+
+def membership_key(user_id):
+    return MEMBERSHIP_KEY.format(user_id)
+
+
+def read_stamps(keys):
+    """Current stamps of ``keys`` in one cache round trip (None when never touched)."""
+    found = cache.get_many(keys)
+    return {key: found.get(key) for key in keys}
@@ -0,0 +1,679 @@
+import io
+import json
+import time
+import tracemalloc
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, OperationalError, connection
+from django.db.models import Count
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from boards_app.activity import ActivityBuffer
+from boards_app.analytics import board_series, dirty_boards, roll_up
+from boards_app.cloning import clone_board
+from boards_app.models import Activity, Board, BoardDailySnapshot
+from boards_app.purge import purge_board
+from boards_app.transfer import FORMAT_VERSION, TransferError, export_board, import_board
+from core.concurrency import PreconditionFailed, save_versioned
+from tasks_app.models import ArchivedTask, Comment, Task
+
+User = get_user_model()
+LOGGER = "boards_app.activity"
+
+
+def make_user(name):
+    return User.objects.create_user(username=name, email=f"{name}@example.com", password="secret")
+
+
+def client_for(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.get_or_create(user=user)[0].key}")
+    return client
+
+
+def make_board(owner, *members, name="Board"):
+    board = Board.objects.create(name=name, owner=owner)
+    board.add_members([owner.id, *(member.id for member in members)])
+    return board
+
+
+def make_users(count, prefix="user"):
+    """``count`` users without password hashing, in id order."""
+    User.objects.bulk_create(User(username=f"{prefix}{index}", email=f"{prefix}{index}@example.com") for index in range(count))
+    return list(User.objects.filter(username__startswith=prefix).order_by("pk").values_list("pk", flat=True))
+
+
+@override_settings(ACTIVITY_LOG_ENABLED=False)
+class BoardMembershipTests(TestCase):
+    """Member ids are validated in one query and only the delta is written."""
+
+    def setUp(self):
+        self.owner = make_user("alice")
+        self.client = client_for(self.owner)
+        self.board = make_board(self.owner)
+        self.url = f"/api/boards/{self.board.pk}/"
+        self.client.get(self.url)
+
+    def members(self):
+        return set(self.board.members.values_list("pk", flat=True))
+
+    def count_queries(self, request):
+        with CaptureQueriesContext(connection) as queries:
+            response = request()
+        self.assertEqual(response.status_code, 200, response.content)
+        return len(queries.captured_queries)
+
+    def test_update_cost_does_not_grow_with_the_member_list(self):
+        counts = []
+        for size in (3, 60):
+            self.board.add_members(make_users(size, f"old{size}-"))
+            target = make_users(size, f"new{size}-")
+            # Each update removes and adds ``size`` members.
+            counts.append(self.count_queries(lambda: self.client.patch(self.url, {"members": target}, format="json")))
+            self.assertEqual(self.members(), {self.owner.pk, *target})
+        self.assertEqual(counts[1], counts[0])
+
+    def test_unknown_member_is_rejected(self):
+        response = self.client.patch(self.url, {"members": [self.owner.pk, 999999]}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("999999", str(response.data["members"]))
+
+    def test_member_endpoints_write_only_the_given_users(self):
+        existing = make_users(40, "old")
+        self.board.add_members(existing)
+        added = make_users(2, "new")
+        small = self.count_queries(lambda: self.client.post(f"{self.url}members/", {"members": added}, format="json"))
+        self.assertEqual(self.members(), {self.owner.pk, *existing, *added})
+        large = self.count_queries(
+            lambda: self.client.delete(f"{self.url}members/", {"members": existing}, format="json")
+        )
+        self.assertEqual(large, small)
+        self.assertEqual(self.members(), {self.owner.pk, *added})
+
+    def test_activity_lists_only_changed_members(self):
+        member, newcomer, stranger = make_users(3)
+        self.board.add_members([member])
+        with mock.patch("boards_app.api.views.record_activity") as record:
+            self.client.post(f"{self.url}members/", {"members": [member, newcomer]}, format="json")
+            self.client.delete(f"{self.url}members/", {"members": [member, stranger]}, format="json")
+            version = Board.objects.get(pk=self.board.pk).version
+            self.client.delete(f"{self.url}members/", {"members": [stranger]}, format="json")
+        logged = [(call.args[4], call.args[5]["members"]) for call in record.call_args_list]
+        self.assertEqual(logged, [(Activity.Verb.MEMBERS_ADDED, [newcomer]), (Activity.Verb.MEMBERS_REMOVED, [member])])
+        # A no-op change leaves the version (and ETag) alone.
+        self.assertEqual(Board.objects.get(pk=self.board.pk).version, version)
+
+    def test_owner_cannot_be_removed(self):
+        response = self.client.delete(f"{self.url}members/", {"members": [self.owner.pk]}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(self.owner.pk, self.members())
+
+
+@override_settings(ACTIVITY_LOG_ENABLED=False, BOARD_DEFERRED_DELETE=True, BOARD_PURGE_IN_PROCESS=False)
+class BoardPurgeTests(TestCase):
+    def setUp(self):
+        self.owner = make_user("alice")
+        self.client = client_for(self.owner)
+        self.board = make_board(self.owner)
+        tasks = Task.objects.bulk_create(Task(board=self.board, title=f"Task {index}") for index in range(4))
+        Comment.objects.bulk_create(Comment(task=tasks[index % 4], author=self.owner, content="x") for index in range(7))
+
+    def test_delete_hides_the_board_and_defers_the_purge(self):
+        url = f"/api/boards/{self.board.pk}/"
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(Task.objects.filter(board_id=self.board.pk).count(), 4)
+
+    def test_purge_deletes_in_bounded_batches(self):
+        Board.objects.filter(pk=self.board.pk).update(deleted_at=timezone.now())
+        progress = []
+        purge_board(self.board.pk, batch_size=3, progress=lambda stage, deleted: progress.append((stage, deleted)))
+        self.assertEqual(
+            progress,
+            [("comments", 3), ("comments", 6), ("comments", 7), ("tasks", 3), ("tasks", 4), ("members", 1), ("board", 1)],
+        )
+        self.assertFalse(Board.all_objects.filter(pk=self.board.pk).exists())
+        self.assertFalse(Comment.objects.exists())
+
+    def test_live_boards_are_never_purged(self):
+        purge_board(self.board.pk)
+        self.assertEqual(Comment.objects.count(), 7)
+
+    def test_command_reports_progress(self):
+        Board.objects.filter(pk=self.board.pk).update(deleted_at=timezone.now())
+        out = io.StringIO()
+        call_command("purge_deleted_boards", "--batch-size", "5", stdout=out)
+        self.assertIn(f"board {self.board.pk}: 7 comments deleted", out.getvalue())
+        self.assertIn("Purged 1 board(s).", out.getvalue())
+        self.assertFalse(Task.objects.exists())
+
+
+@override_settings(ACTIVITY_LOG_ENABLED=False)
+class BoardListTests(TestCase):
+    def setUp(self):
+        self.user = make_user("alice")
+        self.other = make_user("bob")
+        self.client = client_for(self.user)
+        now = timezone.now()
+        self.boards = []
+        # name, tasks, board updated (days ago), latest task update (days ago)
+        for name, tasks, updated, touched in (
+            ("Delta", 2, 5, None), ("Alpha", 0, 1, None), ("Charlie", 5, 9, 0),
+            ("Bravo", 1, 3, 8), ("Echo", 3, 2, None),
+        ):
+            board = make_board(self.user if name != "Bravo" else self.other, self.user)
+            Board.objects.filter(pk=board.pk).update(name=name, updated_at=now - timedelta(days=updated))
+            created = Task.objects.bulk_create(Task(board=board, title=f"{name} {index}") for index in range(tasks))
+            Task.objects.filter(board=board).update(updated_at=now - timedelta(days=updated))
+            if touched is not None:
+                Task.objects.filter(pk=created[0].pk).update(updated_at=now - timedelta(days=touched))
+            self.boards.append(board)
+        make_board(self.other, name="Hidden")
+
+    def titles(self, **params):
+        response = self.client.get("/api/boards/", params)
+        self.assertEqual(response.status_code, 200)
+        return [board["title"] for board in response.data]
+
+    def walk(self, **params):
+        """Follow ``next`` links through every page."""
+        titles, url, page_size = [], "/api/boards/", params["page_size"]
+        while url:
+            response = self.client.get(url, params)
+            titles += [board["title"] for board in response.data["results"]]
+            self.assertLessEqual(len(response.data["results"]), page_size)
+            url, params = response.data["next"], {}
+        return titles
+
+    def test_lists_owned_and_member_boards_once(self):
+        self.assertEqual(sorted(self.titles()), ["Alpha", "Bravo", "Charlie", "Delta", "Echo"])
+
+    def test_orderings(self):
+        expected = {
+            "title": ["Alpha", "Bravo", "Charlie", "Delta", "Echo"],
+            "-title": ["Echo", "Delta", "Charlie", "Bravo", "Alpha"],
+            "updated_at": ["Charlie", "Delta", "Bravo", "Echo", "Alpha"],
+            "-ticket_count": ["Charlie", "Echo", "Delta", "Bravo", "Alpha"],
+            "ticket_count": ["Alpha", "Bravo", "Delta", "Echo", "Charlie"],
+            "recent": ["Charlie", "Alpha", "Echo", "Bravo", "Delta"],
+        }
+        for ordering, titles in expected.items():
+            with self.subTest(ordering=ordering):
+                self.assertEqual(self.titles(ordering=ordering), titles)
+                self.assertEqual(self.walk(ordering=ordering, page_size=2), titles)
+
+    def test_unknown_ordering_falls_back_to_title(self):
+        self.assertEqual(self.titles(ordering="owner__password"), self.titles(ordering="title"))
+
+    def test_cursor_pages_do_not_repeat_on_ties(self):
+        Board.objects.filter(pk__in=[board.pk for board in self.boards]).update(name="Same")
+        response = self.client.get("/api/boards/", {"page_size": 2})
+        ids = [board["id"] for board in response.data["results"]]
+        while response.data["next"]:
+            response = self.client.get(response.data["next"])
+            ids += [board["id"] for board in response.data["results"]]
+        self.assertEqual(sorted(ids), sorted(board.pk for board in self.boards))
+
+
+@override_settings(ACTIVITY_LOG_ENABLED=False, BOARD_PURGE_IN_PROCESS=False)
+class BoardCloneTests(TestCase):
+    def setUp(self):
+        self.owner = make_user("alice")
+        self.bob = make_user("bob")
+        self.client = client_for(self.owner)
+        self.client.get("/api/boards/")
+
+    def make_source(self, tasks, comments):
+        board = make_board(self.owner, self.bob, name="Template")
+        other = make_board(self.owner, name="Other")
+        created = []
+        for index in range(tasks):
+            # Interleave another board's tasks so source ids are not contiguous.
+            Task.objects.create(board=other, title=f"Other {index}")
+            created.append(Task.objects.create(board=board, title=f"Task {index}", rank=f"{index:04d}", assignee=self.bob))
+        Comment.objects.bulk_create(
+            Comment(task=created[index % tasks], author=self.bob, content=f"On Task {index % tasks}") for index in range(comments)
+        )
+        return board
+
+    def clone(self, board):
+        options = {"title": "Copy", "include_comments": True}
+        response = self.client.post(f"/api/boards/{board.pk}/clone/", options, format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        return Board.objects.get(pk=response.data["id"])
+
+    def assert_copied(self, source, copy):
+        fields = ("title", "rank", "assignee_id")
+        self.assertEqual(
+            list(Task.objects.filter(board=copy).order_by("rank").values_list(*fields)),
+            list(Task.objects.filter(board=source).order_by("rank").values_list(*fields)),
+        )
+        comments = Comment.objects.filter(task__board=copy).values_list("task__title", "content")
+        self.assertEqual(len(comments), Comment.objects.filter(task__board=source).count())
+        self.assertTrue(all(content == f"On {title}" for title, content in comments))
+
+    def test_comments_follow_their_copied_task(self):
+        source = self.make_source(tasks=5, comments=12)
+        copy = self.clone(source)
+        self.assert_copied(source, copy)
+        self.assertEqual(set(copy.members.values_list("pk", flat=True)), {self.owner.pk, self.bob.pk})
+
+    def test_batches_keep_the_task_mapping(self):
+        source = self.make_source(tasks=20, comments=45)
+        copy = clone_board(source, self.owner, include_comments=True, batch_size=7)
+        self.assert_copied(source, copy)
+
+    def test_query_count_does_not_grow_with_the_board(self):
+        small = self.make_source(tasks=2, comments=2)
+        with CaptureQueriesContext(connection) as queries:
+            self.clone(small)
+        # Within one BOARD_TRANSFER_BATCH_SIZE batch (and SQLite's parameter limit per INSERT).
+        large = self.make_source(tasks=60, comments=200)
+        with self.assertNumQueries(len(queries.captured_queries)):
+            copy = self.clone(large)
+        self.assert_copied(large, copy)
+
+
+@override_settings(ACTIVITY_LOG_ENABLED=False)
+class BoardVersioningTests(TestCase):
+    def setUp(self):
+        self.owner = make_user("alice")
+        self.other = make_user("bob")
+        self.client = client_for(self.owner)
+        self.board = make_board(self.owner)
+
+    def test_detail_etag_is_weak(self):
+        response = self.client.get(f"/api/boards/{self.board.pk}/")
+        self.assertEqual(response["ETag"], f'W/"{self.board.version}"')
+
+    def test_member_change_invalidates_etag(self):
+        url = f"/api/boards/{self.board.pk}/"
+        etag = self.client.get(url)["ETag"]
+        self.client.post(f"{url}members/", {"members": [self.other.id]}, format="json")
+        response = self.client.patch(url, {"title": "Renamed"}, format="json", HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+
+    def test_every_versioned_write_checks_if_match(self):
+        url = f"/api/boards/{self.board.pk}/"
+        stale = self.client.get(url)["ETag"]
+        self.client.patch(url, {"title": "Renamed"}, format="json")
+        members = {"members": [self.other.id]}
+        writes = {
+            "add members": (self.client.post, f"{url}members/", members),
+            "remove members": (self.client.delete, f"{url}members/", members),
+            "delete": (self.client.delete, url, None),
+        }
+        for name, (method, path, body) in writes.items():
+            with self.subTest(name):
+                self.assertEqual(method(path, body, format="json", HTTP_IF_MATCH=stale).status_code, 412)
+        self.assertTrue(Board.objects.filter(pk=self.board.pk).exists())
+        current = self.client.get(url)["ETag"]
+        response = self.client.post(f"{url}members/", {"members": [self.other.id]}, format="json", HTTP_IF_MATCH=current)
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(BOARD_DEFERRED_DELETE=True, BOARD_PURGE_IN_PROCESS=False)
+    def test_save_after_soft_delete_does_not_restore_board(self):
+        loaded = Board.objects.get(pk=self.board.pk)
+        self.assertEqual(self.client.delete(f"/api/boards/{self.board.pk}/").status_code, 204)
+        loaded.name = "Renamed"
+        with self.assertRaises(PreconditionFailed):
+            save_versioned(loaded, ["name"])
+        self.assertIsNotNone(Board.all_objects.get(pk=self.board.pk).deleted_at)
+
+
+class BoardImportUserTests(TestCase):
+    def setUp(self):
+        self.owner = make_user("alice")
+        self.local = User.objects.create_user(username="Foo@x.io", email="Foo@x.io", password="secret")
+
+    def lines(self, *users):
+        records = [
+            {"type": "board", "version": FORMAT_VERSION, "id": 1, "name": "Imported", "owner": 10},
+            *({"type": "user", "id": 10 + index, **user} for index, user in enumerate(users)),
+            {"type": "member", "user": 10},
+        ]
+        return [json.dumps(record) for record in records]
+
+    def test_users_are_matched_ignoring_case(self):
+        board = import_board(self.lines({"email": "foo@X.io"}), owner=self.owner, create_users=True)
+        self.assertEqual(set(board.members.values_list("pk", flat=True)), {self.owner.pk, self.local.pk})
+        self.assertEqual(User.objects.count(), 2)
+
+    def test_user_without_email_is_rejected(self):
+        with self.assertRaisesMessage(TransferError, "has no email"):
+            import_board(self.lines({"email": ""}, {"email": " "}), owner=self.owner, create_users=True)
+
+    def test_taken_username_is_reported_not_crashed(self):
+        self.local.email = "changed@x.io"
+        self.local.save()
+        with self.assertRaisesMessage(TransferError, "username already taken"):
+            import_board(self.lines({"email": "Foo@x.io"}), owner=self.owner, create_users=True)
+
+
+@override_settings(ACTIVITY_LOG_ENABLED=False)
+class BoardTransferTests(TestCase):
+    def setUp(self):
+        self.owner = make_user("alice")
+        self.bob = make_user("bob")
+
+    def test_export_import_round_trip(self):
+        board = make_board(self.owner, self.bob, name="Source")
+        first = Task.objects.create(
+            board=board, title="Ship", status=Task.Status.REVIEW, priority=Task.Priority.CRITICAL,
+            assignee=self.bob, reviewer=self.owner, due_date=timezone.localdate() + timedelta(days=3), rank="a",
+        )
+        Task.objects.create(board=board, title="Plan", description="Details", rank="b")
+        Comment.objects.create(task=first, author=self.bob, content="Looks good")
+        lines = list(export_board(board.pk, batch_size=1))
+        copy = import_board(lines, batch_size=1)
+        self.assertNotEqual(copy.pk, board.pk)
+        self.assertEqual((copy.name, copy.owner_id), ("Source", self.owner.pk))
+        self.assertEqual(set(copy.members.values_list("pk", flat=True)), {self.owner.pk, self.bob.pk})
+        fields = ("title", "description", "status", "priority", "assignee_id", "reviewer_id", "due_date", "rank", "created_at")
+        original = list(Task.objects.filter(board=board).order_by("rank").values_list(*fields))
+        self.assertEqual(list(Task.objects.filter(board=copy).order_by("rank").values_list(*fields)), original)
+        comment = Comment.objects.get(task__board=copy)
+        self.assertEqual((comment.task.title, comment.author_id, comment.content), ("Ship", self.bob.pk, "Looks good"))
+        # The copy exports to the same stream, ids aside.
+        self.assertEqual(len(list(export_board(copy.pk))), len(lines))
+
+    def test_invalid_task_fields_are_rejected_with_their_line(self):
+        cases = {
+            "status": {"status": "bogus"},
+            "priority": {"priority": "urgent"},
+            "due_date": {"due_date": "2024-02-30"},
+            "created_at": {"created_at": "yesterday"},
+        }
+        for field, values in cases.items():
+            with self.subTest(field=field):
+                lines = [
+                    json.dumps({"type": "board", "version": FORMAT_VERSION, "name": "Imported", "owner": 1}),
+                    json.dumps({"type": "user", "id": 1, "email": "alice@example.com"}),
+                    json.dumps({"type": "task", "id": 1, "title": "Fine"}),
+                    json.dumps({"type": "task", "id": 2, "title": "Broken", **values}),
+                ]
+                with self.assertRaisesMessage(TransferError, f"Line 4: invalid {field}"):
+                    import_board(lines)
+                self.assertFalse(Board.all_objects.filter(name="Imported").exists())
+
+    def test_invalid_comment_date_is_rejected(self):
+        lines = [
+            json.dumps({"type": "board", "version": FORMAT_VERSION, "name": "Imported", "owner": 1}),
+            json.dumps({"type": "user", "id": 1, "email": "alice@example.com"}),
+            json.dumps({"type": "task", "id": 1, "title": "Fine"}),
+            json.dumps({"type": "comment", "id": 1, "task": 1, "author": 1, "content": "x", "created_at": 5}),
+        ]
+        with self.assertRaisesMessage(TransferError, "Line 4: invalid created_at 5"):
+            import_board(lines)
+
+
+class ActivityBufferTests(TestCase):
+    def setUp(self):
+        self.owner = make_user("alice")
+        self.board = make_board(self.owner)
+        self.buffer = ActivityBuffer(max_size=10, flush_size=100, flush_interval=3600)
+
+    def record(self, board_id, count=1):
+        for _ in range(count):
+            self.buffer.record(
+                board_id=board_id, actor_id=self.owner.pk, target_type=Activity.Target.BOARD,
+                target_id=board_id, verb=Activity.Verb.UPDATED,
+            )
+
+    def test_rows_of_purged_boards_are_skipped(self):
+        purged = make_board(self.owner, name="Purged")
+        self.record(self.board.pk)
+        self.record(purged.pk)
+        purged.delete()
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(Activity.objects.filter(board=self.board).count(), 1)
+
+    def test_rows_survive_a_failed_insert(self):
+        self.record(self.board.pk, count=3)
+        failure = OperationalError("database is locked")
+        with mock.patch.object(Activity.objects, "bulk_create", side_effect=failure), self.assertLogs(LOGGER, "WARNING"):
+            self.assertEqual(self.buffer.flush(), 0)
+        self.assertEqual(self.buffer.pending(), 3)
+        self.assertEqual(self.buffer.flush(), 3)
+        self.assertEqual(Activity.objects.count(), 3)
+
+    def test_only_rejected_rows_are_dropped(self):
+        other = make_board(self.owner, name="Other")
+        self.record(self.board.pk, count=2)
+        self.record(other.pk)
+        original = Activity.objects.bulk_create
+
+        def reject_other(rows, **kwargs):
+            if any(row.board_id == other.pk for row in rows):
+                raise IntegrityError("FOREIGN KEY constraint failed")
+            return original(rows, **kwargs)
+
+        with mock.patch.object(Activity.objects, "bulk_create", side_effect=reject_other), self.assertLogs(LOGGER, "WARNING"):
+            self.assertEqual(self.buffer.flush(), 2)
+        self.assertEqual((self.buffer.pending(), self.buffer.dropped), (0, 1))
+
+
+class BoardAnalyticsTests(TestCase):
+    def setUp(self):
+        self.owner = make_user("alice")
+        self.client = client_for(self.owner)
+        self.board = make_board(self.owner)
+
+    @override_settings(ACTIVITY_LOG_ENABLED=False)
+    def test_completions_are_unknown_without_the_activity_log(self):
+        response = self.client.get(f"/api/boards/{self.board.pk}/analytics/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data["days"])
+        self.assertTrue(all(day["completed"] is None for day in response.data["days"]))
+        with self.assertRaises(CommandError):
+            call_command("snapshot_boards", stdout=io.StringIO())
+
+    def test_archiving_marks_the_board_dirty(self):
+        roll_up()
+        self.assertFalse(dirty_boards().exists())
+        ArchivedTask.objects.create(
+            id=1, board=self.board, title="Old", priority=Task.Priority.LOW, status=Task.Status.DONE,
+            created_at=timezone.now(), updated_at=timezone.now(),
+        )
+        self.assertEqual(list(dirty_boards().values_list("pk", flat=True)), [self.board.pk])
+
+    def live_series(self, start, end):
+        """Per-day counts aggregated from the task rows, what the endpoint would do without snapshots."""
+        days = []
+        day = start
+        while day <= end:
+            rows = (
+                Task.objects.filter(board=self.board, created_at__date__lte=day)
+                .order_by()
+                .values("status", "priority")
+                .annotate(total=Count("pk"))
+            )
+            days.append({(row["status"], row["priority"]): row["total"] for row in rows})
+            day += timedelta(days=1)
+        return days
+
+    def test_snapshot_series_beats_live_aggregation(self):
+        today = timezone.localdate()
+        start, end = today - timedelta(days=90), today - timedelta(days=1)
+        BoardDailySnapshot.objects.bulk_create(
+            BoardDailySnapshot(board=self.board, day=start + timedelta(days=offset), to_do=offset, low=offset)
+            for offset in range(91)
+        )
+
+        def best_of(fn, runs=3):
+            timings = []
+            for _ in range(runs):
+                started = time.perf_counter()
+                fn()
+                timings.append(time.perf_counter() - started)
+            return min(timings)
+
+        timings = {}
+        for total in (300, 3000):
+            Task.objects.bulk_create(
+                Task(board=self.board, title=f"Task {index}", created_at=timezone.now() - timedelta(days=90 - index % 90))
+                for index in range(total - self.board.tasks.count())
+            )
+            # The row carried into the range and the rows in it.
+            with self.assertNumQueries(2):
+                self.assertEqual(len(board_series(self.board.pk, start, end)), 90)
+            timings[total] = (
+                best_of(lambda: board_series(self.board.pk, start, end)),
+                best_of(lambda: self.live_series(start, end), runs=1),
+            )
+        snapshots, live = timings[3000]
+        # The snapshot read does not depend on the number of tasks; live
+        # aggregation scans them once per day.
+        self.assertLess(snapshots, live / 5)
+        self.assertLess(snapshots, timings[300][0] * 3)
+
+
+class BoardAdminChangelistTests(TestCase):
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        admin = User.objects.create_superuser("root", "root@example.com", "secret")
+        self.client.force_login(admin)
+        for count in (3, 30):
+            Board.objects.bulk_create(Board(name=f"Board {index}", owner=admin) for index in range(count))
+            # Session, user, bounded count, rows with owners.
+            with self.assertNumQueries(4):
+                self.assertEqual(self.client.get("/admin/boards/board/").status_code, 200)
+
+    def test_search_matches_name_or_owner_prefix(self):
+        admin = User.objects.create_superuser("root", "root@example.com", "secret")
+        self.client.force_login(admin)
+        sprint = make_board(admin, name="Sprint 12")
+        other = make_board(make_user("zoe"), name="sprint planning")
+        response = self.client.get("/admin/boards/board/", {"q": "Spr"})
+        self.assertEqual(list(response.context["cl"].result_list), [sprint])
+        response = self.client.get("/admin/boards/board/", {"q": "zo"})
+        self.assertEqual(list(response.context["cl"].result_list), [other])
+
+
+@override_settings(ACTIVITY_LOG_ENABLED=False)
+class CompactBoardRendererTests(TestCase):
+    """The compact board payload carries exactly what the detail payload does."""
+
+    def setUp(self):
+        self.owner = make_user("alice")
+        self.members = [make_user(f"member{index}") for index in range(3)]
+        self.client = client_for(self.owner)
+        self.board = make_board(self.owner, *self.members)
+        for index in range(6):
+            Task.objects.create(
+                board=self.board,
+                title=f"Task {index}",
+                assignee=self.members[index % 3],
+                reviewer=self.owner if index % 2 else None,
+            )
+        self.url = f"/api/boards/{self.board.pk}/"
+
+    def expand(self, compact):
+        """Rebuild the detail payload from the compact one."""
+        users = compact.pop("users")
+
+        def lookup(user_id):
+            return None if user_id is None else users[str(user_id)]
+
+        compact["owner_data"] = lookup(compact["owner_id"])
+        compact["members"] = [lookup(user_id) for user_id in compact["members"]]
+        compact["members_data"] = compact["members"]
+        for task in compact["tasks"]:
+            task["assignee"], task["reviewer"] = lookup(task["assignee"]), lookup(task["reviewer"])
+        return compact
+
+    def test_compact_payload_matches_detail(self):
+        detail = self.client.get(self.url)
+        for compact in (
+            self.client.get(self.url, {"format": "compact"}),
+            self.client.get(self.url, HTTP_ACCEPT="application/vnd.kanmind.compact+json"),
+        ):
+            self.assertEqual(compact.status_code, 200)
+            self.assertEqual(compact["Content-Type"], "application/vnd.kanmind.compact+json")
+            self.assertLess(len(compact.content), len(detail.content))
+            self.assertEqual(self.expand(json.loads(compact.content)), json.loads(detail.content))
+
+    def test_compact_payload_costs_no_extra_queries(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as detail:
+            self.client.get(self.url)
+        with CaptureQueriesContext(connection) as compact:
+            self.client.get(self.url, {"format": "compact"})
+        self.assertEqual(len(compact.captured_queries), len(detail.captured_queries))
+
+
+@override_settings(ACTIVITY_LOG_ENABLED=False, ADMISSION_CONTROL_ENABLED=False, BOARD_PURGE_IN_PROCESS=False)
+class BoardQuerysetProfileTests(TestCase):
+    """Each action's queryset profile costs the same however big the board is.
+
+    Every action runs against a small and a large board. The query count may
+    not grow with members, tasks or comments, and the peak Python allocation
+    may not grow with comments, which no profile loads.
+    """
+
+    def setUp(self):
+        self.owner = make_user("alice")
+        self.client = client_for(self.owner)
+        self.client.get("/api/boards/")
+
+    def make_board(self, members, tasks, comments):
+        board = make_board(self.owner, name=f"Board {members}")
+        User.objects.bulk_create(User(username=f"{board.pk}-{index}") for index in range(members))
+        added = User.objects.filter(username__startswith=f"{board.pk}-").values_list("pk", flat=True)
+        board.member_ids = [self.owner.pk, *added]
+        board.add_members(board.member_ids)
+        created = Task.objects.bulk_create(
+            Task(board=board, title=f"Task {index}", assignee=self.owner) for index in range(tasks)
+        )
+        Comment.objects.bulk_create(
+            Comment(task=created[index % tasks], author=self.owner, content="x" * 200) for index in range(comments)
+        )
+        return board
+
+    def measure(self, request, board):
+        url = f"/api/boards/{board.pk}/"
+        with CaptureQueriesContext(connection) as queries:
+            tracemalloc.start()
+            try:
+                response = request(url, board)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+        self.assertLess(response.status_code, 300)
+        return len(queries.captured_queries), peak
+
+    def assert_constant(self, request, memory=True):
+        small_queries, small_peak = self.measure(request, self.make_board(members=2, tasks=2, comments=2))
+        large_queries, large_peak = self.measure(request, self.make_board(members=20, tasks=40, comments=1000))
+        self.assertEqual(large_queries, small_queries)
+        if memory:
+            # Loading the 1000 comments alone would take several times this.
+            self.assertLess(large_peak - small_peak, 150_000)
+
+    def test_list(self):
+        self.assert_constant(lambda url, board: self.client.get("/api/boards/"))
+
+    def test_create(self):
+        # A new board with as many members as the measured one; its response loads no tasks.
+        self.assert_constant(lambda url, board: self.client.post(
+            "/api/boards/", {"title": "New", "members": board.member_ids}, format="json"
+        ))
+
+    def test_retrieve(self):
+        # Tasks and members are part of the payload, so only queries are compared.
+        self.assert_constant(lambda url, board: self.client.get(url), memory=False)
+
+    def test_update(self):
+        self.assert_constant(lambda url, board: self.client.patch(url, {"description": "Changed"}, format="json"))
+
+    def test_destroy(self):
+        self.assert_constant(lambda url, board: self.client.delete(url))
+
+    def test_analytics(self):
+        self.assert_constant(lambda url, board: self.client.get(f"{url}analytics/"))
@@ -0,0 +1,329 @@
+import datetime
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from boards_app.models import Board
+from boards_app.stamps import touch_memberships
+from tasks_app.models import Comment, Task
+from tasks_app.ranking import rank_worker, rebalance_board
+
+User = get_user_model()
+
+FORMAT_VERSION = 1
+USER_FIELDS = ("id", "email", "first_name", "last_name")
+TASK_FIELDS = (
+    "id",
+    "title",
+    "description",
+    "priority",
+    "status",
+    "assignee_id",
+    "reviewer_id",
+    "due_date",
+    "rank",
+    "created_at",
+    "updated_at",
+)
+COMMENT_FIELDS = ("id", "task_id", "author_id", "content", "created_at")
+
+
+class TransferError(Exception):
+    """Raised when an export stream cannot be imported."""
+
+
+def _choice(record, field, choices, default, number):
+    """``record[field]`` if it is one of ``choices`` (``default`` when absent)."""
+    value = record.get(field, default)
+    if value not in choices.values:
+        raise TransferError(f"Line {number}: invalid {field} {value!r}, expected one of {', '.join(choices.values)}.")
+    return value
+
+
+def _parsed(record, field, parse, number):
+    """``record[field]`` parsed with ``parse`` (a ``dateparse`` function); None when absent."""
+    value = record.get(field)
+    if value is None:
+        return None
+    try:
+        parsed = parse(value) if isinstance(value, str) else None
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise TransferError(f"Line {number}: invalid {field} {value!r}.")
+    if isinstance(parsed, datetime.datetime) and settings.USE_TZ and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, datetime.timezone.utc)
+    return parsed
+
+
+class _TransferEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder without its millisecond rounding of datetimes."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def _line(record):
+    return json.dumps(record, cls=_TransferEncoder, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def _rows(queryset, fields, batch_size):
+    """Yield ``fields`` of each row as a dict without instantiating models."""
+    for values in queryset.values_list(*fields).iterator(chunk_size=batch_size):
+        yield dict(zip(fields, values))
+
+
+def export_board(board_id, batch_size=None):
+    """Yield a board as NDJSON lines: board, users, members, tasks, comments.
+
+    Every record carries a ``type``; ids are the source instance's and only
+    serve to link records inside the stream. Users are identified by email.
+    Rows are read with ``iterator()``, so memory does not grow with the board.
+    """
+    batch_size = batch_size or settings.BOARD_TRANSFER_BATCH_SIZE
+    board = Board.objects.get(pk=board_id)
+    yield _line({
+        "type": "board",
+        "version": FORMAT_VERSION,
+        "name": board.name,
+        "description": board.description,
+        "owner": board.owner_id,
+        "created_at": board.created_at,
+    })
+    memberships = Board.members.through.objects.filter(board_id=board_id)
+    tasks = Task.objects.filter(board_id=board_id)
+    comments = Comment.objects.filter(task__board_id=board_id)
+    users = User.objects.filter(
+        Q(pk=board.owner_id)
+        | Q(pk__in=memberships.values("user_id"))
+        | Q(pk__in=tasks.values("assignee_id"))
+        | Q(pk__in=tasks.values("reviewer_id"))
+        | Q(pk__in=comments.values("author_id"))
+    ).order_by("pk")
+    for user in _rows(users, USER_FIELDS, batch_size):
+        yield _line({"type": "user", **user})
+    for user_id in memberships.order_by("user_id").values_list("user_id", flat=True).iterator(chunk_size=batch_size):
+        yield _line({"type": "member", "user": user_id})
+    for task in _rows(tasks.order_by("pk"), TASK_FIELDS, batch_size):
+        task["assignee"] = task.pop("assignee_id")
+        task["reviewer"] = task.pop("reviewer_id")
+        yield _line({"type": "task", **task})
+    for comment in _rows(comments.order_by("pk"), COMMENT_FIELDS, batch_size):
+        comment["task"] = comment.pop("task_id")
+        comment["author"] = comment.pop("author_id")
+        yield _line({"type": "comment", **comment})
+
+
+class BoardImporter:
+    """Load an ``export_board`` stream into a new board in one transaction.
+
+    Records are consumed one by one and written with ``bulk_create`` every
+    ``batch_size`` rows; only the source-to-new id maps of users and tasks
+    are kept in memory. Users are matched by email, ignoring case (as
+    registration does); every exported user needs one. Unknown users are
+    created (without a usable password) when ``create_users`` is set and
+    rejected otherwise. ``owner`` overrides the exported owner. Choice and
+    date fields are validated; a bad value raises ``TransferError`` naming
+    its line.
+    """
+
+    def __init__(self, owner=None, create_users=False, batch_size=None, progress=None):
+        self.owner = owner
+        self.create_users = create_users
+        self.batch_size = batch_size or settings.BOARD_TRANSFER_BATCH_SIZE
+        self.progress = progress
+        self.board = None
+        self.counts = {"members": 0, "tasks": 0, "comments": 0}
+        self._board_record = None
+        self._users = {}
+        self._user_ids = {}
+        self._task_ids = {}
+        self._kind = None
+        self._pending = []
+        self._unranked = False
+
+    def load(self, lines):
+        """Import every line of ``lines`` and return the created board."""
+        with transaction.atomic():
+            for number, line in enumerate(lines, start=1):
+                if isinstance(line, bytes):
+                    line = line.decode()
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as exc:
+                    raise TransferError(f"Line {number}: invalid JSON ({exc}).") from exc
+                if not isinstance(record, dict):
+                    raise TransferError(f"Line {number}: expected a JSON object.")
+                try:
+                    self._handle(record, number)
+                except KeyError as exc:
+                    raise TransferError(f"Line {number}: missing field {exc}.") from exc
+            if self._board_record is None:
+                raise TransferError("The stream contains no board record.")
+            self._flush()
+            self._create_board()
+        if self._unranked:
+            transaction.on_commit(lambda: rank_worker.submit(rebalance_board, self.board.pk))
+        return self.board
+
+    def _handle(self, record, number):
+        kind = record.get("type")
+        if kind == "board":
+            if self._board_record is not None:
+                raise TransferError(f"Line {number}: only one board per stream is supported.")
+            if record.get("version") != FORMAT_VERSION:
+                raise TransferError(f"Line {number}: unsupported format version {record.get('version')!r}.")
+            record["created_at"] = _parsed(record, "created_at", parse_datetime, number)
+            self._board_record = record
+            return
+        if self._board_record is None:
+            raise TransferError(f"Line {number}: the board record must come first.")
+        if kind == "user":
+            if self.board is not None:
+                raise TransferError(f"Line {number}: users must precede members, tasks and comments.")
+            if not str(record.get("email") or "").strip():
+                raise TransferError(f"Line {number}: user {record['id']!r} has no email.")
+            self._users[record["id"]] = record
+            return
+        if kind not in ("member", "task", "comment"):
+            raise TransferError(f"Line {number}: unknown record type {kind!r}.")
+        self._create_board()
+        if kind != self._kind:
+            self._flush()
+            self._kind = kind
+        self._pending.append(getattr(self, f"_build_{kind}")(record, number))
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+
+    def _user(self, source_id, number, required=False):
+        if source_id is None and not required:
+            return None
+        try:
+            return self._user_ids[source_id]
+        except KeyError:
+            raise TransferError(f"Line {number}: unknown user {source_id!r}.") from None
+
+    def _resolve_users(self):
+        """Map exported users onto local ones by email (case-insensitive), creating them if allowed."""
+        by_email = {record["email"].strip().lower(): record for record in self._users.values()}
+        matches = (
+            User.objects.annotate(email_lower=Lower("email"))
+            .filter(email_lower__in=list(by_email))
+            .order_by("pk")
+            .values_list("email_lower", "pk")
+        )
+        existing = {}
+        for email, pk in matches:
+            existing.setdefault(email, pk)
+        missing = [email for email in by_email if email not in existing]
+        if missing and not self.create_users:
+            raise TransferError(f"Unknown users: {', '.join(sorted(missing))}.")
+        usernames = {email: User.normalize_username(by_email[email]["email"].strip()) for email in missing}
+        taken = set(User.objects.filter(username__in=usernames.values()).values_list("username", flat=True))
+        if taken:
+            raise TransferError(f"Cannot create users, username already taken: {', '.join(sorted(taken))}.")
+        for email in missing:
+            record = by_email[email]
+            user = User(
+                username=usernames[email],
+                email=record["email"].strip(),
+                first_name=record.get("first_name", ""),
+                last_name=record.get("last_name", ""),
+            )
+            user.set_unusable_password()
+            user.save()
+            existing[email] = user.pk
+        self._user_ids = {
+            source_id: existing[record["email"].strip().lower()] for source_id, record in self._users.items()
+        }
+
+    def _create_board(self):
+        if self.board is not None:
+            return
+        self._resolve_users()
+        record = self._board_record
+        owner_id = self.owner.pk if self.owner is not None else self._user(record.get("owner"), 1, required=True)
+        self.board = Board.objects.create(
+            name=record["name"],
+            description=record.get("description", ""),
+            owner_id=owner_id,
+        )
+        Board.objects.filter(pk=self.board.pk).update(created_at=record.get("created_at") or self.board.created_at)
+        self.board.add_members([owner_id])
+
+    def _build_member(self, record, number):
+        return Board.members.through(board_id=self.board.pk, user_id=self._user(record["user"], number, required=True))
+
+    def _build_task(self, record, number):
+        task = Task(
+            board_id=self.board.pk,
+            title=record["title"],
+            description=record.get("description", ""),
+            priority=_choice(record, "priority", Task.Priority, Task.Priority.MEDIUM, number),
+            status=_choice(record, "status", Task.Status, Task.Status.TODO, number),
+            assignee_id=self._user(record.get("assignee"), number),
+            reviewer_id=self._user(record.get("reviewer"), number),
+            due_date=_parsed(record, "due_date", parse_date, number),
+            rank=record.get("rank", ""),
+            created_at=_parsed(record, "created_at", parse_datetime, number) or timezone.now(),
+        )
+        self._unranked = self._unranked or not task.rank
+        task._source_id = record["id"]
+        return task
+
+    def _build_comment(self, record, number):
+        try:
+            task_id = self._task_ids[record["task"]]
+        except KeyError:
+            raise TransferError(f"Line {number}: comment refers to unknown task {record['task']!r}.") from None
+        return Comment(
+            task_id=task_id,
+            author_id=self._user(record["author"], number, required=True),
+            content=record["content"],
+            created_at=_parsed(record, "created_at", parse_datetime, number) or timezone.now(),
+        )
+
+    def _flush(self):
+        """Write the pending batch of the current record type."""
+        rows, self._pending = self._pending, []
+        if not rows:
+            return
+        if self._kind == "member":
+            Board.members.through.objects.bulk_create(rows, ignore_conflicts=True)
+            touch_memberships(row.user_id for row in rows)
+            stage = "members"
+        elif self._kind == "task":
+            self._insert_tasks(rows)
+            self._task_ids.update((task._source_id, task.pk) for task in rows)
+            stage = "tasks"
+        else:
+            Comment.objects.bulk_create(rows)
+            stage = "comments"
+        self.counts[stage] += len(rows)
+        if self.progress:
+            self.progress(stage, self.counts[stage])
+
+    def _insert_tasks(self, tasks):
+        """Bulk insert ``tasks``; their new ids are needed to remap comments."""
+        if connection.features.can_return_rows_from_bulk_insert:
+            Task.objects.bulk_create(tasks)
+            return
+        for task in tasks:
+            task.save(force_insert=True)
+
+
+def import_board(lines, owner=None, create_users=False, batch_size=None, progress=None):
+    """Import an ``export_board`` stream; returns the new board."""
+    importer = BoardImporter(owner=owner, create_users=create_users, batch_size=batch_size, progress=progress)
+    return importer.load(lines)
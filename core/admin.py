@@ -0,0 +1,54 @@
+from django.contrib.admin.utils import get_fields_from_path, lookup_spawns_duplicates
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.db.models import Q
+from django.utils.text import smart_split, unescape_string_literal
+
+
+def _prefix_range(path, prefix):
+    """``path`` starts with ``prefix`` as a range a B-tree index can answer."""
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return Q(**{f"{path}__gte": prefix, f"{path}__lt": upper})
+
+
+class IndexedSearchMixin:
+    """Admin search that only uses lookups plain indexes can serve.
+
+    Django turns ``=field`` into ``iexact`` and ``^field`` into
+    ``istartswith``, neither of which uses an ordinary index (``iexact`` on
+    an integer even casts the column to text). Here ``=field`` is an exact
+    match on the value converted to the field's type (terms that are not
+    valid values skip that field) and ``^field`` a case-sensitive prefix
+    match written as a ``>= / <`` range. Only these two kinds of search
+    fields are supported; each needs an index on its column.
+    """
+
+    def get_search_results(self, request, queryset, search_term):
+        search_fields = self.get_search_fields(request)
+        if not search_fields or not search_term:
+            return queryset, False
+        fields = []
+        for name in search_fields:
+            if name[0] not in "=^":
+                raise ImproperlyConfigured(
+                    f"{type(self).__name__} only supports '=' and '^' search fields, not {name!r}."
+                )
+            path = name[1:]
+            fields.append((name[0], path, get_fields_from_path(self.model, path)[-1]))
+        for bit in smart_split(search_term):
+            if bit.startswith(('"', "'")) and bit[0] == bit[-1]:
+                bit = unescape_string_literal(bit)
+            if not bit:
+                continue
+            condition = Q()
+            for kind, path, field in fields:
+                if kind == "^":
+                    condition |= _prefix_range(path, bit)
+                    continue
+                try:
+                    condition |= Q(**{path: field.to_python(bit)})
+                except ValidationError:
+                    continue
+            if not condition:
+                return queryset.none(), False
+            queryset = queryset.filter(condition)
+        return queryset, any(lookup_spawns_duplicates(self.opts, path) for _, path, _ in fields)
@@ -0,0 +1,124 @@
+import math
+import threading
+import time
+from collections import Counter
+
+
+class AdmissionStats:
+    """Thread-safe counters describing what admission control admitted or shed."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = Counter()
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self._counts[name] += amount
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counts)
+
+
+class ConcurrencyGate:
+    """Global concurrency limit with a bounded wait queue.
+
+    At most ``max_concurrent`` requests run at once and at most
+    ``max_queue`` wait for a slot, each for no longer than ``timeout``
+    seconds. Everything else is rejected straight away.
+    """
+
+    def __init__(self, max_concurrent, max_queue, timeout):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.waiting = 0
+
+    def try_enter(self):
+        """Take a slot without waiting; returns True on success."""
+        if not self._slots.acquire(blocking=False):
+            return False
+        with self._lock:
+            self.in_flight += 1
+        return True
+
+    def can_queue(self):
+        """Reserve a place in the wait queue if there is room."""
+        with self._lock:
+            if self.waiting >= self.max_queue:
+                return False
+            self.waiting += 1
+            return True
+
+    def wait(self):
+        """Wait in the queue (after ``can_queue``) for up to ``timeout`` seconds."""
+        try:
+            acquired = self._slots.acquire(timeout=self.timeout)
+        finally:
+            with self._lock:
+                self.waiting -= 1
+        if acquired:
+            with self._lock:
+                self.in_flight += 1
+        return acquired
+
+    def leave(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+
+class SlidingWindowLimiter:
+    """Per-key request budget over a sliding window.
+
+    Uses the two-bucket approximation: the previous fixed window's count is
+    weighted by how much of it still overlaps the sliding window, so each key
+    costs three numbers regardless of its request rate. Keys idle for two
+    windows are pruned, and at most ``max_keys`` are kept: a new key beyond
+    that evicts the longest-tracked one.
+    """
+
+    def __init__(self, limit, window, max_keys=100000):
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._last_prune = None
+
+    def hit(self, key, now=None):
+        """Count one request for ``key``; return 0 or the seconds until retry."""
+        now = time.monotonic() if now is None else now
+        index = int(now // self.window)
+        window_end = (index + 1) * self.window
+        with self._lock:
+            self._prune(index)
+            if key not in self._buckets and len(self._buckets) >= self.max_keys:
+                del self._buckets[next(iter(self._buckets))]
+            bucket, current, previous = self._buckets.get(key, (index, 0, 0))
+            if bucket != index:
+                previous = current if bucket == index - 1 else 0
+                current, bucket = 0, index
+            overlap = (window_end - now) / self.window
+            if previous * overlap + current + 1 > self.limit:
+                self._buckets[key] = (bucket, current, previous)
+                if current + 1 > self.limit:
+                    return max(1, math.ceil(window_end - now))
+                # Wait until the previous window's weight has decayed enough.
+                allowed_overlap = (self.limit - current - 1) / previous
+                return max(1, math.ceil((overlap - allowed_overlap) * self.window))
+            self._buckets[key] = (bucket, current + 1, previous)
+            return 0
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def _prune(self, index):
+        if index == self._last_prune:
+            return
+        self._last_prune = index
+        for key in [key for key, (bucket, _, _) in self._buckets.items() if bucket < index - 1]:
+            del self._buckets[key]
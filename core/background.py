@@ -0,0 +1,52 @@
+import logging
+import queue
+import threading
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundWorker:
+    """Single daemon thread that runs queued jobs one after another.
+
+    The thread is started lazily on the first submitted job, so importing a
+    module that owns a worker has no side effects. Database connections
+    opened by a job are closed once it finishes.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue ``fn(*args, **kwargs)`` to run on the worker thread."""
+        self._ensure_started()
+        self._queue.put((fn, args, kwargs))
+
+    def pending(self):
+        """Approximate number of jobs waiting to run."""
+        return self._queue.qsize()
+
+    def join(self):
+        """Block until every queued job has finished."""
+        self._queue.join()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            fn, args, kwargs = self._queue.get()
+            try:
+                fn(*args, **kwargs)
+            except Exception:
+                logger.exception("Background job %r failed on %s.", fn, self.name)
+            finally:
+                connections.close_all()
+                self._queue.task_done()
@@ -0,0 +1,185 @@
+import io
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.urls import Resolver404, resolve
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.metrics import registry
+from core.middleware import charge_rate_limit, get_gate, rate_limit_key
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+# Copied from the batch request so sub-requests build the same absolute URLs.
+FORWARDED_META = ("SERVER_NAME", "SERVER_PORT", "SERVER_PROTOCOL", "REMOTE_ADDR", "HTTP_HOST", "HTTP_USER_AGENT")
+
+subrequests = registry.counter(
+    "batch_subrequests_total", "Sub-requests run through POST /api/batch/.", ("view", "status")
+)
+
+
+class SubRequestSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=["GET", "HEAD", "OPTIONS", "POST", "PUT", "PATCH", "DELETE"])
+    path = serializers.CharField()
+    body = serializers.JSONField(required=False, allow_null=True)
+    headers = serializers.DictField(child=serializers.CharField(), required=False)
+
+    def validate_path(self, value):
+        """Only API routes, and never the batch endpoint itself."""
+        path = urlsplit(value).path
+        if not path.startswith("/api/") or path.rstrip("/") == "/api/batch":
+            raise serializers.ValidationError("Must be an /api/ path other than /api/batch/.")
+        return value
+
+
+class BatchSerializer(serializers.Serializer):
+    requests = SubRequestSerializer(many=True, allow_empty=False)
+    parallel = serializers.BooleanField(default=False)
+
+    def validate_requests(self, value):
+        if len(value) > settings.BATCH_MAX_REQUESTS:
+            raise serializers.ValidationError(f"At most {settings.BATCH_MAX_REQUESTS} requests per batch.")
+        return value
+
+    def validate(self, attrs):
+        """Parallel execution is only allowed when no sub-request writes."""
+        if attrs["parallel"] and any(item["method"] not in SAFE_METHODS for item in attrs["requests"]):
+            raise serializers.ValidationError(
+                {"parallel": ["Only batches of GET/HEAD/OPTIONS requests run in parallel."]}
+            )
+        return attrs
+
+
+def _build_request(parent, item):
+    """A WSGIRequest for ``item`` that inherits the parent's host and client."""
+    url = urlsplit(item["path"])
+    body = b"" if item.get("body") is None else json.dumps(item["body"]).encode()
+    environ = {key: parent.META[key] for key in FORWARDED_META if key in parent.META}
+    environ.update({
+        "REQUEST_METHOD": item["method"],
+        "PATH_INFO": url.path,
+        "QUERY_STRING": url.query,
+        "CONTENT_TYPE": "application/json",
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.url_scheme": parent.scheme,
+    })
+    for name, value in item.get("headers", {}).items():
+        environ["HTTP_" + name.upper().replace("-", "_")] = value
+    return WSGIRequest(environ)
+
+
+def _payload(response):
+    """Response data without a render/parse round trip for DRF responses."""
+    if isinstance(response, Response) and not response.streaming:
+        return response.data
+    content = b"".join(response.streaming_content) if response.streaming else response.content
+    if response.get("Content-Type", "").startswith("application/json"):
+        return json.loads(content or b"null")
+    return content.decode(response.charset or "utf-8")
+
+
+def _rate_limited(parent, item):
+    """A 429 result if the sub-request is over the client's read/write budget."""
+    if not settings.ADMISSION_CONTROL_ENABLED:
+        return None
+    key = getattr(parent, "rate_limit_key", None) or rate_limit_key(parent)
+    retry_after = charge_rate_limit(key, item["method"])
+    if not retry_after:
+        return None
+    subrequests.inc(view="rate_limited", status=429)
+    return {"status": 429, "headers": {"Retry-After": str(retry_after)}, "body": {"detail": "Request rate limit exceeded."}}
+
+
+def run_subrequest(parent, user, token, item):
+    """Dispatch one sub-request to its view as ``user`` (no authentication).
+
+    Sub-requests skip the middleware stack, so each one is charged to the
+    client's read or write rate limit here, exactly like a separate call.
+    """
+    limited = _rate_limited(parent, item)
+    if limited is not None:
+        return limited
+    request = _build_request(parent, item)
+    try:
+        match = resolve(request.path_info)
+    except Resolver404:
+        subrequests.inc(view="unresolved", status=404)
+        return {"status": 404, "headers": {}, "body": {"detail": "Not found."}}
+    view_class = getattr(match.func, "cls", None)
+    if view_class is None or not issubclass(view_class, APIView):
+        subrequests.inc(view=match.view_name, status=404)
+        return {"status": 404, "headers": {}, "body": {"detail": "Not found."}}
+    request.resolver_match = match
+    request.user = user
+    request._force_auth_user = user
+    request._force_auth_token = token
+    try:
+        response = match.func(request, *match.args, **match.kwargs)
+        body = _payload(response)
+    except Exception:
+        logger.exception("Batch sub-request %s %s failed.", item["method"], item["path"])
+        subrequests.inc(view=match.view_name, status=500)
+        return {"status": 500, "headers": {}, "body": {"detail": "Internal server error."}}
+    subrequests.inc(view=match.view_name, status=response.status_code)
+    headers = {name: value for name, value in response.items() if name.lower() not in ("content-type", "vary", "allow")}
+    return {"status": response.status_code, "headers": headers, "body": body}
+
+
+def _run_slice(parent, user, token, items):
+    try:
+        return [run_subrequest(parent, user, token, item) for item in items]
+    finally:
+        connections.close_all()
+
+
+def _take_slots(wanted):
+    """Take up to ``wanted`` extra admission slots without waiting; returns how many."""
+    if not settings.ADMISSION_CONTROL_ENABLED:
+        return wanted
+    gate = get_gate()
+    taken = 0
+    while taken < wanted and gate.try_enter():
+        taken += 1
+    return taken
+
+
+def _release_slots(taken):
+    if settings.ADMISSION_CONTROL_ENABLED:
+        gate = get_gate()
+        for _ in range(taken):
+            gate.leave()
+
+
+def run_batch(parent, user, token, items, parallel=False):
+    """Run ``items`` and return their results in order.
+
+    With ``parallel`` the items are spread round-robin over up to
+    BATCH_MAX_WORKERS threads. Every thread beyond the request's own needs
+    a free admission-control slot (taken without waiting), so a parallel
+    batch never runs more concurrent work than the gate allows. Each thread
+    opens one database connection and closes it when its share is done.
+    """
+    if not parallel or len(items) == 1:
+        return [run_subrequest(parent, user, token, item) for item in items]
+    extra = _take_slots(min(settings.BATCH_MAX_WORKERS, len(items)) - 1)
+    try:
+        if not extra:
+            return [run_subrequest(parent, user, token, item) for item in items]
+        workers = extra + 1
+        results = [None] * len(items)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_run_slice, parent, user, token, items[index::workers]) for index in range(workers)]
+            for index, future in enumerate(futures):
+                results[index::workers] = future.result()
+        return results
+    finally:
+        _release_slots(extra)
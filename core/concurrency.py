@@ -0,0 +1,97 @@
+from django.db.models import F
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = {"errors": ["The resource was changed by someone else. Reload it and try again."]}
+    default_code = "precondition_failed"
+
+
+def etag_for(instance, weak=False):
+    """ETag of a versioned row (the URL already identifies the row).
+
+    Pass ``weak`` when the representation embeds data that changes without
+    a version bump (a board's tasks and members): the tag then only vouches
+    for the row's own fields.
+    """
+    tag = f'"{instance.version}"'
+    return f"W/{tag}" if weak else tag
+
+
+def set_etag(response, instance, weak=False):
+    """Attach the current ETag of ``instance`` to ``response``."""
+    response["ETag"] = etag_for(instance, weak)
+    return response
+
+
+def _parse_if_match(header):
+    tags = set()
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag:
+            tags.add(tag if tag == "*" or tag.startswith('"') else f'"{tag}"')
+    return tags
+
+
+def check_if_match(request, instance):
+    """Raise PreconditionFailed unless ``If-Match`` (when sent) names the loaded version.
+
+    Without the header the update still only applies to the version that
+    was loaded (see ``save_versioned``), so concurrent writers never
+    silently overwrite each other.
+
+    Weak tags are compared by their opaque part, since they are only ever
+    handed out for the row's own fields, which is what updates write.
+    """
+    header = request.headers.get("If-Match")
+    if header is None:
+        return
+    tags = _parse_if_match(header)
+    if "*" not in tags and etag_for(instance) not in tags:
+        raise PreconditionFailed()
+
+
+def update_versioned(instance, **values):
+    """``UPDATE ... SET version = version + 1 WHERE pk = ... AND version = <loaded>``.
+
+    Raises PreconditionFailed when the row changed since it was loaded;
+    otherwise ``instance.version`` is advanced to match the row.
+    """
+    model = type(instance)
+    updated = model._base_manager.filter(pk=instance.pk, version=instance.version).update(
+        version=F("version") + 1, **values
+    )
+    if not updated:
+        raise PreconditionFailed()
+    instance.version += 1
+
+
+def bump_version(queryset, **values):
+    """Unconditional ``UPDATE ... SET version = version + 1`` (plus ``values``).
+
+    For writes that do not go through a loaded instance (soft deletes,
+    membership changes), so a save based on an older load gets 412.
+    """
+    return queryset.update(version=F("version") + 1, **values)
+
+
+def save_versioned(instance, update_fields):
+    """Save ``update_fields`` of ``instance`` through ``update_versioned``.
+
+    Stands in for ``instance.save(update_fields=...)`` on existing rows:
+    columns the caller did not change (rank, deleted_at, owner, ...) are
+    left alone, so they cannot be reset to what was loaded. ``auto_now``
+    fields are refreshed as ``save()`` would.
+    """
+    values = {}
+    names = set(update_fields)
+    for field in instance._meta.concrete_fields:
+        if field.primary_key or field.name == "version":
+            continue
+        if field.name in names or getattr(field, "auto_now", False):
+            values[field.attname] = field.pre_save(instance, False)
+    update_versioned(instance, **values)
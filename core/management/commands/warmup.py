@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.warmup import local_apps, profile_imports, warm_up
+
+
+class Command(BaseCommand):
+    help = "Prime a worker's URL, DRF and database setup and report how long each step took."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--max-ms", type=float, help="Fail if the warm-up takes longer than this many milliseconds."
+        )
+        parser.add_argument(
+            "--imports", action="store_true", help="Also report cold import time per module of the project's apps."
+        )
+        parser.add_argument("--top", type=int, default=20, help="Modules listed with --imports.")
+
+    def handle(self, *args, **options):
+        if options["imports"]:
+            self.stdout.write(f"Cold import time ({', '.join(local_apps())}):")
+            self.stdout.write(f"  {'self ms':>8} {'total ms':>9}  module")
+            for module, self_us, cumulative_us in profile_imports()[: options["top"]]:
+                self.stdout.write(f"  {self_us / 1000:8.1f} {cumulative_us / 1000:9.1f}  {module}")
+
+        def report(step, seconds):
+            self.stdout.write(f"  {step}: {seconds * 1000:.1f} ms")
+
+        self.stdout.write("Warm-up:")
+        total_ms = sum(warm_up(report=report).values()) * 1000
+        if options["max_ms"] is not None and total_ms > options["max_ms"]:
+            raise CommandError(f"Warm-up took {total_ms:.1f} ms, more than the allowed {options['max_ms']:.1f} ms.")
+        self.stdout.write(self.style.SUCCESS(f"Warm-up finished in {total_ms:.1f} ms."))
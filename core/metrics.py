@@ -0,0 +1,259 @@
+import atexit
+import json
+import logging
+import math
+import os
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Metric:
+    """A named family of samples, one per combination of label values.
+
+    All updates take the metric's lock, so metrics can be shared between
+    threads (and the event loop thread under ASGI) freely.
+    """
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}.")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def state(self):
+        """JSON-serialisable snapshot, used for rendering and multi-process files."""
+        with self._lock:
+            values = [[list(key), value] for key, value in self._values.items()]
+        return {"kind": self.kind, "help": self.documentation, "labelnames": list(self.labelnames), "values": values}
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    """Cumulative-bucket histogram; each sample is ``[*bucket_counts, sum, count]``."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            sample = self._values.get(key)
+            if sample is None:
+                sample = self._values[key] = [0] * (len(self.buckets) + 2)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    sample[index] += 1
+            sample[-2] += value
+            sample[-1] += 1
+
+    def state(self):
+        state = super().state()
+        state["buckets"] = list(self.buckets)
+        state["values"] = [[key, list(sample)] for key, sample in state["values"]]
+        return state
+
+
+class MetricsRegistry:
+    """Process-wide set of metrics, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}.")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets)
+
+    def state(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.state() for metric in metrics}
+
+
+def merge_states(states):
+    """Add up several registry states (counters, gauges and histograms alike)."""
+    merged = {}
+    for state in states:
+        for name, metric in state.items():
+            target = merged.setdefault(name, {**metric, "values": {}})
+            for key, value in metric["values"]:
+                key = tuple(key)
+                current = target["values"].get(key)
+                if current is None:
+                    target["values"][key] = list(value) if isinstance(value, list) else value
+                elif isinstance(value, list):
+                    target["values"][key] = [a + b for a, b in zip(current, value)]
+                else:
+                    target["values"][key] = current + value
+    for metric in merged.values():
+        metric["values"] = [[list(key), value] for key, value in metric["values"].items()]
+    return merged
+
+
+def render(state):
+    """Prometheus text exposition (format 0.0.4) of a registry state."""
+    lines = []
+    for name in sorted(state):
+        metric = state[name]
+        lines.append(f"# HELP {name} {_escape(metric['help'])}")
+        lines.append(f"# TYPE {name} {metric['kind']}")
+        labelnames = metric["labelnames"]
+        for key, value in sorted(metric["values"]):
+            if metric["kind"] != "histogram":
+                lines.append(f"{name}{_labels(labelnames, key)} {_format_value(value)}")
+                continue
+            for bound, count in zip([*metric["buckets"], math.inf], value[:-2] + [value[-1]]):
+                labels = _labels(labelnames, key, [("le", _format_value(bound))])
+                lines.append(f"{name}_bucket{labels} {_format_value(count)}")
+            lines.append(f"{name}_sum{_labels(labelnames, key)} {_format_value(value[-2])}")
+            lines.append(f"{name}_count{_labels(labelnames, key)} {_format_value(value[-1])}")
+    return "\n".join(lines) + "\n"
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MultiProcessExporter:
+    """Share a registry with sibling worker processes through a directory.
+
+    Every process rewrites ``metrics-<pid>.json`` every ``interval`` seconds
+    and at exit; any process can then serve the sum of all files. Files of
+    exited workers keep contributing their counters and histograms, but
+    their gauges (e.g. in-flight requests) are ignored.
+    """
+
+    def __init__(self, registry, directory, interval):
+        self.registry = registry
+        self.directory = Path(directory)
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def path(self):
+        return self.directory / f"metrics-{os.getpid()}.json"
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._thread = threading.Thread(target=self._loop, name="metrics-export", daemon=True)
+        self._thread.start()
+        atexit.register(self.write)
+
+    def write(self):
+        """Atomically replace this process's file with the current state."""
+        path = self.path
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(json.dumps({"pid": os.getpid(), "metrics": self.registry.state()}))
+        os.replace(temporary, path)
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except OSError:
+                logger.exception("Writing metrics to %s failed.", self.directory)
+
+    def collect(self):
+        """State summed over all processes, with this process's live values."""
+        own_pid = os.getpid()
+        states = [self.registry.state()]
+        for path in self.directory.glob("metrics-*.json"):
+            try:
+                data = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            if data.get("pid") == own_pid:
+                continue
+            metrics = data.get("metrics", {})
+            if not _pid_alive(data.get("pid", 0)):
+                metrics = {name: metric for name, metric in metrics.items() if metric["kind"] != "gauge"}
+            states.append(metrics)
+        return merge_states(states)
+
+
+registry = MetricsRegistry()
+
+# Shared by every cache layer (user summaries, dashboard, ...), labelled by layer.
+cache_requests = registry.counter("cache_requests_total", "Cache lookups by cache layer and result.", ("cache", "result"))
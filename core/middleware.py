@@ -0,0 +1,468 @@
+import asyncio
+import threading
+import time
+from contextvars import ContextVar
+from functools import partial
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.core.signals import setting_changed
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import JsonResponse
+from rest_framework.authtoken.models import Token
+
+from core.admission import AdmissionStats, ConcurrencyGate, SlidingWindowLimiter
+from core.metrics import MultiProcessExporter, registry
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+KNOWN_METHODS = ("GET", "HEAD", "OPTIONS", "POST", "PUT", "PATCH", "DELETE")
+
+admission_stats = AdmissionStats()
+admission_events = registry.counter(
+    "admission_events_total", "Requests admitted, shed or rate limited by admission control.", ("event",)
+)
+_gate = None
+_limiters = None
+
+
+def get_gate():
+    """Process-wide concurrency gate built from the ADMISSION_* settings."""
+    global _gate
+    if _gate is None:
+        _gate = ConcurrencyGate(
+            max_concurrent=settings.ADMISSION_MAX_CONCURRENT,
+            max_queue=settings.ADMISSION_QUEUE_DEPTH,
+            timeout=settings.ADMISSION_QUEUE_TIMEOUT,
+        )
+    return _gate
+
+
+@receiver(setting_changed)
+def _reset_admission(setting, **kwargs):
+    """Rebuild the gate and limiters when their settings change (tests)."""
+    global _gate, _limiters
+    if setting.startswith(("ADMISSION_", "RATE_LIMIT_")):
+        _gate = _limiters = None
+
+
+def get_limiters():
+    """Read and write rate limiters built from the RATE_LIMIT_* settings."""
+    global _limiters
+    if _limiters is None:
+        _limiters = {
+            "read": SlidingWindowLimiter(*settings.RATE_LIMIT_READS, max_keys=settings.RATE_LIMIT_MAX_KEYS),
+            "write": SlidingWindowLimiter(*settings.RATE_LIMIT_WRITES, max_keys=settings.RATE_LIMIT_MAX_KEYS),
+        }
+    return _limiters
+
+
+def _token_key(request):
+    """The ``Authorization: Token <key>`` value, not yet validated."""
+    parts = request.META.get("HTTP_AUTHORIZATION", "").split()
+    if len(parts) == 2 and parts[0].lower() == "token":
+        return parts[1]
+    return None
+
+
+class TokenUserCache:
+    """Bounded map of valid token keys to user ids, each kept for ``ttl`` seconds.
+
+    Unknown keys are never stored, so random tokens cannot fill it.
+    """
+
+    def __init__(self, size, ttl):
+        self.size = size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, key):
+        """Cached user id of ``key``; None when unknown or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry[1] < time.monotonic():
+            return None
+        return entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def load(self, key):
+        """Look ``key`` up (one indexed query), caching it when valid."""
+        user_id = (
+            Token.objects.filter(key=key, user__is_active=True).values_list("user_id", flat=True).first()
+        )
+        if user_id is not None:
+            with self._lock:
+                if len(self._entries) >= self.size:
+                    del self._entries[next(iter(self._entries))]
+                self._entries[key] = (user_id, time.monotonic() + self.ttl)
+        return user_id
+
+
+token_users = TokenUserCache(size=10000, ttl=60)
+
+
+def client_address(request):
+    """Address of the client, as reported by the last trusted proxy.
+
+    With RATE_LIMIT_TRUSTED_PROXIES = n > 0 the client is the n-th entry
+    from the right of RATE_LIMIT_FORWARDED_HEADER (each proxy appends the
+    address it saw); anything further left is client-supplied. Requests
+    that did not pass through all n proxies fall back to REMOTE_ADDR.
+    """
+    proxies = settings.RATE_LIMIT_TRUSTED_PROXIES
+    if proxies:
+        header = request.META.get(settings.RATE_LIMIT_FORWARDED_HEADER, "")
+        forwarded = [part.strip() for part in header.split(",") if part.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def _client_key(request, user_id):
+    """Rate-limit key: the token's user when valid, else the client address."""
+    key = f"user:{user_id}" if user_id is not None else f"ip:{client_address(request)}"
+    request.rate_limit_key = key
+    return key
+
+
+def rate_limit_key(request):
+    """Rate-limit key of ``request``, validating its token if there is one."""
+    token = _token_key(request)
+    user_id = None
+    if token is not None:
+        user_id = token_users.get(token)
+        if user_id is None:
+            user_id = token_users.load(token)
+    return _client_key(request, user_id)
+
+
+def charge_rate_limit(key, method):
+    """Count one ``method`` request for ``key``; return 0 or the seconds until retry.
+
+    Also used by the batch endpoint to charge each of its sub-requests.
+    """
+    kind = "read" if method in SAFE_METHODS else "write"
+    retry_after = get_limiters()[kind].hit(key)
+    if retry_after:
+        admission_stats.incr(f"rate_limited_{kind}")
+        admission_events.inc(event=f"rate_limited_{kind}")
+    return retry_after
+
+
+def _reject(status_code, detail, retry_after):
+    response = JsonResponse({"detail": detail}, status=status_code)
+    response["Retry-After"] = str(retry_after)
+    return response
+
+
+def _when_sent(response, callback, totals=None):
+    """Run ``callback`` once ``response`` has been sent; returns the response.
+
+    Regular responses are complete when the middleware sees them. The body
+    of a streaming response is only produced while the server sends it,
+    so there ``callback`` runs after the last chunk, or when the response
+    is closed early (client gone). With ``totals``, each chunk is produced
+    with them as the request's query counters.
+    """
+    if not response.streaming:
+        callback()
+        return response
+    once = threading.Lock()
+
+    def finish():
+        if once.acquire(blocking=False):
+            callback()
+
+    content = response.streaming_content
+    if response.is_async:
+
+        async def stream():
+            iterator = aiter(content)
+            try:
+                while True:
+                    token = _request_queries.set(totals) if totals is not None else None
+                    try:
+                        chunk = await anext(iterator)
+                    except StopAsyncIteration:
+                        return
+                    finally:
+                        if token is not None:
+                            _request_queries.reset(token)
+                    yield chunk
+            finally:
+                finish()
+
+    else:
+
+        def stream():
+            iterator = iter(content)
+            try:
+                while True:
+                    token = _request_queries.set(totals) if totals is not None else None
+                    try:
+                        chunk = next(iterator)
+                    except StopIteration:
+                        return
+                    finally:
+                        if token is not None:
+                            _request_queries.reset(token)
+                    yield chunk
+            finally:
+                finish()
+
+    response.streaming_content = stream()
+    # A body that is never iterated still gets closed.
+    response._resource_closers.append(finish)
+    return response
+
+
+def _leave_if_admitted(gate):
+    """Done-callback handing back a slot acquired after its waiter gave up."""
+
+    def callback(future):
+        if not future.cancelled() and future.exception() is None and future.result():
+            gate.leave()
+
+    return callback
+
+
+async def _await_slot(gate):
+    """``gate.wait()`` on a worker thread, never blocking the event loop.
+
+    The thread cannot be interrupted, so when the request is cancelled
+    while queued (client disconnect, server timeout) it keeps waiting and
+    any slot it then gets is released at once instead of leaking.
+    """
+    waiter = asyncio.ensure_future(sync_to_async(gate.wait, thread_sensitive=False)())
+    try:
+        return await asyncio.shield(waiter)
+    except asyncio.CancelledError:
+        waiter.add_done_callback(_leave_if_admitted(gate))
+        raise
+
+
+class AdmissionControlMiddleware:
+    """Shed load before it reaches the views.
+
+    Requests are first checked against sliding window budgets (separate
+    for reads and writes) and get 429 when over budget. Budgets are per
+    user for valid tokens (validated once per minute through
+    ``token_users``) and per client address (see ``client_address``) for
+    everything else, including session requests. A token that is not
+    cached yet is first charged to the client address, before the query
+    validating it runs (and then to its user if valid), so a flood of
+    invalid tokens costs no more queries than the address's budget.
+    Every request then needs one of ADMISSION_MAX_CONCURRENT slots; up to
+    ADMISSION_QUEUE_DEPTH requests may wait ADMISSION_QUEUE_TIMEOUT seconds
+    for one, the rest get an immediate 503. Both carry Retry-After.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _count(self, event):
+        admission_stats.incr(event)
+        admission_events.inc(event=event)
+
+    def _rate_limited(self, request, user_id):
+        retry_after = charge_rate_limit(_client_key(request, user_id), request.method)
+        if not retry_after:
+            return None
+        return _reject(429, "Request rate limit exceeded.", retry_after)
+
+    def _shed(self, reason):
+        self._count(f"shed_{reason}")
+        return _reject(503, "Server is busy. Please retry shortly.", settings.ADMISSION_RETRY_AFTER)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.ADMISSION_CONTROL_ENABLED:
+            return self.get_response(request)
+        token = _token_key(request)
+        user_id = token_users.get(token) if token is not None else None
+        limited = self._rate_limited(request, user_id)
+        if limited is None and token is not None and user_id is None:
+            user_id = token_users.load(token)
+            if user_id is not None:
+                limited = self._rate_limited(request, user_id)
+        if limited is not None:
+            return limited
+        gate = get_gate()
+        if not gate.try_enter():
+            if not gate.can_queue():
+                return self._shed("queue_full")
+            if not gate.wait():
+                return self._shed("timeout")
+        self._count("admitted")
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            gate.leave()
+            raise
+        # A streamed body is still being produced: keep the slot until it is sent.
+        return _when_sent(response, gate.leave)
+
+    async def __acall__(self, request):
+        if not settings.ADMISSION_CONTROL_ENABLED:
+            return await self.get_response(request)
+        token = _token_key(request)
+        user_id = token_users.get(token) if token is not None else None
+        limited = self._rate_limited(request, user_id)
+        if limited is None and token is not None and user_id is None:
+            user_id = await sync_to_async(token_users.load, thread_sensitive=True)(token)
+            if user_id is not None:
+                limited = self._rate_limited(request, user_id)
+        if limited is not None:
+            return limited
+        gate = get_gate()
+        if not gate.try_enter():
+            if not gate.can_queue():
+                return self._shed("queue_full")
+            if not await _await_slot(gate):
+                return self._shed("timeout")
+        self._count("admitted")
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            gate.leave()
+            raise
+        return _when_sent(response, gate.leave)
+
+
+def admission_snapshot():
+    """Counters plus current gate occupancy, for the stats endpoint."""
+    gate = get_gate()
+    return {**admission_stats.snapshot(), "in_flight": gate.in_flight, "waiting": gate.waiting}
+
+
+request_duration = registry.histogram(
+    "http_request_duration_seconds", "Time spent producing the response, by URL name.", ("route", "method")
+)
+requests_total = registry.counter("http_requests_total", "Responses by URL name and status code.", ("route", "method", "status"))
+requests_in_flight = registry.gauge("http_requests_in_flight", "Requests currently being handled.")
+db_queries = registry.histogram(
+    "db_queries_per_request", "Database queries run per request.", ("route",),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+db_time = registry.histogram("db_query_seconds_per_request", "Total database time per request.", ("route",))
+
+_request_queries = ContextVar("request_queries", default=None)
+_exporter = None
+
+
+def _count_queries(execute, sql, params, many, context):
+    """Execute wrapper adding each query to the current request's totals."""
+    totals = _request_queries.get()
+    if totals is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        totals[0] += 1
+        totals[1] += time.perf_counter() - started
+
+
+def _install_query_counter(sender, connection, **kwargs):
+    # First in line, so execute_wrapper() blocks that pop() theirs are unaffected.
+    if _count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _count_queries)
+
+
+connection_created.connect(_install_query_counter)
+
+
+def get_exporter():
+    """Multi-process exporter for METRICS_MULTIPROC_DIR, or None when unset."""
+    global _exporter
+    if _exporter is None and settings.METRICS_MULTIPROC_DIR:
+        _exporter = MultiProcessExporter(registry, settings.METRICS_MULTIPROC_DIR, settings.METRICS_EXPORT_INTERVAL)
+    return _exporter
+
+
+def metrics_state():
+    """Current metrics, summed across worker processes when configured."""
+    exporter = get_exporter()
+    return exporter.collect() if exporter is not None else registry.state()
+
+
+class MetricsMiddleware:
+    """Record latency, status, in-flight and DB usage of every request.
+
+    Requests are labelled by URL name (``view_name``, so namespaced for the
+    admin); unresolved requests, including ones shed by admission control,
+    are labelled ``unresolved``. Queries are counted by a connection-level
+    execute wrapper reading a context variable, which follows the request
+    into ``sync_to_async`` threads under ASGI. Streaming responses are
+    recorded once their body has been sent, queries included.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        for connection in connections.all(initialized_only=True):
+            _install_query_counter(None, connection)
+        exporter = get_exporter()
+        if exporter is not None:
+            exporter.start()
+
+    def _finish(self, request, response, started, totals):
+        requests_in_flight.dec()
+        route = request.resolver_match.view_name if getattr(request, "resolver_match", None) else "unresolved"
+        method = request.method if request.method in KNOWN_METHODS else "other"
+        request_duration.observe(time.perf_counter() - started, route=route, method=method)
+        status = response.status_code if response is not None else 500
+        requests_total.inc(route=route, method=method, status=str(status))
+        db_queries.observe(totals[0], route=route)
+        db_time.observe(totals[1], route=route)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+        totals = [0, 0.0]
+        token = _request_queries.set(totals)
+        requests_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            self._finish(request, None, started, totals)
+            raise
+        finally:
+            _request_queries.reset(token)
+        # Streamed bodies are timed and their queries counted until fully sent.
+        return _when_sent(response, partial(self._finish, request, response, started, totals), totals)
+
+    async def __acall__(self, request):
+        if not settings.METRICS_ENABLED:
+            return await self.get_response(request)
+        totals = [0, 0.0]
+        token = _request_queries.set(totals)
+        requests_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            self._finish(request, None, started, totals)
+            raise
+        finally:
+            _request_queries.reset(token)
+        # Streamed bodies are timed and their queries counted until fully sent.
+        return _when_sent(response, partial(self._finish, request, response, started, totals), totals)
@@ -0,0 +1,69 @@
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+COUNT_CACHE_KEY = "row-count:{}:{}"
+
+
+def estimate_row_count(model, using="default", timeout=300):
+    """Row count of ``model``'s table from statistics or a cached ``COUNT(*)``.
+
+    PostgreSQL's planner statistics are used once the table has been
+    analyzed. Elsewhere the exact count is cached for ``timeout`` seconds,
+    so at most one full count runs per table and interval.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples FROM pg_class WHERE relname = %s", [table])
+            row = cursor.fetchone()
+        if row and row[0] >= 0:
+            return int(row[0])
+    key = COUNT_CACHE_KEY.format(using, table)
+    count = cache.get(key)
+    if count is None:
+        count = model._base_manager.using(using).count()
+        cache.set(key, count, timeout)
+    return count
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that never runs an unbounded ``COUNT(*)`` per request.
+
+    Unfiltered lists report the table estimate once it exceeds
+    ``count_limit``; everything else is counted exactly, but only up to
+    ``count_limit`` rows. Either way the count is only a lower bound, so a
+    page past it is not rejected: the count is extended to cover that page
+    (one more bounded count) and the page is served if it has rows.
+    """
+
+    count_limit = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_row_count(queryset.model, queryset.db)
+            if estimate >= self.count_limit:
+                self.approximate = True
+                return estimate
+        return self._count_up_to(self.count_limit)
+
+    def _count_up_to(self, limit):
+        count = self.object_list.order_by()[:limit].count()
+        # Hitting the limit means there may be more rows than counted.
+        self.approximate = count >= limit
+        return count
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            if not getattr(self, "approximate", False):
+                raise
+        # The requested page lies past the estimate: count just far enough to reach it.
+        self.__dict__["count"] = max(self.count, self._count_up_to(int(number) * self.per_page + 1))
+        self.__dict__.pop("num_pages", None)
+        return super().validate_number(number)
@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -43,10 +45,13 @@ INSTALLED_APPS = [
     'auth_app.apps.AuthConfig',
     'boards_app.apps.BoardsConfig',
     'tasks_app.apps.TasksConfig',
+    'core',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'core.middleware.AdmissionControlMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -144,3 +149,133 @@ CORS_ALLOWED_ORIGINS = [
     'http://127.0.0.1:5173',
     'http://localhost:5173',
 ]
+# Optimistic concurrency: browsers must be allowed to read ETag and send If-Match.
+CORS_EXPOSE_HEADERS = ['ETag']
+CORS_ALLOW_HEADERS = (*default_headers, 'if-match')
+
+# Password hashing for login/registration. With AUTH_ASYNC_HASHING enabled
+# (recommended under ASGI) the auth endpoints run PBKDF2 on a dedicated pool
+# of AUTH_HASHING_WORKERS threads; once AUTH_HASHING_QUEUE_DEPTH further jobs
+# are waiting, new requests are shed with 503 + Retry-After.
+AUTH_ASYNC_HASHING = False
+AUTH_HASHING_WORKERS = 4
+AUTH_HASHING_QUEUE_DEPTH = 16
+AUTH_HASHING_RETRY_AFTER = 1
+
+# Board deletion. With BOARD_DEFERRED_DELETE the board is hidden at once and
+# its tasks/comments are purged in BOARD_PURGE_BATCH_SIZE-row transactions,
+# either by the in-process worker (BOARD_PURGE_IN_PROCESS) or by
+# `manage.py purge_deleted_boards`.
+BOARD_DEFERRED_DELETE = False
+BOARD_PURGE_IN_PROCESS = True
+BOARD_PURGE_BATCH_SIZE = 1000
+
+# Rows read per round trip by board exports and clones, and inserted per
+# bulk_create by imports and clones (GET /api/boards/<id>/export/,
+# POST /api/boards/import/, POST /api/boards/<id>/clone/ and the
+# export_board / import_board commands).
+BOARD_TRANSFER_BATCH_SIZE = 1000
+
+# Board analytics (GET /api/boards/<id>/analytics/). `manage.py
+# snapshot_boards` writes one row per changed board and day, in batches of
+# BOARD_ANALYTICS_BATCH_SIZE boards. Without ?from= the endpoint returns the
+# last BOARD_ANALYTICS_DEFAULT_DAYS days; longer ranges than
+# BOARD_ANALYTICS_MAX_DAYS are rejected.
+BOARD_ANALYTICS_BATCH_SIZE = 500
+BOARD_ANALYTICS_DEFAULT_DAYS = 30
+BOARD_ANALYTICS_MAX_DAYS = 1830
+
+# Done tasks untouched for TASK_ARCHIVE_AFTER_DAYS are moved to the archive
+# tables by `manage.py archive_tasks` (run it from cron), in batches of
+# TASK_ARCHIVE_BATCH_SIZE tasks per transaction.
+TASK_ARCHIVE_AFTER_DAYS = 30
+TASK_ARCHIVE_BATCH_SIZE = 500
+
+# Tasks are ordered within a kanban column by lexicographic rank strings
+# (tasks_app.ranking). Once a move or insert produces a rank longer than
+# TASK_RANK_REBALANCE_LENGTH, the column is renumbered in the background.
+TASK_RANK_REBALANCE_LENGTH = 24
+
+# Seconds to keep {id, email, fullname} user summaries in the Django cache
+# across requests (invalidated when a user is saved). 0 disables the cache;
+# summaries are still memoized per request.
+USER_SUMMARY_CACHE_TIMEOUT = 0
+
+# GET /api/dashboard/: DASHBOARD_TASK_LIMIT most urgent assigned/reviewing
+# tasks. With DASHBOARD_CACHE_TIMEOUT > 0 each user's dashboard is cached
+# for that many seconds and dropped as soon as one of their boards or
+# memberships changes. Needs a cache shared by all workers (e.g. Redis);
+# with the per-process default cache leave it at 0.
+DASHBOARD_TASK_LIMIT = 5
+DASHBOARD_CACHE_TIMEOUT = 0
+
+# Activity log. Entries are buffered in memory (at most
+# ACTIVITY_BUFFER_MAX_SIZE, oldest dropped first) and written with
+# bulk_create every ACTIVITY_FLUSH_SIZE entries or ACTIVITY_FLUSH_INTERVAL
+# seconds, and on shutdown. Board analytics count completed tasks from this
+# log, so snapshot_boards refuses to run without it.
+ACTIVITY_LOG_ENABLED = True
+ACTIVITY_BUFFER_MAX_SIZE = 10000
+ACTIVITY_FLUSH_SIZE = 200
+ACTIVITY_FLUSH_INTERVAL = 2.0
+
+# Admission control (core.middleware.AdmissionControlMiddleware).
+# ADMISSION_MAX_CONCURRENT requests run at once, ADMISSION_QUEUE_DEPTH more
+# may wait up to ADMISSION_QUEUE_TIMEOUT seconds; the rest get 503. Each
+# user with a valid token (else each client address) gets RATE_LIMIT_READS /
+# RATE_LIMIT_WRITES requests per (count, seconds) sliding window before 429;
+# at most RATE_LIMIT_MAX_KEYS clients are tracked at once. Behind reverse
+# proxies set RATE_LIMIT_TRUSTED_PROXIES to their number: the client address
+# is then read from the RATE_LIMIT_FORWARDED_HEADER entry the outermost
+# proxy appended, instead of REMOTE_ADDR (which would be the proxy's).
+ADMISSION_CONTROL_ENABLED = True
+ADMISSION_MAX_CONCURRENT = 32
+ADMISSION_QUEUE_DEPTH = 64
+ADMISSION_QUEUE_TIMEOUT = 2.0
+ADMISSION_RETRY_AFTER = 1
+RATE_LIMIT_READS = (600, 60)
+RATE_LIMIT_WRITES = (120, 60)
+RATE_LIMIT_MAX_KEYS = 100000
+RATE_LIMIT_TRUSTED_PROXIES = 0
+RATE_LIMIT_FORWARDED_HEADER = 'HTTP_X_FORWARDED_FOR'
+
+# Streaming responses (?stream=1 on board detail and task lists): rows are
+# read STREAMING_CHUNK_SIZE at a time and the JSON is gzipped on the fly for
+# clients that accept it when STREAMING_GZIP is on.
+STREAMING_CHUNK_SIZE = 500
+STREAMING_GZIP = True
+
+# Prime URL resolving, DRF view/serializer setup and DB connections when a
+# worker loads core.wsgi / core.asgi (see core.warmup and `manage.py warmup`).
+# Sync workers keep the opened connections when CONN_MAX_AGE > 0; under
+# ASGI each request gets its own thread, so only the driver is warmed.
+WARMUP_ON_STARTUP = False
+
+# Metrics exposed at /metrics in the Prometheus text format. Set
+# METRICS_TOKEN to require `Authorization: Bearer <token>`; while it is
+# empty only loopback clients and logged-in staff may read it. With several
+# worker processes, point METRICS_MULTIPROC_DIR at a directory shared by
+# them (emptied on deploy); each worker writes its metrics there every
+# METRICS_EXPORT_INTERVAL seconds and /metrics serves the sum.
+METRICS_ENABLED = True
+METRICS_TOKEN = ''
+METRICS_MULTIPROC_DIR = ''
+METRICS_EXPORT_INTERVAL = 5.0
+
+# Group-commit writer (core.writer), meant for SQLite under concurrent
+# writes. When enabled, comment and task creates/updates are handed to one
+# writer thread that commits up to DB_WRITE_QUEUE_MAX_BATCH queued writes
+# per transaction, waiting at most DB_WRITE_QUEUE_MAX_DELAY seconds for a
+# batch to fill. Writes still queued after DB_WRITE_QUEUE_TIMEOUT seconds
+# are dropped with 503. The limits are read when the writer thread starts.
+DB_WRITE_QUEUE_ENABLED = False
+DB_WRITE_QUEUE_MAX_BATCH = 64
+DB_WRITE_QUEUE_MAX_DELAY = 0.0
+DB_WRITE_QUEUE_TIMEOUT = 10.0
+
+# POST /api/batch/: at most BATCH_MAX_REQUESTS sub-requests per call;
+# each counts against RATE_LIMIT_READS / RATE_LIMIT_WRITES. Read-only
+# batches sent with "parallel": true use up to BATCH_MAX_WORKERS threads
+# (each with its own database connection and admission-control slot).
+BATCH_MAX_REQUESTS = 50
+BATCH_MAX_WORKERS = 4
@@ -0,0 +1,111 @@
+import json
+import zlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.utils import encoders
+
+
+def wants_stream(request):
+    """True when the client asked for a streamed response with ``?stream=1``."""
+    return request.query_params.get("stream", "").lower() in ("1", "true")
+
+
+def _dumps(obj):
+    """Encode like DRF's JSONRenderer with its default compact settings."""
+    return json.dumps(obj, cls=encoders.JSONEncoder, ensure_ascii=False, separators=(",", ":"))
+
+
+def iter_json_array(items, batch_size=None):
+    """Yield a JSON array piece by piece, ``batch_size`` items per chunk."""
+    batch_size = batch_size or settings.STREAMING_CHUNK_SIZE
+    yield "["
+    batch = []
+    separator = ""
+    for item in items:
+        batch.append(_dumps(item))
+        if len(batch) >= batch_size:
+            yield separator + ",".join(batch)
+            separator = ","
+            batch = []
+    if batch:
+        yield separator + ",".join(batch)
+    yield "]"
+
+
+def iter_json_object(head, key, items, batch_size=None):
+    """Yield ``head`` as a JSON object whose ``key`` holds the streamed ``items``."""
+    opening = _dumps(head)[:-1]
+    yield opening + ("," if head else "") + _dumps(key) + ":"
+    yield from iter_json_array(items, batch_size)
+    yield "}"
+
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+async def _aiterate(chunks):
+    """Drive a sync (DB-backed) iterator from ASGI without buffering it."""
+    iterator = iter(chunks)
+    next_chunk = sync_to_async(lambda: next(iterator, None))
+    while (chunk := await next_chunk()) is not None:
+        yield chunk
+
+
+def iter_batched(chunks, batch_size=None):
+    """Join small text chunks (e.g. NDJSON lines) into fewer, larger ones."""
+    batch_size = batch_size or settings.STREAMING_CHUNK_SIZE
+    batch = []
+    for chunk in chunks:
+        batch.append(chunk)
+        if len(batch) >= batch_size:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+
+def streaming_json_response(request, chunks, content_type="application/json"):
+    """Wrap JSON text chunks in a StreamingHttpResponse, gzipped when accepted."""
+    content = (chunk.encode() for chunk in chunks)
+    gzipped = settings.STREAMING_GZIP and "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", "")
+    if gzipped:
+        content = _gzip(content)
+    if isinstance(getattr(request, "_request", request), ASGIRequest):
+        content = _aiterate(content)
+    response = StreamingHttpResponse(content, content_type=content_type)
+    if gzipped:
+        response["Content-Encoding"] = "gzip"
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
+
+
+class StreamingListMixin:
+    """Let a list view stream its results as a JSON array with ``?stream=1``.
+
+    Rows are fetched with ``QuerySet.iterator(chunk_size=...)`` and encoded
+    one by one, so memory does not grow with the number of results. The
+    streamed form is never paginated. Views override ``get_stream_queryset``
+    to drop prefetches, which ``iterator()`` would repeat for every chunk.
+    """
+
+    def get_stream_queryset(self):
+        return self.filter_queryset(self.get_queryset())
+
+    def list(self, request, *args, **kwargs):
+        if not wants_stream(request):
+            return super().list(request, *args, **kwargs)
+        queryset = self.get_stream_queryset()
+        serializer = self.get_serializer()
+        rows = queryset.iterator(chunk_size=settings.STREAMING_CHUNK_SIZE)
+        items = (serializer.to_representation(row) for row in rows)
+        return streaming_json_response(request, iter_json_array(items))
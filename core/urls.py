@@ -17,9 +17,16 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import include, path
 
+from core.views import AdmissionStatsView, BatchView, metrics_view
+from tasks_app.api.views import DashboardView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('auth_app.api.urls')),
     path('api/boards/', include('boards_app.api.urls')),
     path('api/tasks/', include('tasks_app.api.urls')),
+    path('api/dashboard/', DashboardView.as_view(), name='dashboard'),
+    path('api/admission/', AdmissionStatsView.as_view(), name='admission-stats'),
+    path('api/batch/', BatchView.as_view(), name='batch'),
+    path('metrics', metrics_view, name='metrics'),
 ]
@@ -0,0 +1,74 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.batch import BatchSerializer, run_batch
+from core.metrics import render
+from core.middleware import admission_snapshot, metrics_state
+
+
+class AdmissionStatsView(APIView):
+    """Admission-control and rate-limit counters for operators."""
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        """Return shed/limit counters and the current gate occupancy."""
+        return Response(admission_snapshot())
+
+
+class BatchView(APIView):
+    """Run several API calls in one round trip behind a single authentication.
+
+    Body: ``{"requests": [{"method", "path", "body"?, "headers"?}, ...],
+    "parallel": false}``. Returns ``{"responses": [{"status", "headers",
+    "body"}, ...]}`` in request order; each sub-request succeeds or fails on
+    its own (there is no shared transaction). Each sub-request is charged
+    to the read/write rate limit like a separate call and answers 429 in
+    its slot when over budget. Read-only batches may set ``parallel`` to
+    run on up to BATCH_MAX_WORKERS threads, as far as admission-control
+    slots are free.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        """Validate the batch and return the sub-responses in order."""
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        responses = run_batch(request._request, request.user, request.auth, data["requests"], data["parallel"])
+        return Response({"responses": responses})
+
+
+LOOPBACK_ADDRESSES = ("127.0.0.1", "::1")
+
+
+def _may_read_metrics(request):
+    """Bearer METRICS_TOKEN when set; otherwise loopback clients and logged-in staff only."""
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        return constant_time_compare(request.META.get("HTTP_AUTHORIZATION", ""), expected)
+    # A local reverse proxy also connects from loopback, but adds X-Forwarded-For.
+    if request.META.get("REMOTE_ADDR") in LOOPBACK_ADDRESSES and "HTTP_X_FORWARDED_FOR" not in request.META:
+        return True
+    user = getattr(request, "user", None)
+    return bool(user is not None and user.is_active and user.is_staff)
+
+
+@require_GET
+def metrics_view(request):
+    """Prometheus text exposition of the in-process (or multi-process) metrics.
+
+    When METRICS_TOKEN is set, scrapers must send ``Authorization: Bearer <token>``;
+    without it the endpoint only answers loopback clients and staff sessions.
+    """
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    if not _may_read_metrics(request):
+        return HttpResponse(status=401 if settings.METRICS_TOKEN else 403)
+    return HttpResponse(render(metrics_state()), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,196 @@
+import io
+import logging
+import os
+import subprocess
+import sys
+import time
+from functools import partial
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.contrib.auth.models import AnonymousUser
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+
+logger = logging.getLogger(__name__)
+
+
+def local_apps():
+    """Names of the project's own apps (those living under BASE_DIR)."""
+    base_dir = Path(settings.BASE_DIR)
+    return [config.name for config in apps.get_app_configs() if Path(config.path).is_relative_to(base_dir)]
+
+
+def _api_views(patterns):
+    """Yield every DRF view class reachable from ``patterns``."""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _api_views(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            view_class = getattr(pattern.callback, "cls", None)
+            if view_class is not None:
+                actions = getattr(pattern.callback, "actions", None) or {}
+                yield view_class, getattr(pattern.callback, "initkwargs", {}) or {}, set(actions.values())
+
+
+def _warm_urls():
+    resolver = get_resolver()
+    resolver.url_patterns
+    resolver.resolve(reverse("board-list"))
+
+
+def _serializer_classes(view_class, initkwargs, actions):
+    """Serializer classes ``view_class`` picks for each of its ``actions``."""
+    classes = set()
+    if not hasattr(view_class, "get_serializer_class"):
+        return classes
+    for action in actions or (None,):
+        view = view_class(**initkwargs)
+        view.action = action
+        view.request = view.format_kwarg = None
+        view.args, view.kwargs = (), {}
+        try:
+            classes.add(view.get_serializer_class())
+        except Exception:  # noqa: BLE001 - some views need a real request to decide
+            logger.debug("No serializer class for %s.%s without a request.", view_class.__name__, action)
+    classes.discard(None)
+    return classes
+
+
+def _warm_serializer(serializer, seen):
+    """Build ``serializer``'s fields and those of the serializers nested in it."""
+    serializer = getattr(serializer, "child", serializer)
+    if type(serializer) in seen or not hasattr(serializer, "fields"):
+        return
+    seen.add(type(serializer))
+    for field in serializer.fields.values():
+        _warm_serializer(field, seen)
+
+
+def _warm_views():
+    """Build permissions, authenticators, parsers, renderers and serializer fields once.
+
+    Serializers come from ``get_serializer_class()`` for every routed
+    action, so viewsets switching serializers per action are covered too.
+    """
+    seen = set()
+    for view_class, initkwargs, actions in _api_views(get_resolver().url_patterns):
+        view = view_class(**initkwargs)
+        view.get_permissions()
+        view.get_authenticators()
+        view.get_parsers()
+        view.get_renderers()
+        for serializer_class in _serializer_classes(view_class, initkwargs, actions):
+            try:
+                _warm_serializer(serializer_class(), seen)
+            except Exception:  # noqa: BLE001 - warm-up must not stop on one serializer
+                logger.debug("Could not build %s during warm-up.", serializer_class.__name__, exc_info=True)
+
+
+def _warm_dispatch():
+    """Send one anonymous request through the DRF stack (rejected with 401)."""
+    request = WSGIRequest({
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": reverse("board-list"),
+        "SERVER_NAME": "localhost",
+        "SERVER_PORT": "80",
+        "wsgi.url_scheme": "http",
+        "wsgi.input": io.BytesIO(),
+    })
+    request.user = AnonymousUser()
+    match = get_resolver().resolve(request.path_info)
+    match.func(request, *match.args, **match.kwargs)
+
+
+def _warm_hashers():
+    get_hasher()
+
+
+def _warm_database(keep=True):
+    """Connect to every configured database.
+
+    Loads the driver and runs the backend's connection setup. Connections
+    are thread-local, so one kept open (with CONN_MAX_AGE > 0) only serves
+    requests handled by this thread, as in sync workers; otherwise it is
+    closed again.
+    """
+    for alias in connections:
+        connection = connections[alias]
+        connection.ensure_connection()
+        if not keep:
+            connection.close()
+
+
+WARMUP_STEPS = (
+    ("urls", _warm_urls),
+    ("views", _warm_views),
+    ("dispatch", _warm_dispatch),
+    ("hashers", _warm_hashers),
+)
+
+
+def warm_up(report=None, asgi=False):
+    """Prime the code paths the first requests of a fresh worker would pay for.
+
+    Returns ``{step: seconds}``; ``report(step, seconds)`` is called after
+    each step. Under ASGI Django runs each request's sync code in a thread
+    of its own, so with ``asgi`` the database connections are not kept.
+    """
+    timings = {}
+    for name, step in (*WARMUP_STEPS, ("database", partial(_warm_database, keep=not asgi))):
+        started = time.perf_counter()
+        step()
+        timings[name] = time.perf_counter() - started
+        if report:
+            report(name, timings[name])
+    return timings
+
+
+def warm_up_on_startup(asgi=False):
+    """Run ``warm_up`` from wsgi/asgi when WARMUP_ON_STARTUP is set; never raises."""
+    if not settings.WARMUP_ON_STARTUP:
+        return
+    try:
+        timings = warm_up(asgi=asgi)
+    except Exception:
+        logger.exception("Worker warm-up failed.")
+        return
+    logger.info(
+        "Worker warm-up took %.1f ms (%s).",
+        sum(timings.values()) * 1000,
+        ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in timings.items()),
+    )
+
+
+_IMPORT_SCRIPT = "import django; django.setup(); from django.urls import get_resolver; get_resolver().url_patterns"
+
+
+def profile_imports(packages=None):
+    """Measure cold import time per module of ``packages`` in a fresh interpreter.
+
+    Runs ``python -X importtime`` with Django set up and the URLconf loaded,
+    and returns ``[(module, self_us, cumulative_us)]`` sorted by cumulative
+    time, slowest first.
+    """
+    packages = tuple(packages or local_apps())
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "core.settings")}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _IMPORT_SCRIPT],
+        capture_output=True,
+        text=True,
+        cwd=settings.BASE_DIR,
+        env=env,
+        check=True,
+    )
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, module = (part.strip() for part in line[len("import time:"):].split("|"))
+        if not self_us.isdigit() or module.split(".")[0] not in packages:
+            continue
+        timings.append((module, int(self_us), int(cumulative_us)))
+    return sorted(timings, key=lambda timing: timing[2], reverse=True)
@@ -0,0 +1,157 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connection, connections, transaction
+from django.dispatch import receiver
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+batch_sizes = registry.histogram(
+    "db_write_batch_size",
+    "Writes committed per transaction by the group-commit writer.",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+
+
+class WriteQueueTimeout(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = {"errors": ["The server is busy. Please try again."]}
+    default_code = "write_queue_timeout"
+
+
+class GroupCommitWriter:
+    """Single thread that runs queued writes and commits them in batches.
+
+    With SQLite every writing thread contends for the one database lock.
+    Funnelling writes through one thread removes that contention, and
+    committing up to ``max_batch`` queued jobs per transaction pays for the
+    commit once per batch. After the first job of a batch, the writer waits
+    up to ``max_delay`` seconds for more. Each job runs in its own
+    savepoint, so a failing job only rolls back itself. Callers get their
+    result (or exception) once the batch has committed.
+
+    Limits left as None are read from the DB_WRITE_QUEUE_* settings when
+    the thread starts, not when the writer is created at import time.
+    """
+
+    def __init__(self, name, max_batch=None, max_delay=None, timeout=None):
+        self.name = name
+        self._limits = {"max_batch": max_batch, "max_delay": max_delay, "timeout": timeout}
+        self.max_batch = self.max_delay = self.timeout = None
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue ``fn(*args, **kwargs)`` and return a Future for its result."""
+        future = Future()
+        self._ensure_started()
+        self._queue.put((future, fn, args, kwargs))
+        return future
+
+    def run(self, fn, *args, **kwargs):
+        """Queue ``fn`` and wait until it has been committed.
+
+        Raises WriteQueueTimeout (503) if the job has not started within
+        ``timeout`` seconds. A job that has already started is always
+        waited for.
+        """
+        future = self.submit(fn, *args, **kwargs)
+        try:
+            return future.result(self.timeout)
+        except FutureTimeout:
+            if future.cancel():
+                raise WriteQueueTimeout()
+            return future.result()
+
+    def configure(self):
+        """(Re)read the limits not given to the constructor from settings."""
+        for name, value in self._limits.items():
+            setattr(self, name, getattr(settings, f"DB_WRITE_QUEUE_{name.upper()}") if value is None else value)
+
+    def pending(self):
+        """Approximate number of writes waiting for the writer."""
+        return self._queue.qsize()
+
+    def is_writer_thread(self):
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self.configure()
+                self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        # Skip jobs whose callers gave up waiting.
+        return [job for job in batch if job[0].set_running_or_notify_cancel()]
+
+    def _commit(self, batch):
+        outcomes = []
+        with transaction.atomic():
+            for future, fn, args, kwargs in batch:
+                try:
+                    with transaction.atomic():
+                        outcomes.append((future, fn(*args, **kwargs), None))
+                except Exception as exc:
+                    outcomes.append((future, None, exc))
+        return outcomes
+
+    def _loop(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                continue
+            try:
+                outcomes = self._commit(batch)
+            except Exception as exc:
+                logger.exception("Committing %d queued writes failed on %s.", len(batch), self.name)
+                connections.close_all()
+                for future, *_ in batch:
+                    future.set_exception(exc)
+                continue
+            batch_sizes.observe(len(batch))
+            for future, result, exc in outcomes:
+                if exc is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(exc)
+
+
+writer = GroupCommitWriter("db-writer")
+
+
+@receiver(setting_changed)
+def _reconfigure_writer(setting, **kwargs):
+    """Apply changed DB_WRITE_QUEUE_* limits to the running writer (tests)."""
+    if setting.startswith("DB_WRITE_QUEUE_"):
+        writer.configure()
+
+
+def run_write(fn, *args, **kwargs):
+    """Run a write on the group-commit writer when DB_WRITE_QUEUE_ENABLED.
+
+    Otherwise, or when the caller is inside a transaction (whose
+    uncommitted rows the writer could not see), ``fn`` runs directly.
+    """
+    if not settings.DB_WRITE_QUEUE_ENABLED or connection.in_atomic_block or writer.is_writer_thread():
+        return fn(*args, **kwargs)
+    return writer.run(fn, *args, **kwargs)
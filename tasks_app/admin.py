@@ -1,16 +1,60 @@
 from django.contrib import admin
 
+from boards_app.models import Board
+from core.admin import IndexedSearchMixin
+from core.paginator import EstimatedCountPaginator
 from .models import Comment, Task
 
 
+class BoardListFilter(admin.SimpleListFilter):
+    """Board filter that lists recently active boards instead of every board.
+
+    Any other board can still be selected by putting its id into the
+    ``?board=`` query parameter.
+    """
+
+    title = "board"
+    parameter_name = "board"
+    board_lookup = "board_id"
+    limit = 20
+
+    def lookups(self, request, model_admin):
+        boards = list(Board.objects.order_by("-updated_at").values_list("id", "name")[: self.limit])
+        selected = self.value()
+        if selected and selected.isdigit() and all(str(board_id) != selected for board_id, _ in boards):
+            boards += list(Board.objects.filter(pk=selected).values_list("id", "name"))
+        return boards
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if value and value.isdigit():
+            return queryset.filter(**{self.board_lookup: value})
+        return queryset
+
+
+class CommentBoardListFilter(BoardListFilter):
+    board_lookup = "task__board_id"
+
+
 @admin.register(Task)
-class TaskAdmin(admin.ModelAdmin):
+class TaskAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ("title", "board", "priority", "status", "assignee", "reviewer", "due_date")
-    list_filter = ("priority", "status", "board")
-    search_fields = ("title", "description", "board__name")
+    list_filter = ("priority", "status", BoardListFilter)
+    list_select_related = ("board", "assignee", "reviewer")
+    search_fields = ("=id", "^title")
+    autocomplete_fields = ("board", "assignee", "reviewer")
+    ordering = ("-id",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ("task", "author", "created_at")
-    search_fields = ("task__title", "author__email", "content")
+    list_filter = (CommentBoardListFilter,)
+    list_select_related = ("task__board", "author")
+    search_fields = ("=id", "=task__id", "^author__username")
+    autocomplete_fields = ("task", "author")
+    ordering = ("-id",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
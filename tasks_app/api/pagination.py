@@ -0,0 +1,9 @@
+from rest_framework.pagination import PageNumberPagination
+
+
+class ArchivedTaskPagination(PageNumberPagination):
+    """Page through archived tasks without ever loading a whole board's history."""
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
@@ -10,4 +10,9 @@ class IsTaskBoardMemberOrOwner(BasePermission):
         if board is None:
             return False
         user = request.user
-        return board.owner_id == user.id or board.members.filter(id=user.id).exists()
+        if board.owner_id == user.id:
+            return True
+        is_member = getattr(obj, "is_board_member", None)
+        if is_member is None:
+            is_member = board.members.filter(id=user.id).exists()
+        return is_member
@@ -1,29 +1,13 @@
-from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
-from boards_app.models import Board
-from tasks_app.models import Comment, Task
+from auth_app.api.serializers import UserLookupSerializer
+from auth_app.summaries import get_user_summary
+from core.concurrency import save_versioned
+from tasks_app.models import ArchivedTask, Comment, Task
 
-User = get_user_model()
 
-
-def _get_fullname(user: User) -> str:
-    """Return the formatted full name or fall back to username."""
-    full_name = user.get_full_name().strip()
-    return full_name or user.username
-
-
-class BoardMemberSerializer(serializers.ModelSerializer):
+class BoardMemberSerializer(UserLookupSerializer):
     """Minimal user representation for board context."""
-    fullname = serializers.SerializerMethodField()
-
-    class Meta:
-        model = User
-        fields = ("id", "email", "fullname")
-
-    def get_fullname(self, obj):
-        """Expose the formatted name on member objects."""
-        return _get_fullname(obj)
 
 
 class TaskDetailSerializer(serializers.ModelSerializer):
@@ -41,12 +25,15 @@ class TaskDetailSerializer(serializers.ModelSerializer):
             "title",
             "description",
             "status",
+            "rank",
             "priority",
             "due_date",
             "assignee",
             "reviewer",
             "comments_count",
+            "version",
         )
+        read_only_fields = ("rank", "version")
 
     def get_comments_count(self, obj):
         """Prefer annotated comment counts to avoid extra queries."""
@@ -55,25 +42,34 @@ class TaskDetailSerializer(serializers.ModelSerializer):
         return obj.comments.count()
 
 
+class TaskCompactSerializer(TaskDetailSerializer):
+    """Task payload referencing assignee/reviewer by id for compact boards."""
+    assignee = serializers.IntegerField(source="assignee_id", read_only=True)
+    reviewer = serializers.IntegerField(source="reviewer_id", read_only=True)
+
+
 class TaskListSerializer(TaskDetailSerializer):
     class Meta(TaskDetailSerializer.Meta):
         fields = TaskDetailSerializer.Meta.fields
 
 
+class ArchivedTaskSerializer(TaskDetailSerializer):
+    """Archived task payload; same shape as a live task plus ``archived_at``."""
+
+    class Meta(TaskDetailSerializer.Meta):
+        model = ArchivedTask
+        fields = tuple(field for field in TaskDetailSerializer.Meta.fields if field != "version") + ("archived_at",)
+
+
 class TaskWriteSerializer(serializers.ModelSerializer):
-    """Input serializer for creating/updating tasks."""
-    assignee_id = serializers.PrimaryKeyRelatedField(
-        queryset=User.objects.all(),
-        allow_null=True,
-        required=False,
-        source="assignee",
-    )
-    reviewer_id = serializers.PrimaryKeyRelatedField(
-        queryset=User.objects.all(),
-        allow_null=True,
-        required=False,
-        source="reviewer",
-    )
+    """Input serializer for creating/updating tasks.
+
+    Board and user ids are only shape-checked here; the view resolves them
+    together with board membership so the write path stays within budget.
+    """
+    board = serializers.IntegerField()
+    assignee_id = serializers.IntegerField(allow_null=True, required=False)
+    reviewer_id = serializers.IntegerField(allow_null=True, required=False)
 
     class Meta:
         model = Task
@@ -89,11 +85,24 @@ class TaskWriteSerializer(serializers.ModelSerializer):
             "reviewer_id",
         )
 
-    def validate_board(self, value):
-        """Ensure the referenced board exists."""
-        if not Board.objects.filter(id=value.id).exists():
-            raise serializers.ValidationError("Board does not exist.")
-        return value
+    def update(self, instance, validated_data):
+        """Apply the changes only if nobody saved the task since it was loaded."""
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        save_versioned(instance, validated_data)
+        return instance
+
+
+class TaskMoveSerializer(serializers.Serializer):
+    """Input for moving a task to a position, optionally in another column.
+
+    ``after`` is the task the moved one should follow and ``before`` the one
+    it should precede (both in the target column); with neither, the task
+    goes to the top of the column.
+    """
+    status = serializers.ChoiceField(choices=Task.Status.choices, required=False)
+    after = serializers.IntegerField(allow_null=True, required=False)
+    before = serializers.IntegerField(allow_null=True, required=False)
 
 
 class TaskCommentSerializer(serializers.ModelSerializer):
@@ -107,4 +116,4 @@ class TaskCommentSerializer(serializers.ModelSerializer):
 
     def get_author(self, obj):
         """Return the author's display name for a comment."""
-        return _get_fullname(obj.author)
+        return get_user_summary(obj.author, self.context)["fullname"]
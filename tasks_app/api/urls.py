@@ -1,6 +1,8 @@
 from django.urls import path
 
 from .views import (
+    ArchivedTaskListView,
+    ArchivedTaskRestoreView,
     TaskAssignedToMeView,
     TaskCommentDetailView,
     TaskCommentListCreateView,
@@ -18,13 +20,17 @@ task_detail = TaskViewSet.as_view({
     "put": "update",
     "delete": "destroy",
 })
+task_move = TaskViewSet.as_view({"post": "move"})
 
 urlpatterns = [
     path("", task_list, name="task-list"),
     path("<int:pk>/", task_detail, name="task-detail"),
     path("<int:pk>", task_detail, name="task-detail-noslash"),
+    path("<int:pk>/move/", task_move, name="task-move"),
     path("assigned-to-me/", TaskAssignedToMeView.as_view(), name="tasks-assigned"),
     path("reviewing/", TaskReviewingView.as_view(), name="tasks-reviewing"),
+    path("archived/", ArchivedTaskListView.as_view(), name="tasks-archived"),
+    path("archived/<int:pk>/restore/", ArchivedTaskRestoreView.as_view(), name="tasks-archived-restore"),
     path("<int:task_id>/comments/", TaskCommentListCreateView.as_view(), name="task-comments"),
     path("<int:task_id>/comments/<int:comment_id>/", TaskCommentDetailView.as_view(), name="task-comment-detail"),
 ]
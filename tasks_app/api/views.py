@@ -1,33 +1,93 @@
-from django.db.models import Prefetch, Q
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Exists, OuterRef, Q
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from rest_framework import generics, permissions, status, viewsets
 from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
 from rest_framework.response import Response
 
-from boards_app.models import Board
+from boards_app.activity import TASK_FIELDS, diff, record_activity, snapshot
+from boards_app.models import Activity, Board
+from core.concurrency import PreconditionFailed, check_if_match, set_etag, update_versioned
+from core.streaming import StreamingListMixin
+from core.writer import run_write
+from tasks_app.api.pagination import ArchivedTaskPagination
 from tasks_app.api.permissions import IsTaskBoardMemberOrOwner
 from tasks_app.api.serializers import (
+    ArchivedTaskSerializer,
     TaskCommentSerializer,
     TaskDetailSerializer,
     TaskListSerializer,
+    TaskMoveSerializer,
     TaskWriteSerializer,
 )
-from tasks_app.models import Comment, Task
+from tasks_app.archive import restore_task
+from tasks_app.dashboard import get_dashboard
+from tasks_app.models import ArchivedTask, Comment, Task
+from tasks_app.ranking import column, maybe_rebalance, rank_between, rebalance_column, top_rank
 
+User = get_user_model()
 
-def _ensure_board_access(user, board, message=None):
-    """Raise PermissionDenied if the user is neither board owner nor member."""
-    if board.owner_id == user.id or board.members.filter(id=user.id).exists():
+
+def _ensure_board_access(user, board, message=None, is_member=None):
+    """Raise PermissionDenied if the user is neither board owner nor member.
+
+    Pass ``is_member`` when membership was already loaded to skip the query.
+    """
+    if board.owner_id == user.id:
         return
-    raise PermissionDenied(message or {"errors": ["You do not have access to this board."]})
+    if is_member is None:
+        is_member = board.members.filter(id=user.id).exists()
+    if not is_member:
+        raise PermissionDenied(message or {"errors": ["You do not have access to this board."]})
+
+
+def _membership_subquery(board_ref, user_ref):
+    """Through-table rows linking ``board_ref`` and ``user_ref`` for Exists()."""
+    return Board.members.through.objects.filter(board_id=board_ref, user_id=user_ref)
+
+
+def _load_board_users(board, user_ids):
+    """Fetch users by id in one query, flagged with their membership of ``board``."""
+    if not user_ids:
+        return {}
+    users = User.objects.filter(id__in=user_ids).annotate(
+        is_board_member=Exists(_membership_subquery(board.id, OuterRef("pk")))
+    )
+    return {user.id: user for user in users}
 
 
-class TaskViewSet(viewsets.ModelViewSet):
-    """Task CRUD with membership validation for boards."""
+class TaskViewSet(StreamingListMixin, viewsets.ModelViewSet):
+    """Task CRUD with membership validation for boards.
+
+    Write endpoints run within a fixed query budget (authentication aside):
+
+    * create: board lookup, one user/membership fetch, top-of-column rank,
+      INSERT (4 queries)
+    * update: task fetch with membership, one user/membership fetch, UPDATE
+      (3; plus a rank lookup when the status changes)
+    * destroy: task fetch with membership, re-read of the task at the loaded
+      version, DELETE comments, DELETE task (4, plus the BEGIN/COMMIT of the
+      delete transaction)
+    * move: task fetch with membership, neighbour rank lookup (one or two
+      indexed queries), UPDATE of the moved row only (3-4, independent of
+      the column size)
+
+    With DB_WRITE_QUEUE_ENABLED the INSERT/UPDATE of create and update runs
+    on the group-commit writer (see ``core.writer``).
+
+    Updates, moves and deletes honour ``If-Match`` against the task's ETag
+    (its ``version``) and answer 412 when it is stale. The UPDATE itself is
+    conditional on the loaded version, so a concurrent write in between
+    also yields 412 instead of being overwritten.
+
+    ``?stream=1`` streams the task list (see ``StreamingListMixin``).
+    """
 
     permission_classes = [permissions.IsAuthenticated, IsTaskBoardMemberOrOwner]
     base_queryset = (
-        Task.objects.select_related("board", "assignee", "reviewer")
+        Task.objects.filter(board__deleted_at__isnull=True)
+        .select_related("board", "assignee", "reviewer")
         .select_related("board__owner")
         .prefetch_related("comments", "board__members")
         .all()
@@ -39,71 +99,192 @@ class TaskViewSet(viewsets.ModelViewSet):
         user = self.request.user
         return self.queryset.filter(Q(board__owner=user) | Q(board__members=user)).distinct()
 
+    def get_stream_queryset(self):
+        """Count comments in SQL instead of prefetching them chunk by chunk."""
+        queryset = super().get_stream_queryset().prefetch_related(None)
+        return queryset.annotate(comments_count=Count("comments", distinct=True))
+
     def get_object(self):
         """Fetch a task and enforce board membership before perms."""
+        if self.action in ("update", "partial_update", "destroy", "move"):
+            return self._get_object_for_write()
         task = get_object_or_404(self.base_queryset, pk=self.kwargs["pk"])
         _ensure_board_access(self.request.user, task.board)
         self.check_object_permissions(self.request, task)
         return task
 
+    def _get_object_for_write(self):
+        """Load a task, its board and the requester's membership in one query."""
+        queryset = Task.objects.filter(board__deleted_at__isnull=True).select_related("board").annotate(
+            is_board_member=Exists(_membership_subquery(OuterRef("board_id"), self.request.user.id))
+        )
+        if self.action != "destroy":
+            queryset = queryset.annotate(comments_count=Count("comments"))
+        task = get_object_or_404(queryset, pk=self.kwargs["pk"])
+        _ensure_board_access(self.request.user, task.board, is_member=task.is_board_member)
+        self.check_object_permissions(self.request, task)
+        return task
+
     def get_serializer_class(self):
         """Use write serializer for mutations, detail for reads."""
         if self.action in ("create", "update", "partial_update"):
             return TaskWriteSerializer
         return TaskDetailSerializer
 
-    def _validate_membership(self, board, data=None):
-        """Validate that assignee/reviewer are part of the board."""
-        _ensure_board_access(self.request.user, board)
-        if not data:
-            return
+    def _validate_membership(self, board, data, instance=None, requester_is_member=None):
+        """Resolve assignee/reviewer and check board membership in one fetch.
+
+        Pops ``assignee_id``/``reviewer_id`` from ``data`` and returns the
+        resolved users keyed as ``assignee``/``reviewer``. The requester is
+        included in the same fetch unless their membership is already known.
+        """
+        user = self.request.user
+        wanted = {}
         for key in ("assignee", "reviewer"):
-            user = data.get(key)
-            if user and user.id != board.owner_id and not board.members.filter(id=user.id).exists():
-                raise ValidationError({f"{key}_id": ["Selected user must be a board member."]})
+            if f"{key}_id" in data:
+                wanted[key] = data.pop(f"{key}_id")
+            elif instance is not None:
+                wanted[key] = getattr(instance, f"{key}_id")
+            else:
+                wanted[key] = None
+        user_ids = {user_id for user_id in wanted.values() if user_id is not None}
+        if requester_is_member is None:
+            user_ids.add(user.id)
+        users = _load_board_users(board, user_ids)
+        if requester_is_member is None:
+            requester_is_member = getattr(users.get(user.id), "is_board_member", False)
+        _ensure_board_access(user, board, is_member=requester_is_member)
+
+        resolved = {}
+        for key, user_id in wanted.items():
+            member = users.get(user_id)
+            if user_id is not None and (instance is None or user_id != getattr(instance, f"{key}_id")):
+                if member is None:
+                    raise ValidationError({f"{key}_id": [f'Invalid pk "{user_id}" - object does not exist.']})
+                if member.id != board.owner_id and not member.is_board_member:
+                    raise ValidationError({f"{key}_id": ["Selected user must be a board member."]})
+            resolved[key] = member
+        return resolved
 
     def perform_create(self, serializer):
         """Validate board membership and persist a new task."""
         board = serializer.validated_data["board"]
-        self._validate_membership(board, serializer.validated_data)
-        serializer.save()
+        people = self._validate_membership(board, serializer.validated_data)
+        status_value = serializer.validated_data.get("status", Task.Status.TODO)
+        rank = top_rank(board.id, status_value)
+        task = run_write(serializer.save, rank=rank, **people)
+        maybe_rebalance(board.id, status_value, rank)
+        record_activity(
+            board.id, self.request.user, Activity.Target.TASK, task.id, Activity.Verb.CREATED,
+            diff({}, snapshot(task, TASK_FIELDS)),
+        )
 
     def perform_update(self, serializer):
         """Disallow moving tasks between boards and revalidate members."""
-        board = serializer.instance.board
-        new_board = serializer.validated_data.get("board")
-        if new_board and new_board != board:
+        task = serializer.instance
+        new_board = serializer.validated_data.pop("board", None)
+        if new_board is not None and new_board != task.board_id:
             raise ValidationError({"board": ["Tasks cannot be moved to another board."]})
-        serializer.validated_data.pop("board", None)
-        self._validate_membership(board, serializer.validated_data)
-        serializer.save(board=board)
+        people = self._validate_membership(
+            task.board,
+            serializer.validated_data,
+            instance=task,
+            requester_is_member=task.is_board_member,
+        )
+        before = snapshot(task, TASK_FIELDS)
+        new_status = serializer.validated_data.get("status", task.status)
+        if new_status != task.status:
+            people["rank"] = top_rank(task.board_id, new_status, exclude=task.pk)
+        run_write(serializer.save, board=task.board, **people)
+        changes = diff(before, snapshot(task, TASK_FIELDS))
+        if changes:
+            record_activity(task.board_id, self.request.user, Activity.Target.TASK, task.id, Activity.Verb.UPDATED, changes)
 
     def perform_destroy(self, instance):
-        """Ensure the user can access the board before delete."""
-        self._validate_membership(instance.board)
-        instance.delete()
+        """Delete the task only if it is still at the loaded version (412 otherwise)."""
+        check_if_match(self.request, instance)
+        _, deleted = Task.objects.filter(pk=instance.pk, version=instance.version).delete()
+        if not deleted.get(Task._meta.label):
+            raise PreconditionFailed()
+        record_activity(
+            instance.board_id, self.request.user, Activity.Target.TASK, instance.id, Activity.Verb.DELETED,
+            {"title": [instance.title, None]},
+        )
+
+    def _target_rank(self, task, status_value, after, before, rebalanced=False):
+        """Rank placing ``task`` between ``after`` and ``before`` in the target column."""
+        neighbours = column(task.board_id, status_value).exclude(pk=task.pk)
+        if after is None and before is None:
+            return top_rank(task.board_id, status_value, exclude=task.pk)
+        wanted = [task_id for task_id in (after, before) if task_id is not None]
+        ranks = dict(neighbours.filter(pk__in=wanted).values_list("pk", "rank"))
+        for key, task_id in (("after", after), ("before", before)):
+            if task_id is not None and task_id not in ranks:
+                raise ValidationError({key: ["Task must be in the target column of the same board."]})
+        lower, upper = ranks.get(after), ranks.get(before)
+        if before is None:
+            upper = neighbours.filter(rank__gt=lower).order_by("rank", "id").values_list("rank", flat=True).first()
+        elif after is None:
+            lower = neighbours.filter(rank__lt=upper).order_by("-rank", "-id").values_list("rank", flat=True).first()
+        if after is not None and before is not None and lower and upper and lower > upper:
+            raise ValidationError({"before": ["Must come after the 'after' task in the column."]})
+        if lower == "" or upper == "" or (lower is not None and upper is not None and lower >= upper):
+            # Tied or unranked neighbours: renumber the column once, then place.
+            if rebalanced:
+                raise ValidationError({"errors": ["The column could not be reordered. Please retry."]})
+            rebalance_column(task.board_id, status_value)
+            if task.status == status_value:
+                # The rebalance bumped the task's version along with its column.
+                task.version += 1
+            return self._target_rank(task, status_value, after, before, rebalanced=True)
+        return rank_between(lower, upper)
+
+    def move(self, request, *args, **kwargs):
+        """Change a task's column and/or position by rewriting only its own row."""
+        task = self.get_object()
+        check_if_match(request, task)
+        serializer = TaskMoveSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        status_value = data.get("status", task.status)
+        rank = self._target_rank(task, status_value, data.get("after"), data.get("before"))
+        changes = diff({"status": task.status}, {"status": status_value})
+        task.status, task.rank, task.updated_at = status_value, rank, timezone.now()
+        update_versioned(task, status=task.status, rank=task.rank, updated_at=task.updated_at)
+        if changes:
+            record_activity(task.board_id, request.user, Activity.Target.TASK, task.id, Activity.Verb.UPDATED, changes)
+        maybe_rebalance(task.board_id, status_value, rank)
+        return set_etag(Response(TaskDetailSerializer(task, context=self.get_serializer_context()).data), task)
 
     def create(self, request, *args, **kwargs):
         """Return a detailed payload after task creation."""
-        board_id = request.data.get("board")
-        if board_id is not None and not Board.objects.filter(id=board_id).exists():
-            raise NotFound({"board": "Board not found."})
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
+        board = Board.objects.filter(pk=serializer.validated_data["board"]).first()
+        if board is None:
+            raise NotFound({"board": "Board not found."})
+        serializer.validated_data["board"] = board
         self.perform_create(serializer)
+        serializer.instance.comments_count = 0
         detail = TaskDetailSerializer(serializer.instance, context=self.get_serializer_context())
         headers = self.get_success_headers(detail.data)
         return Response(detail.data, status=status.HTTP_201_CREATED, headers=headers)
 
+    def retrieve(self, request, *args, **kwargs):
+        """Return the task with its ETag for conditional updates."""
+        task = self.get_object()
+        return set_etag(Response(self.get_serializer(task).data), task)
+
     def update(self, request, *args, **kwargs):
         """Update a task and return the detailed view."""
         partial = kwargs.pop("partial", False)
         instance = self.get_object()
+        check_if_match(request, instance)
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
         self.perform_update(serializer)
         detail = TaskDetailSerializer(serializer.instance, context=self.get_serializer_context())
-        return Response(detail.data)
+        return set_etag(Response(detail.data), serializer.instance)
 
     def partial_update(self, request, *args, **kwargs):
         """Support PATCH updates through the same flow as PUT."""
@@ -111,30 +292,43 @@ class TaskViewSet(viewsets.ModelViewSet):
         return self.update(request, *args, **kwargs)
 
 
-class TaskAssignedToMeView(generics.ListAPIView):
-    """Tasks where the authenticated user is the assignee."""
+class TaskAssignedToMeView(StreamingListMixin, generics.ListAPIView):
+    """Tasks where the authenticated user is the assignee (``?stream=1`` to stream)."""
 
     serializer_class = TaskListSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         """Tasks where the current user is assigned."""
-        return Task.objects.filter(assignee=self.request.user).select_related("board", "assignee", "reviewer").prefetch_related("comments")
+        return (
+            Task.objects.filter(assignee=self.request.user, board__deleted_at__isnull=True)
+            .select_related("board", "assignee", "reviewer")
+            .annotate(comments_count=Count("comments"))
+            .order_by(*Task._meta.ordering, "id")
+        )
 
 
-class TaskReviewingView(generics.ListAPIView):
-    """Tasks where the authenticated user is the reviewer."""
+class TaskReviewingView(StreamingListMixin, generics.ListAPIView):
+    """Tasks where the authenticated user is the reviewer (``?stream=1`` to stream)."""
 
     serializer_class = TaskListSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         """Tasks where the current user is reviewer."""
-        return Task.objects.filter(reviewer=self.request.user).select_related("board", "assignee", "reviewer").prefetch_related("comments")
+        return (
+            Task.objects.filter(reviewer=self.request.user, board__deleted_at__isnull=True)
+            .select_related("board", "assignee", "reviewer")
+            .annotate(comments_count=Count("comments"))
+            .order_by(*Task._meta.ordering, "id")
+        )
 
 
 class TaskCommentListCreateView(generics.ListCreateAPIView):
-    """List and create comments on a task within a board context."""
+    """List and create comments on a task within a board context.
+
+    New comments go through ``run_write`` (group commit when enabled).
+    """
 
     serializer_class = TaskCommentSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -143,7 +337,9 @@ class TaskCommentListCreateView(generics.ListCreateAPIView):
         """Cache and return the task with board membership enforced."""
         if not hasattr(self, "_task"):
             task = get_object_or_404(
-                Task.objects.select_related("board").prefetch_related("board__members"),
+                Task.objects.filter(board__deleted_at__isnull=True)
+                .select_related("board")
+                .prefetch_related("board__members"),
                 pk=self.kwargs["task_id"],
             )
             _ensure_board_access(self.request.user, task.board)
@@ -157,7 +353,11 @@ class TaskCommentListCreateView(generics.ListCreateAPIView):
     def perform_create(self, serializer):
         """Attach the comment to the task and current user."""
         task = self.get_task()
-        serializer.save(task=task, author=self.request.user)
+        comment = run_write(serializer.save, task=task, author=self.request.user)
+        record_activity(
+            task.board_id, self.request.user, Activity.Target.COMMENT, comment.id, Activity.Verb.CREATED,
+            {"task": [None, task.id], "content": [None, comment.content]},
+        )
 
 
 class TaskCommentDetailView(generics.DestroyAPIView):
@@ -169,7 +369,7 @@ class TaskCommentDetailView(generics.DestroyAPIView):
     def get_object(self):
         """Allow deletion by comment author or board owner only."""
         comment = get_object_or_404(
-            Comment.objects.select_related("task__board", "author"),
+            Comment.objects.filter(task__board__deleted_at__isnull=True).select_related("task__board", "author"),
             pk=self.kwargs["comment_id"],
             task_id=self.kwargs["task_id"],
         )
@@ -177,3 +377,69 @@ class TaskCommentDetailView(generics.DestroyAPIView):
         if comment.author_id != self.request.user.id and comment.task.board.owner_id != self.request.user.id:
             raise PermissionDenied({"errors": ["You can only delete your own comments."]})
         return comment
+
+    def perform_destroy(self, instance):
+        """Delete the comment and log it on the board's activity."""
+        record_activity(
+            instance.task.board_id, self.request.user, Activity.Target.COMMENT, instance.id, Activity.Verb.DELETED,
+            {"task": [instance.task_id, None]},
+        )
+        instance.delete()
+
+
+class ArchivedTaskListView(generics.ListAPIView):
+    """Paginated archive of done tasks on the user's boards (``?board=<id>`` to narrow)."""
+
+    serializer_class = ArchivedTaskSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ArchivedTaskPagination
+
+    def get_queryset(self):
+        """Archived tasks on boards the user owns or belongs to."""
+        user = self.request.user
+        queryset = (
+            ArchivedTask.objects.filter(board__deleted_at__isnull=True)
+            .filter(Q(board__owner=user) | Exists(_membership_subquery(OuterRef("board_id"), user.id)))
+            .select_related("assignee", "reviewer")
+            .annotate(comments_count=Count("comments"))
+            .order_by("-archived_at", "-id")
+        )
+        board_id = self.request.query_params.get("board")
+        if board_id is not None:
+            if not board_id.isdigit():
+                raise ValidationError({"board": ["A valid integer is required."]})
+            queryset = queryset.filter(board_id=board_id)
+        return queryset
+
+
+class ArchivedTaskRestoreView(generics.GenericAPIView):
+    """Move an archived task and its comments back onto the board."""
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        """Restore the task and return it in the live task format."""
+        archived_task = get_object_or_404(
+            ArchivedTask.objects.filter(board__deleted_at__isnull=True).select_related("board"),
+            pk=self.kwargs["pk"],
+        )
+        _ensure_board_access(request.user, archived_task.board)
+        task = restore_task(archived_task)
+        detail = TaskDetailSerializer(task, context=self.get_serializer_context())
+        return Response(detail.data, status=status.HTTP_201_CREATED)
+
+
+class DashboardView(generics.GenericAPIView):
+    """Board counters and the requester's most urgent tasks in one round trip.
+
+    Built from a handful of aggregate queries (see ``tasks_app.dashboard``)
+    and optionally cached per user until one of their boards changes.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        """Return board totals plus assigned/reviewing counts and top tasks."""
+        context = self.get_serializer_context()
+        data = get_dashboard(request.user, lambda tasks: TaskListSerializer(tasks, many=True, context=context).data)
+        return Response(data)
@@ -0,0 +1,98 @@
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from boards_app.stamps import touch_boards
+from tasks_app.models import ArchivedComment, ArchivedTask, Comment, Task
+
+TASK_FIELDS = (
+    "id",
+    "board_id",
+    "title",
+    "description",
+    "priority",
+    "status",
+    "assignee_id",
+    "reviewer_id",
+    "due_date",
+    "rank",
+    "created_at",
+    "updated_at",
+)
+COMMENT_FIELDS = ("id", "task_id", "author_id", "content", "created_at")
+
+
+def _copy(source, model, fields):
+    """Build an unsaved ``model`` instance from the given attributes of ``source``."""
+    return model(**{field: getattr(source, field) for field in fields})
+
+
+def archivable_tasks(older_than_days=None):
+    """Done tasks on live boards untouched for longer than the configured age."""
+    days = settings.TASK_ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    cutoff = timezone.now() - timedelta(days=days)
+    return Task.objects.filter(
+        status=Task.Status.DONE,
+        updated_at__lt=cutoff,
+        board__deleted_at__isnull=True,
+    )
+
+
+def _loaded_versions(tasks):
+    """Match each of ``tasks`` only in the version it was read in."""
+    return reduce(or_, (Q(pk=task.pk, version=task.version) for task in tasks))
+
+
+def archive_done_tasks(older_than_days=None, batch_size=None, progress=None):
+    """Move old done tasks and their comments into the archive tables.
+
+    Each batch of at most ``batch_size`` tasks is copied and deleted in its
+    own transaction. The rows are locked where the database supports it,
+    and the DELETE repeats the archive conditions and the versions read, so
+    a task edited meanwhile stays live (a later run picks it up if it still
+    qualifies) and only the tasks actually deleted are archived.
+    ``progress(archived_so_far)`` runs after every batch. Returns the
+    number of archived tasks.
+    """
+    batch_size = batch_size or settings.TASK_ARCHIVE_BATCH_SIZE
+    queryset = archivable_tasks(older_than_days).order_by("pk")
+    archived = 0
+    while True:
+        with transaction.atomic():
+            tasks = list(queryset.select_for_update(of=("self",))[:batch_size])
+            if not tasks:
+                return archived
+            task_ids = [task.pk for task in tasks]
+            comments = list(Comment.objects.filter(task_id__in=task_ids).order_by())
+            queryset.filter(pk__in=task_ids).filter(_loaded_versions(tasks)).delete()
+            kept = set(Task.objects.filter(pk__in=task_ids).values_list("pk", flat=True))
+            tasks = [task for task in tasks if task.pk not in kept]
+            ArchivedTask.objects.bulk_create([_copy(task, ArchivedTask, TASK_FIELDS) for task in tasks])
+            ArchivedComment.objects.bulk_create(
+                [_copy(comment, ArchivedComment, COMMENT_FIELDS) for comment in comments if comment.task_id not in kept]
+            )
+            touch_boards(task.board_id for task in tasks)
+        archived += len(tasks)
+        if progress:
+            progress(archived)
+
+
+def restore_task(archived_task):
+    """Move an archived task and its comments back into the hot tables.
+
+    The task keeps its id and creation time; ``updated_at`` is bumped so the
+    next archive run does not pick it up again straight away.
+    """
+    with transaction.atomic():
+        comments = list(archived_task.comments.order_by())
+        task = _copy(archived_task, Task, TASK_FIELDS)
+        task.save(force_insert=True)
+        Comment.objects.bulk_create([_copy(comment, Comment, COMMENT_FIELDS) for comment in comments])
+        archived_task.delete()
+        touch_boards([task.board_id])
+    return task
@@ -0,0 +1,102 @@
+import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from boards_app.models import Board
+from boards_app.stamps import board_keys, membership_key, read_stamps
+from core.metrics import cache_requests
+from tasks_app.models import Task
+
+CACHE_KEY = "dashboard:{}:{}:{}"
+
+
+def _visible_board_ids(user):
+    boards = Board.objects.filter(pk__in=Board.objects.visible_ids(user)).order_by()
+    return list(boards.values_list("pk", flat=True))
+
+
+def _counts(user, board_ids, today):
+    """Board totals plus per-role open/overdue/due-this-week counts in one aggregate."""
+    open_tasks = ~Q(status=Task.Status.DONE)
+    overdue = open_tasks & Q(due_date__lt=today)
+    due_soon = open_tasks & Q(due_date__gte=today, due_date__lt=today + datetime.timedelta(days=7))
+    roles = {"assigned": Q(assignee_id=user.id), "reviewing": Q(reviewer_id=user.id)}
+    aggregates = {
+        "ticket_count": Count("pk"),
+        "tasks_to_do_count": Count("pk", filter=Q(status=Task.Status.TODO)),
+        "tasks_in_progress_count": Count("pk", filter=Q(status=Task.Status.IN_PROGRESS)),
+        "tasks_review_count": Count("pk", filter=Q(status=Task.Status.REVIEW)),
+        "tasks_high_prio_count": Count("pk", filter=Q(priority__in=[Task.Priority.HIGH, Task.Priority.CRITICAL])),
+    }
+    for role, condition in roles.items():
+        aggregates[f"{role}_open"] = Count("pk", filter=condition & open_tasks)
+        aggregates[f"{role}_overdue"] = Count("pk", filter=condition & overdue)
+        aggregates[f"{role}_due_this_week"] = Count("pk", filter=condition & due_soon)
+    return Task.objects.filter(board_id__in=board_ids).order_by().aggregate(**aggregates)
+
+
+def _top_tasks(board_ids, condition, limit):
+    """The ``limit`` open tasks due first (undated last)."""
+    return list(
+        Task.objects.filter(condition, board_id__in=board_ids)
+        .exclude(status=Task.Status.DONE)
+        .select_related("assignee", "reviewer")
+        .annotate(comments_count=Count("comments"))
+        .order_by(F("due_date").asc(nulls_last=True), "id")[:limit]
+    )
+
+
+def build_dashboard(user, board_ids, today, serialize_tasks):
+    """Assemble the dashboard of ``user`` over ``board_ids``.
+
+    Three queries: one conditional aggregate and the two top-N lists. With
+    the visible board ids read first (``get_dashboard``), a build takes four.
+    ``serialize_tasks(tasks)`` renders the top task lists.
+    """
+    counts = _counts(user, board_ids, today)
+    limit = settings.DASHBOARD_TASK_LIMIT
+    payload = {
+        "boards": {
+            "count": len(board_ids),
+            **{key: counts[key] for key in counts if key.startswith(("ticket_", "tasks_"))},
+        },
+    }
+    for role, condition in (("assigned", Q(assignee_id=user.id)), ("reviewing", Q(reviewer_id=user.id))):
+        payload[role] = {
+            "open": counts[f"{role}_open"],
+            "overdue": counts[f"{role}_overdue"],
+            "due_this_week": counts[f"{role}_due_this_week"],
+            "tasks": serialize_tasks(_top_tasks(board_ids, condition, limit)),
+        }
+    return payload
+
+
+def get_dashboard(user, serialize_tasks):
+    """Return the dashboard of ``user``, cached when DASHBOARD_CACHE_TIMEOUT is set.
+
+    A cached dashboard records the change stamps of the user's memberships
+    and of every board it covers (see ``boards_app.stamps``); it is served
+    only while all of them are unchanged, which costs two cache reads and
+    no queries. Stamps are read before the rows they guard, so a concurrent
+    write can only make the entry look stale, never fresh.
+    """
+    today = timezone.localdate()
+    timeout = settings.DASHBOARD_CACHE_TIMEOUT
+    key = CACHE_KEY.format(user.id, today.isoformat(), settings.DASHBOARD_TASK_LIMIT)
+    if timeout:
+        entry = cache.get(key)
+        fresh = entry is not None and read_stamps(list(entry["stamps"])) == entry["stamps"]
+        cache_requests.inc(cache="dashboard", result="hit" if fresh else "miss")
+        if fresh:
+            return entry["data"]
+        stamps = read_stamps([membership_key(user.id)])
+    board_ids = _visible_board_ids(user)
+    if timeout:
+        stamps.update(read_stamps(board_keys(board_ids)))
+    data = build_dashboard(user, board_ids, today, serialize_tasks)
+    if timeout:
+        cache.set(key, {"stamps": stamps, "data": data}, timeout)
+    return data
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tasks_app.archive import archive_done_tasks
+
+
+class Command(BaseCommand):
+    help = "Move done tasks older than TASK_ARCHIVE_AFTER_DAYS (and their comments) into the archive."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than-days", type=int, help="Override TASK_ARCHIVE_AFTER_DAYS.")
+        parser.add_argument("--batch-size", type=int, help="Tasks moved per transaction.")
+
+    def handle(self, *args, **options):
+        days = options["older_than_days"]
+        if days is None:
+            days = settings.TASK_ARCHIVE_AFTER_DAYS
+
+        def report(archived):
+            self.stdout.write(f"  {archived} tasks archived")
+
+        total = archive_done_tasks(older_than_days=days, batch_size=options["batch_size"], progress=report)
+        self.stdout.write(self.style.SUCCESS(f"Archived {total} done task(s) older than {days} day(s)."))
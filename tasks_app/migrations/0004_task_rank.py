@@ -0,0 +1,62 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+
+
+def evenly_spaced_ranks(count):
+    """Frozen copy of ``tasks_app.ranking.evenly_spaced_ranks`` as of this migration."""
+    width = 1
+    while BASE ** width < (count + 1) * BASE:
+        width += 1
+    step = BASE ** width // (count + 1)
+    ranks = []
+    for position in range(1, count + 1):
+        value, digits = position * step, []
+        for _ in range(width):
+            value, digit = divmod(value, BASE)
+            digits.append(DIGITS[digit])
+        ranks.append("".join(reversed(digits)).rstrip("0"))
+    return ranks
+
+
+def backfill_ranks(apps, schema_editor):
+    """Rank existing columns in their previous order (newest first)."""
+    Task = apps.get_model("tasks", "Task")
+    columns = Task.objects.order_by().values_list("board_id", "status").distinct()
+    for board_id, status in columns:
+        ids = list(
+            Task.objects.filter(board_id=board_id, status=status).order_by("-created_at", "-id").values_list("pk", flat=True)
+        )
+        tasks = [Task(pk=pk, rank=rank) for pk, rank in zip(ids, evenly_spaced_ranks(len(ids)))]
+        Task.objects.bulk_update(tasks, ["rank"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boards', '0003_activity'),
+        ('tasks', '0003_created_at_default'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedtask',
+            name='rank',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='rank',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['board', 'status', 'rank'], name='tasks_task_board_i_d73ae9_idx'),
+        ),
+        migrations.RunPython(backfill_ranks, migrations.RunPython.noop),
+    ]
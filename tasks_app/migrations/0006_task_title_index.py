@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_task_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['title'], name='tasks_task_title_6b13c2_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 
 class Task(models.Model):
@@ -47,11 +48,21 @@ class Task(models.Model):
         blank=True,
     )
     due_date = models.DateField(blank=True, null=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Position within the (board, status) column; see tasks_app.ranking.
+    rank = models.CharField(max_length=255, default="", blank=True)
+    # Bumped by every API write; see core.concurrency.
+    version = models.PositiveIntegerField(default=1, editable=False)
+    # Not auto_now_add, so bulk imports and restores can keep the original time.
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=["status", "updated_at"]),
+            models.Index(fields=["board", "status", "rank"]),
+            models.Index(fields=["title"]),
+        ]
         verbose_name = "Task"
         verbose_name_plural = "Tasks"
 
@@ -71,7 +82,7 @@ class Comment(models.Model):
         on_delete=models.CASCADE,
     )
     content = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         ordering = ("created_at",)
@@ -80,3 +91,72 @@ class Comment(models.Model):
 
     def __str__(self) -> str:
         return f"Comment by {self.author} on {self.task}"
+
+
+class ArchivedTask(models.Model):
+    """Completed task moved out of the hot ``Task`` table; keeps its original id."""
+
+    id = models.BigIntegerField(primary_key=True)
+    board = models.ForeignKey(
+        'boards.Board',
+        related_name="archived_tasks",
+        on_delete=models.CASCADE,
+    )
+    title = models.CharField(max_length=255)
+    description = models.TextField(blank=True)
+    priority = models.CharField(max_length=20, choices=Task.Priority.choices)
+    status = models.CharField(max_length=20, choices=Task.Status.choices)
+    assignee = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="+",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    reviewer = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="+",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    due_date = models.DateField(blank=True, null=True)
+    rank = models.CharField(max_length=255, default="", blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ("-archived_at", "-id")
+        indexes = [models.Index(fields=["board", "-archived_at"])]
+        verbose_name = "Archived task"
+        verbose_name_plural = "Archived tasks"
+
+    def __str__(self) -> str:
+        return self.title
+
+
+class ArchivedComment(models.Model):
+    """Comment that was archived together with its task."""
+
+    id = models.BigIntegerField(primary_key=True)
+    task = models.ForeignKey(
+        ArchivedTask,
+        related_name="comments",
+        on_delete=models.CASCADE,
+    )
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="+",
+        on_delete=models.CASCADE,
+    )
+    content = models.TextField()
+    created_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ("created_at",)
+        verbose_name = "Archived comment"
+        verbose_name_plural = "Archived comments"
+
+    def __str__(self) -> str:
+        return f"Archived comment {self.pk}"
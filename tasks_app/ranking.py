@@ -0,0 +1,129 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+
+from core.background import BackgroundWorker
+from core.concurrency import PreconditionFailed
+from tasks_app.models import Task
+
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+
+rank_worker = BackgroundWorker("task-rank")
+
+
+def rank_between(lower=None, upper=None):
+    """Return a rank sorting strictly between ``lower`` and ``upper``.
+
+    Ranks are base-36 strings compared lexicographically; ``None`` (or "")
+    means the start/end of the column. Results never end in "0", so there is
+    always room before any rank, and only the moved row has to be written.
+    """
+    lower = lower or ""
+    if upper is not None and upper != "" and lower >= upper:
+        raise ValueError(f"{lower!r} must sort before {upper!r}.")
+    return _midpoint(lower, upper or None)
+
+
+def _midpoint(lower, upper):
+    if upper is not None:
+        # Keep the common prefix (missing lower digits count as "0").
+        prefix = 0
+        while prefix < len(upper) and (lower[prefix] if prefix < len(lower) else "0") == upper[prefix]:
+            prefix += 1
+        if prefix:
+            return upper[:prefix] + _midpoint(lower[prefix:], upper[prefix:])
+    low = DIGITS.index(lower[0]) if lower else 0
+    high = DIGITS.index(upper[0]) if upper is not None else BASE
+    if high - low > 1:
+        return DIGITS[(low + high) // 2]
+    if upper is not None and len(upper) > 1:
+        return upper[0]
+    return DIGITS[low] + _midpoint(lower[1:], None)
+
+
+def evenly_spaced_ranks(count):
+    """``count`` ascending ranks spread evenly over the key space."""
+    width = 1
+    while BASE ** width < (count + 1) * BASE:
+        width += 1
+    step = BASE ** width // (count + 1)
+    ranks = []
+    for position in range(1, count + 1):
+        value, digits = position * step, []
+        for _ in range(width):
+            value, digit = divmod(value, BASE)
+            digits.append(DIGITS[digit])
+        ranks.append("".join(reversed(digits)).rstrip("0"))
+    return ranks
+
+
+def column(board_id, status):
+    """Tasks of one kanban column."""
+    return Task.objects.filter(board_id=board_id, status=status)
+
+
+def top_rank(board_id, status, exclude=None):
+    """A rank placing a task above everything in the column (one indexed query)."""
+    tasks = column(board_id, status)
+    if exclude is not None:
+        tasks = tasks.exclude(pk=exclude)
+    first = tasks.order_by("rank", "id").values_list("rank", flat=True).first()
+    return rank_between(None, first or None)
+
+
+class _ColumnChanged(Exception):
+    """A task of the column was written while it was being rebalanced."""
+
+
+def _rerank(rows, ranks):
+    """Set ``ranks`` on ``rows`` (pk, version) in one UPDATE, only where the version is unchanged.
+
+    Returns whether every row matched.
+    """
+    updated = Task.objects.filter(
+        pk__in=[pk for pk, _ in rows],
+        version=Case(*[When(pk=pk, then=Value(version)) for pk, version in rows]),
+    ).update(
+        rank=Case(*[When(pk=pk, then=Value(rank)) for (pk, _), rank in zip(rows, ranks)]),
+        version=F("version") + 1,
+    )
+    return updated == len(rows)
+
+
+def rebalance_column(board_id, status, batch_size=100, attempts=3):
+    """Rewrite the ranks of a column as short, evenly spaced keys.
+
+    Each batch is one UPDATE conditional on the versions read, and bumps
+    them (see ``core.concurrency``). ``select_for_update`` does nothing on
+    SQLite, so if a task was moved, edited or added in between, the whole
+    rebalance rolls back and starts over; PreconditionFailed is raised
+    after ``attempts`` such runs.
+    """
+    for _ in range(attempts):
+        try:
+            with transaction.atomic():
+                tasks = column(board_id, status).select_for_update().order_by("rank", "id")
+                rows = list(tasks.values_list("pk", "version"))
+                ranks = evenly_spaced_ranks(len(rows))
+                for start in range(0, len(rows), batch_size):
+                    if not _rerank(rows[start:start + batch_size], ranks[start:start + batch_size]):
+                        raise _ColumnChanged()
+                if column(board_id, status).count() != len(rows):
+                    raise _ColumnChanged()
+            return len(rows)
+        except _ColumnChanged:
+            continue
+    raise PreconditionFailed()
+
+
+def rebalance_board(board_id):
+    """Rebalance every column of a board."""
+    for status in Task.Status.values:
+        rebalance_column(board_id, status)
+
+
+def maybe_rebalance(board_id, status, rank):
+    """Queue a background rebalance once ranks in a column grow too long."""
+    if len(rank) > settings.TASK_RANK_REBALANCE_LENGTH:
+        rank_worker.submit(rebalance_column, board_id, status)
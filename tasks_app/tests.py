@@ -0,0 +1,528 @@
+import threading
+import time
+import tracemalloc
+from datetime import timedelta
+from unittest import mock, skipUnless
+
+from django.contrib.admin import site
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import OperationalError, connection, connections, transaction
+from django.db.models import F
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from boards_app.models import Board
+from core.concurrency import PreconditionFailed, update_versioned
+from core.paginator import EstimatedCountPaginator
+from tasks_app import archive, ranking
+from tasks_app.archive import archive_done_tasks
+from tasks_app.admin import CommentAdmin, TaskAdmin
+from tasks_app.models import ArchivedComment, ArchivedTask, Comment, Task
+from tasks_app.ranking import rebalance_column
+
+User = get_user_model()
+
+
+def make_user(name):
+    return User.objects.create_user(username=name, email=f"{name}@example.com", password="secret")
+
+
+def client_for(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.get_or_create(user=user)[0].key}")
+    return client
+
+
+def make_board(owner, *members):
+    board = Board.objects.create(name="Board", owner=owner)
+    board.add_members([owner.id, *(member.id for member in members)])
+    return board
+
+
+def in_threads(count, target):
+    """Run ``target(index)`` on ``count`` threads at once, each with its own connection."""
+    start = threading.Barrier(count)
+    errors = []
+
+    def run(index):
+        try:
+            start.wait()
+            target(index)
+        except Exception as exc:  # noqa: BLE001 - reported by the test
+            errors.append(exc)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+
+
+def retry_locked(fn):
+    """Retry ``fn`` while SQLite reports lock contention (not a lost update)."""
+    while True:
+        try:
+            return fn()
+        except OperationalError as exc:
+            if "locked" not in str(exc):
+                raise
+
+
+@override_settings(ADMISSION_CONTROL_ENABLED=False, ACTIVITY_LOG_ENABLED=False)
+class ConcurrentTaskUpdateTests(TransactionTestCase):
+    """Many threads doing read-modify-write on one task lose no update.
+
+    Optimistic: GET the ETag, PATCH with If-Match, retry on 412. Pessimistic:
+    lock the row, read, write, commit. Both must end with every increment.
+    """
+
+    threads = 8
+    increments = 10
+
+    def setUp(self):
+        self.user = make_user("alice")
+        self.board = make_board(self.user)
+        self.task = Task.objects.create(board=self.board, title="Counter", description="")
+        self.token = Token.objects.create(user=self.user).key
+
+    def test_optimistic_updates_lose_nothing(self):
+        url = f"/api/tasks/{self.task.pk}/"
+
+        def work(index):
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f"Token {self.token}")
+            for number in range(self.increments):
+                marker = f"{index}.{number};"
+                while True:
+                    loaded = retry_locked(lambda: client.get(url))
+                    # A PATCH that failed on lock contention may still have committed.
+                    if marker in loaded.data["description"]:
+                        break
+                    body = {"description": loaded.data["description"] + marker}
+                    response = retry_locked(lambda: client.patch(url, body, format="json", HTTP_IF_MATCH=loaded["ETag"]))
+                    if response.status_code == 200:
+                        break
+                    self.assertEqual(response.status_code, 412)
+
+        in_threads(self.threads, work)
+        self.task.refresh_from_db()
+        markers = self.task.description.split(";")[:-1]
+        self.assertEqual(len(markers), self.threads * self.increments)
+        self.assertEqual(len(set(markers)), self.threads * self.increments)
+        self.assertEqual(self.task.version, 1 + self.threads * self.increments)
+
+    def pessimistic_increment(self):
+        """Lock the row, read, write, commit (the locking path versions replaced)."""
+        with transaction.atomic():
+            # SELECT ... FOR UPDATE where supported; SQLite only locks on write.
+            tasks = Task.objects.filter(pk=self.task.pk)
+            if connection.features.has_select_for_update:
+                list(tasks.select_for_update())
+            else:
+                tasks.update(version=F("version"))
+            task = Task.objects.get(pk=self.task.pk)
+            Task.objects.filter(pk=task.pk).update(description=task.description + "x")
+
+    def optimistic_increment(self):
+        """Read without locks, write conditionally on the version read, retry on 412."""
+        while True:
+            task = Task.objects.get(pk=self.task.pk)
+            try:
+                update_versioned(task, description=task.description + "x")
+                return
+            except PreconditionFailed:
+                continue
+
+    def run_increments(self, increment):
+        def work(index):
+            for _ in range(self.increments):
+                # Lock errors roll the whole transaction back, so retrying is safe.
+                retry_locked(increment)
+
+        Task.objects.filter(pk=self.task.pk).update(description="")
+        started = time.perf_counter()
+        in_threads(self.threads, work)
+        elapsed = time.perf_counter() - started
+        self.task.refresh_from_db()
+        self.assertEqual(len(self.task.description), self.threads * self.increments)
+        return self.threads * self.increments / elapsed
+
+    def test_pessimistic_updates_lose_nothing(self):
+        self.run_increments(self.pessimistic_increment)
+
+    def test_optimistic_throughput_keeps_up_with_row_locking(self):
+        # Best of three each, in increments per second.
+        pessimistic = max(self.run_increments(self.pessimistic_increment) for _ in range(3))
+        optimistic = max(self.run_increments(self.optimistic_increment) for _ in range(3))
+        # Readers take no lock and a conflict costs one re-read, not a wait
+        # (typically 1.5-4x the locking path here).
+        self.assertGreater(optimistic, pessimistic * 0.8)
+
+
+@override_settings(ACTIVITY_LOG_ENABLED=False)
+class TaskVersioningTests(TestCase):
+    def setUp(self):
+        self.user = make_user("alice")
+        self.client = client_for(self.user)
+        self.board = make_board(self.user)
+        self.task = Task.objects.create(board=self.board, title="Task", rank="i")
+
+    def test_patch_writes_only_changed_fields(self):
+        loaded = self.client.get(f"/api/tasks/{self.task.pk}/")
+        # A rank rebalance between load and save must survive the PATCH.
+        Task.objects.filter(pk=self.task.pk).update(rank="r")
+        response = self.client.patch(
+            f"/api/tasks/{self.task.pk}/", {"title": "Renamed"}, format="json", HTTP_IF_MATCH=loaded["ETag"]
+        )
+        self.assertEqual(response.status_code, 200)
+        self.task.refresh_from_db()
+        self.assertEqual((self.task.title, self.task.rank, self.task.version), ("Renamed", "r", 2))
+
+    def test_delete_of_stale_version_is_rejected(self):
+        url = f"/api/tasks/{self.task.pk}/"
+        etag = self.client.get(url)["ETag"]
+        Task.objects.filter(pk=self.task.pk).update(version=F("version") + 1)
+        self.assertEqual(self.client.delete(url, HTTP_IF_MATCH=etag).status_code, 412)
+        self.assertTrue(Task.objects.filter(pk=self.task.pk).exists())
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertFalse(Task.objects.filter(pk=self.task.pk).exists())
+
+
+@override_settings(ACTIVITY_LOG_ENABLED=False)
+class RankRebalanceTests(TestCase):
+    def setUp(self):
+        self.user = make_user("alice")
+        self.client = client_for(self.user)
+        self.board = make_board(self.user)
+        self.tasks = [Task.objects.create(board=self.board, title=f"Task {index}", rank="") for index in range(5)]
+
+    def test_rebalance_bumps_versions(self):
+        self.assertEqual(rebalance_column(self.board.pk, Task.Status.TODO), 5)
+        ranks = list(ranking.column(self.board.pk, Task.Status.TODO).order_by("rank").values_list("rank", "version"))
+        self.assertEqual(len({rank for rank, _ in ranks}), 5)
+        self.assertTrue(all(version == 2 for _, version in ranks))
+
+    def test_rebalance_restarts_when_a_task_changes_meanwhile(self):
+        original = ranking._rerank
+        calls = []
+
+        def interfere(rows, ranks):
+            if not calls:
+                # Stands in for a concurrent write between the read and the UPDATE.
+                Task.objects.filter(pk=rows[0][0]).update(version=F("version") + 1)
+            calls.append(len(rows))
+            return original(rows, ranks)
+
+        with mock.patch.object(ranking, "_rerank", interfere):
+            rebalance_column(self.board.pk, Task.Status.TODO)
+        # The first run saw a stale version and rolled back; the second applied.
+        self.assertEqual(len(calls), 2)
+        ranks = Task.objects.filter(board=self.board).values_list("rank", flat=True)
+        self.assertEqual(len(set(ranks)), 5)
+
+    @override_settings(TASK_RANK_REBALANCE_LENGTH=8, ADMISSION_CONTROL_ENABLED=False)
+    def test_repeated_moves_into_one_gap_keep_ranks_bounded(self):
+        rebalance_column(self.board.pk, Task.Status.TODO)
+        first, *movers = self.tasks[:3]
+        lengths = []
+        # Run the background rebalance inline, right after the move that asked for it.
+        with mock.patch.object(ranking.rank_worker, "submit", side_effect=lambda fn, *args: fn(*args)) as submit:
+            for index in range(200):
+                mover = movers[index % 2]
+                response = self.client.post(f"/api/tasks/{mover.pk}/move/", {"after": first.pk}, format="json")
+                self.assertEqual(response.status_code, 200)
+                lengths.append(len(response.data["rank"]))
+        # Each move halves the gap; without rebalancing the 200th rank would be ~40 digits long.
+        self.assertLessEqual(max(lengths), 9)
+        self.assertGreater(submit.call_count, 1)
+        ranks = Task.objects.filter(board=self.board).values_list("rank", flat=True)
+        self.assertLessEqual(max(map(len, ranks)), 8)
+        order = list(ranking.column(self.board.pk, Task.Status.TODO).order_by("rank", "id").values_list("pk", flat=True))
+        self.assertEqual(order[:3], [first.pk, movers[1].pk, movers[0].pk])
+
+    def test_move_into_unranked_column_keeps_its_etag_check(self):
+        task = self.tasks[0]
+        url = f"/api/tasks/{task.pk}/"
+        etag = self.client.get(url)["ETag"]
+        response = self.client.post(
+            f"{url}move/", {"after": self.tasks[1].pk}, format="json", HTTP_IF_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["version"], 3)
+
+
+@override_settings(DASHBOARD_CACHE_TIMEOUT=60, ACTIVITY_LOG_ENABLED=False)
+class DashboardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_user("alice")
+        self.client = client_for(self.user)
+        self.board = make_board(self.user)
+        self.task = Task.objects.create(board=self.board, title="Done", status=Task.Status.DONE)
+
+    def ticket_count(self):
+        return self.client.get("/api/dashboard/").data["boards"]["ticket_count"]
+
+    def test_archive_and_restore_invalidate_the_cached_dashboard(self):
+        self.assertEqual(self.ticket_count(), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(archive_done_tasks(older_than_days=0), 1)
+        self.assertEqual(self.ticket_count(), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f"/api/tasks/archived/{self.task.pk}/restore/")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.ticket_count(), 1)
+
+    def test_cache_hit_runs_no_queries(self):
+        self.ticket_count()
+        self.ticket_count()
+        with self.assertNumQueries(1):
+            # Token authentication only; the middleware has the token cached.
+            self.ticket_count()
+
+    @override_settings(DASHBOARD_CACHE_TIMEOUT=0)
+    def test_build_covers_owned_and_joined_boards_in_four_queries(self):
+        other = make_user("bob")
+        joined = make_board(other, self.user)
+        Task.objects.create(board=joined, title="Joined")
+        deleted = make_board(other, self.user)
+        Task.objects.create(board=deleted, title="Deleted")
+        Board.all_objects.filter(pk=deleted.pk).update(deleted_at=timezone.now())
+        self.ticket_count()
+        # Token, visible board ids, the aggregate and the two top-N lists.
+        with self.assertNumQueries(5):
+            self.assertEqual(self.ticket_count(), 2)
+
+
+@override_settings(ACTIVITY_LOG_ENABLED=False)
+class TaskAdminChangelistTests(TestCase):
+    """Changelists cost a fixed number of queries however many rows there are."""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser("root", "root@example.com", "secret")
+        self.client.force_login(self.admin)
+
+    def add_rows(self, count):
+        for index in range(count):
+            board = Board.objects.create(name=f"Board {index}", owner=self.admin)
+            task = Task.objects.create(board=board, title=f"Task {index}", assignee=self.admin, reviewer=self.admin)
+            Comment.objects.create(task=task, author=self.admin, content="Comment")
+
+    def assert_changelist_queries(self, url, expected):
+        # Session, user, count (cached once per table when unfiltered), rows, board filter.
+        for count in (3, 30):
+            self.add_rows(count)
+            cache.clear()
+            with self.assertNumQueries(expected):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_task_changelist(self):
+        self.assert_changelist_queries("/admin/tasks/task/", 6)
+
+    def test_filtered_task_changelist(self):
+        self.assert_changelist_queries("/admin/tasks/task/?status=to-do", 5)
+
+    def test_searched_task_changelist(self):
+        self.assert_changelist_queries("/admin/tasks/task/?q=Task", 5)
+
+    def test_comment_changelist(self):
+        self.assert_changelist_queries("/admin/tasks/comment/", 6)
+
+    def search(self, admin_class, model, term):
+        model_admin = admin_class(model, site)
+        request = RequestFactory().get("/", {"q": term})
+        request.user = self.admin
+        return model_admin.get_search_results(request, model.objects.all(), term)[0]
+
+    def test_search_matches_id_or_title_prefix(self):
+        self.add_rows(3)
+        alpha = Task.objects.create(board=Board.objects.first(), title="Alpha release")
+        Task.objects.create(board=alpha.board, title="alphabet soup")
+        self.assertEqual(list(self.search(TaskAdmin, Task, "Alp")), [alpha])
+        self.assertEqual(list(self.search(TaskAdmin, Task, str(alpha.pk))), [alpha])
+        self.assertFalse(self.search(TaskAdmin, Task, "lpha").exists())
+        response = self.client.get("/admin/tasks/task/?q=Alpha")
+        self.assertEqual(list(response.context["cl"].result_list), [alpha])
+
+    def test_comment_search_matches_author_or_task(self):
+        self.add_rows(2)
+        task = Task.objects.first()
+        self.assertEqual(self.search(CommentAdmin, Comment, "ro").count(), 2)
+        self.assertEqual(list(self.search(CommentAdmin, Comment, str(task.pk))), list(task.comments.all()))
+
+    @skipUnless(connection.vendor == "sqlite", "reads SQLite's query plan")
+    def test_title_search_uses_the_index(self):
+        plan = self.search(TaskAdmin, Task, "Alp").explain()
+        self.assertIn("tasks_task_title", plan)
+
+    def test_pages_past_the_count_limit_are_reachable(self):
+        self.add_rows(12)
+        with mock.patch.object(EstimatedCountPaginator, "count_limit", 4), \
+                mock.patch.object(TaskAdmin, "list_per_page", 2):
+            response = self.client.get("/admin/tasks/task/?status=to-do&p=5")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["cl"].result_list), 2)
+
+
+@override_settings(ACTIVITY_LOG_ENABLED=False)
+class TaskWriteQueryBudgetTests(TestCase):
+    """The write budgets documented on ``TaskViewSet``, plus one query for token auth."""
+
+    def setUp(self):
+        self.user = make_user("alice")
+        self.member = make_user("bob")
+        self.client = client_for(self.user)
+        self.board = make_board(self.user, self.member)
+        self.tasks = [Task.objects.create(board=self.board, title=f"Task {index}", rank=rank) for index, rank in enumerate("dhm")]
+        # Warm the middleware's token cache; afterwards only DRF's own lookup remains.
+        self.client.get(f"/api/tasks/{self.tasks[0].pk}/")
+
+    def fill_column(self, count):
+        Task.objects.bulk_create(
+            Task(board=self.board, title=f"Filler {index}", rank=f"z{index:03d}") for index in range(count)
+        )
+
+    def test_create(self):
+        body = {"board": self.board.pk, "title": "New", "assignee_id": self.member.pk, "priority": "low"}
+        for size in (0, 50):
+            self.fill_column(size)
+            with self.assertNumQueries(1 + 4):
+                self.assertEqual(self.client.post("/api/tasks/", body, format="json").status_code, 201)
+
+    def test_update(self):
+        url = f"/api/tasks/{self.tasks[0].pk}/"
+        with self.assertNumQueries(1 + 3):
+            response = self.client.patch(url, {"title": "Renamed", "assignee_id": self.member.pk}, format="json")
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(1 + 4):
+            response = self.client.patch(url, {"status": Task.Status.DONE}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_destroy(self):
+        with self.assertNumQueries(1 + 4):
+            self.assertEqual(self.client.delete(f"/api/tasks/{self.tasks[2].pk}/").status_code, 204)
+
+    def test_move_does_not_grow_with_the_column(self):
+        url = f"/api/tasks/{self.tasks[0].pk}/move/"
+        for size in (0, 50):
+            self.fill_column(size)
+            with self.assertNumQueries(1 + 4):
+                response = self.client.post(url, {"after": self.tasks[1].pk}, format="json")
+            self.assertEqual(response.status_code, 200)
+            with self.assertNumQueries(1 + 3):
+                response = self.client.post(url, {"status": Task.Status.REVIEW}, format="json")
+            self.assertEqual(response.status_code, 200)
+            Task.objects.filter(pk=self.tasks[0].pk).update(status=Task.Status.TODO)
+
+
+@override_settings(ACTIVITY_LOG_ENABLED=False)
+class TaskArchiveTests(TestCase):
+    def setUp(self):
+        self.user = make_user("alice")
+        self.client = client_for(self.user)
+        self.board = make_board(self.user)
+        self.old = [self.make_task(f"Old {index}", Task.Status.DONE, days=40) for index in range(5)]
+        for task in self.old:
+            Comment.objects.create(task=task, author=self.user, content=f"On {task.title}")
+
+    def make_task(self, title, status, days, board=None):
+        task = Task.objects.create(board=board or self.board, title=title, status=status)
+        Task.objects.filter(pk=task.pk).update(updated_at=timezone.now() - timedelta(days=days))
+        return task
+
+    def test_archives_in_batches(self):
+        progress = []
+        self.assertEqual(archive_done_tasks(older_than_days=30, batch_size=2, progress=progress.append), 5)
+        self.assertEqual(progress, [2, 4, 5])
+        self.assertEqual(ArchivedTask.objects.count(), 5)
+        self.assertEqual(ArchivedComment.objects.count(), 5)
+        self.assertFalse(Task.objects.exists())
+        self.assertFalse(Comment.objects.exists())
+
+    def test_only_old_done_tasks_are_archived(self):
+        recent = self.make_task("Recent", Task.Status.DONE, days=5)
+        open_task = self.make_task("Open", Task.Status.IN_PROGRESS, days=40)
+        self.assertEqual(archive_done_tasks(older_than_days=30), 5)
+        self.assertEqual(set(Task.objects.values_list("pk", flat=True)), {recent.pk, open_task.pk})
+
+    def test_task_edited_during_the_run_stays_live(self):
+        edited = self.old[0]
+        original = archive._loaded_versions
+
+        def edit_first(tasks):
+            # Stands in for a concurrent edit between the read and the delete.
+            Task.objects.filter(pk=edited.pk).update(status=Task.Status.REVIEW, version=F("version") + 1)
+            return original(tasks)
+
+        with mock.patch.object(archive, "_loaded_versions", edit_first):
+            self.assertEqual(archive_done_tasks(older_than_days=30), 4)
+        edited.refresh_from_db()
+        self.assertEqual(edited.status, Task.Status.REVIEW)
+        self.assertFalse(ArchivedTask.objects.filter(pk=edited.pk).exists())
+        self.assertTrue(Comment.objects.filter(task=edited).exists())
+
+    def test_archived_list_is_paginated_and_scoped_to_visible_boards(self):
+        stranger = make_user("mallory")
+        self.make_task("Hidden", Task.Status.DONE, days=40, board=make_board(stranger))
+        archive_done_tasks(older_than_days=30)
+        response = self.client.get("/api/tasks/archived/", {"page_size": 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 5)
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertEqual(response.data["results"][0]["comments_count"], 1)
+        response = self.client.get("/api/tasks/archived/", {"board": self.board.pk, "page": 3, "page_size": 2})
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(self.client.get("/api/tasks/archived/", {"board": "x"}).status_code, 400)
+
+
+@override_settings(ACTIVITY_LOG_ENABLED=False, ADMISSION_CONTROL_ENABLED=False, STREAMING_CHUNK_SIZE=50, STREAMING_GZIP=False)
+class TaskStreamTests(TestCase):
+    """``?stream=1`` reads tasks in chunks with a fixed number of queries and flat memory."""
+
+    def setUp(self):
+        self.owner = make_user("alice")
+        self.client = client_for(self.owner)
+        self.client.get("/api/tasks/?stream=1")
+
+    def make_tasks(self, count):
+        board = make_board(self.owner)
+        tasks = Task.objects.bulk_create(
+            Task(board=board, title=f"Task {index}", description="x" * 200, rank=f"{index:06d}") for index in range(count)
+        )
+        Comment.objects.bulk_create(Comment(task=task, author=self.owner, content="y" * 200) for task in tasks)
+
+    def measure(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            tracemalloc.start()
+            try:
+                response = self.client.get(url)
+                # Chunks are dropped as they arrive, like a server sending them.
+                chunks = response.streaming_content if response.streaming else [response.content]
+                count = sum(chunk.count(b'"title":') for chunk in chunks)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+        return count, len(queries.captured_queries), peak
+
+    def test_stream_queries_and_memory_do_not_grow_with_the_list(self):
+        self.make_tasks(100)
+        small = self.measure("/api/tasks/?stream=1")
+        self.make_tasks(1900)
+        large = self.measure("/api/tasks/?stream=1")
+        self.assertEqual((small[0], large[0]), (100, 2000))
+        # No per-chunk comment prefetch.
+        self.assertEqual(large[1], small[1])
+        buffered = self.measure("/api/tasks/")
+        self.assertEqual(buffered[0], 2000)
+        # The buffered list holds every task at once; the stream one chunk.
+        self.assertLess(large[2], buffered[2] / 4)
+        self.assertLess(large[2] - small[2], 200_000)